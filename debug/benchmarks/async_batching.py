@@ -0,0 +1,84 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+import asyncio
+from timeit import default_timer
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    generate_dataset, generate_vocabulary, get_dataset_queries,
+    latency_summary)
+from snips_nlu import SnipsNLUEngine, load_resources
+from snips_nlu.nlu_engine.async_engine import AsyncNLUEngine
+
+
+def _replay(engine, queries, rate, max_batch_size, max_wait_ms):
+    """Sends *queries* at a constant *rate* to an :class:`AsyncNLUEngine`
+    and returns the latencies along with the elapsed time and the engine
+    metrics"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    async_engine = AsyncNLUEngine(engine, max_batch_size=max_batch_size,
+                                  max_wait_ms=max_wait_ms)
+    latencies = []
+    futures = []
+
+    def on_parsed(start, _):
+        latencies.append((default_timer() - start) * 1000)
+
+    def send(text):
+        future = async_engine.parse(text)
+        future.add_done_callback(lambda f, s=default_timer(): on_parsed(s, f))
+        futures.append(future)
+
+    try:
+        start = default_timer()
+        for i, text in enumerate(queries):
+            loop.call_later(i / rate, send, text)
+        loop.run_until_complete(asyncio.sleep(len(queries) / rate))
+        loop.run_until_complete(asyncio.gather(*futures))
+        elapsed_time = default_timer() - start
+    finally:
+        async_engine.close()
+        asyncio.set_event_loop(None)
+        loop.close()
+    return latencies, elapsed_time, async_engine.metrics
+
+
+def main_async_batching():
+    parser = argparse.ArgumentParser(
+        description="Measure the latency and the throughput of the "
+                    "AsyncNLUEngine micro-batching for several request "
+                    "rates and batching windows")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--nb-queries", type=int, default=2000)
+    parser.add_argument("--rates", type=float, nargs="+",
+                        default=[100, 500, 2000])
+    parser.add_argument("--max-batch-sizes", type=int, nargs="+",
+                        default=[1, 8, 32])
+    parser.add_argument("--max-wait-ms", type=float, default=5.)
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    vocabulary = generate_vocabulary(1000, random_state)
+    dataset = generate_dataset(args.language, vocabulary, random_state)
+    queries = get_dataset_queries(dataset)
+    stream = [queries[i] for i in
+              random_state.randint(0, len(queries), args.nb_queries)]
+    engine = SnipsNLUEngine().fit(dataset)
+
+    for rate in args.rates:
+        for max_batch_size in args.max_batch_sizes:
+            latencies, elapsed_time, metrics = _replay(
+                engine, stream, rate, max_batch_size, args.max_wait_ms)
+            print("rate=%s/s max_batch_size=%s: %.1f queries/s, mean batch "
+                  "size=%.1f, %s" % (
+                      rate, max_batch_size, len(stream) / elapsed_time,
+                      metrics["mean_batch_size"], latency_summary(latencies)))
+
+
+if __name__ == '__main__':
+    main_async_batching()
@@ -0,0 +1,58 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    BUILTIN_ENTITIES_VALUES, generate_dataset, generate_vocabulary,
+    get_dataset_queries, latency_summary, measure_latencies)
+from snips_nlu import SnipsNLUEngine, load_resources
+
+
+def main_builtin_entities_scope():
+    parser = argparse.ArgumentParser(
+        description="Measure the latency saved per query by restricting the "
+                    "builtin entities parsing to the entities used by the "
+                    "trained models of an engine with the default config")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--nb-queries", type=int, default=1000)
+    parser.add_argument("--builtin-entity", default="snips/number",
+                        choices=sorted(BUILTIN_ENTITIES_VALUES))
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    vocabulary = generate_vocabulary(1000, random_state)
+    dataset = generate_dataset(args.language, vocabulary, random_state,
+                               builtin_slot_ratio=0.5,
+                               builtin_entities=[args.builtin_entity])
+    queries = get_dataset_queries(dataset)
+    # Append expressions of all the builtin entities to the queries, so that
+    # the unscoped parsing has some work to do
+    other_values = [v for values in BUILTIN_ENTITIES_VALUES.values()
+                    for v in values]
+    queries = ["%s %s" % (q, random_state.choice(other_values))
+               for q in queries]
+    stream = [queries[i] for i in
+              random_state.randint(0, len(queries), args.nb_queries)]
+
+    engine = SnipsNLUEngine().fit(dataset)
+    scope = engine.builtin_entities_scope
+    scoped_latencies = measure_latencies(engine.parse, stream)
+    # Emulates an engine trained before the scope was introduced. The builtin
+    # entities parsing results are cached, hence the unscoped parsing is
+    # measured on distinct inputs.
+    engine.builtin_entities_scope = None
+    unscoped_latencies = measure_latencies(
+        engine.parse, ["%s " % q for q in stream])
+    print("scope: %s" % scope)
+    print("unscoped: %s" % latency_summary(unscoped_latencies))
+    print("scoped:   %s" % latency_summary(scoped_latencies))
+    print("latency saved per query: %.3fms" % (
+        np.mean(unscoped_latencies) - np.mean(scoped_latencies)))
+
+
+if __name__ == '__main__':
+    main_builtin_entities_scope()
@@ -0,0 +1,66 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    generate_dataset, generate_vocabulary, get_dataset_queries, measure)
+from snips_nlu import SnipsNLUEngine, load_resources
+from snips_nlu.builtin_entities import get_builtin_entity_parser
+
+
+def _parse_concurrently(engine, queries, n_threads):
+    pool = ThreadPool(processes=n_threads)
+    try:
+        return pool.map(engine.parse, queries, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def main_concurrent_parsing():
+    parser = argparse.ArgumentParser(
+        description="Stress a shared NLU engine with concurrent parsing "
+                    "requests, checking the results against sequential ones "
+                    "and reporting the throughput scaling across threads")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--nb-queries", type=int, default=2000)
+    parser.add_argument("--threads", type=int, nargs="+",
+                        default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    vocabulary = generate_vocabulary(1000, random_state)
+    dataset = generate_dataset(args.language, vocabulary, random_state,
+                               builtin_slot_ratio=0.2)
+    queries = get_dataset_queries(dataset)
+    stream = [queries[i] for i in
+              random_state.randint(0, len(queries), args.nb_queries)]
+
+    engine = SnipsNLUEngine().fit(dataset)
+    builtin_parser = get_builtin_entity_parser(args.language)
+    expected_results = [engine.parse(q) for q in stream]
+
+    base_throughput = None
+    for n_threads in args.threads:
+        # Each run starts with a cold builtin entities cache
+        builtin_parser.clear_cache()
+        results, elapsed_time = measure(
+            _parse_concurrently, engine, stream, n_threads)
+        nb_mismatches = sum(1 for res, expected
+                            in zip(results, expected_results)
+                            if res != expected)
+        throughput = len(stream) / elapsed_time
+        if base_throughput is None:
+            base_throughput = throughput
+        print("%s thread(s): %.1f queries/s (x%.2f), %s mismatch(es)" % (
+            n_threads, throughput, throughput / base_throughput,
+            nb_mismatches))
+
+
+if __name__ == '__main__':
+    main_concurrent_parsing()
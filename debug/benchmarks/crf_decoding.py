@@ -0,0 +1,81 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+from builtins import range
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    generate_dataset, generate_vocabulary, get_dataset_queries, measure)
+from snips_nlu import load_resources
+from snips_nlu.dataset import validate_and_format_dataset
+from snips_nlu.pipeline.configs import CRFSlotFillerConfig
+from snips_nlu.preprocessing import tokenize
+from snips_nlu.slot_filler import CRFSlotFiller
+from snips_nlu.slot_filler.crf_decoder import CRFDecoder
+
+
+def main_crf_decoding():
+    parser = argparse.ArgumentParser(
+        description="Measure the decoding throughput of the crfsuite tagger, "
+                    "sentence by sentence, and of the numpy CRF decoder, by "
+                    "padded batches")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--nb-queries", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+",
+                        default=[1, 8, 32, 128])
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    vocabulary = generate_vocabulary(1000, random_state)
+    dataset = generate_dataset(args.language, vocabulary, random_state,
+                               nb_intents=1, nb_utterances=200)
+    dataset = validate_and_format_dataset(dataset)
+    intent = next(iter(dataset["intents"]))
+    queries = get_dataset_queries(dataset)
+    queries = [queries[i] for i in
+               random_state.randint(0, len(queries), args.nb_queries)]
+
+    config = CRFSlotFillerConfig(random_seed=42)
+    slot_filler = CRFSlotFiller(config).fit(dataset, intent)
+    sequences = [
+        slot_filler.compute_features(tokenize(query, args.language))
+        for query in queries]
+
+    tagger = slot_filler._get_tagger()  # pylint: disable=protected-access
+    expected_labels, tagging_time = measure(
+        lambda: [tagger.tag(sequence) for sequence in sequences])
+    print("crfsuite: %.0f sentences/s" % (len(sequences) / tagging_time))
+    _, full_tagging_time = measure(
+        lambda: [_tag_with_marginals(tagger, sequence)
+                 for sequence in sequences])
+    print("crfsuite with probabilities and marginals: %.0f sentences/s"
+          % (len(sequences) / full_tagging_time))
+
+    decoder, export_time = measure(CRFDecoder.from_model_file,
+                                   slot_filler.crf_model.modelfile.name)
+    print("weights export: %.3fs" % export_time)
+    for batch_size in args.batch_sizes:
+        batches = [sequences[i:i + batch_size]
+                   for i in range(0, len(sequences), batch_size)]
+        decoded_batches, decoding_time = measure(
+            lambda: [decoder.decode(batch) for batch in batches])
+        labels = [decoded.labels for batch in decoded_batches
+                  for decoded in batch]
+        print("numpy, batch_size=%s: %.0f sentences/s, same labels: %s"
+              % (batch_size, len(sequences) / decoding_time,
+                 labels == expected_labels))
+
+
+def _tag_with_marginals(tagger, sequence):
+    labels = tagger.tag(sequence)
+    probability = tagger.probability(labels)
+    marginals = [[tagger.marginal(label, t) for label in tagger.labels()]
+                 for t in range(len(sequence))]
+    return labels, probability, marginals
+
+
+if __name__ == '__main__':
+    main_crf_decoding()
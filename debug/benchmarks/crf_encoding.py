@@ -0,0 +1,65 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    generate_dataset, generate_vocabulary, get_dataset_queries,
+    latency_summary, measure_latencies)
+from snips_nlu import load_resources
+from snips_nlu.builtin_entities import get_builtin_entities
+from snips_nlu.constants import INTENTS, SNIPS_NUMBER
+from snips_nlu.dataset import validate_and_format_dataset
+from snips_nlu.pipeline.configs import CRFSlotFillerConfig
+from snips_nlu.slot_filler import CRFSlotFiller
+
+
+def main_crf_encoding():
+    parser = argparse.ArgumentParser(
+        description="Measure the slot filling latency of the CRF slot filler "
+                    "on queries whose builtin slots are rescored, the "
+                    "probability of each permutation of the builtin slots "
+                    "being computed on the same sentence")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--nb-builtin-slots", type=int, default=3)
+    parser.add_argument("--nb-numbers", type=int, nargs="+",
+                        default=[0, 1, 2, 3])
+    parser.add_argument("--nb-queries", type=int, default=500)
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    vocabulary = generate_vocabulary(1000, random_state)
+    builtin_entities = {SNIPS_NUMBER: ["3", "12", "100"]}
+    dataset = generate_dataset(args.language, vocabulary, random_state,
+                               nb_intents=1, nb_utterances=200,
+                               builtin_slot_ratio=0.5,
+                               builtin_entities=builtin_entities)
+    # Several slots of the same builtin entity multiply the permutations
+    for i, utterance in enumerate(dataset[INTENTS]["intent_0"]["utterances"]):
+        for chunk in utterance["data"]:
+            if chunk.get("entity") == SNIPS_NUMBER:
+                chunk["slot_name"] = "number_%s" % (i % args.nb_builtin_slots)
+    dataset = validate_and_format_dataset(dataset)
+    queries = get_dataset_queries(dataset)
+
+    config = CRFSlotFillerConfig(random_seed=42)
+    slot_filler = CRFSlotFiller(config).fit(dataset, "intent_0")
+    slot_filler.warmup()
+    for nb_numbers in args.nb_numbers:
+        stream = [
+            " ".join([queries[i]] + ["%s" % n for n in
+                                     random_state.randint(1, 100, nb_numbers)])
+            for i in random_state.randint(0, len(queries), args.nb_queries)]
+        # The builtin entities are parsed and cached beforehand
+        for query in stream:
+            get_builtin_entities(query, args.language, [SNIPS_NUMBER],
+                                 use_cache=True)
+        latencies = measure_latencies(slot_filler.get_slots, stream)
+        print("numbers=%s: %s" % (nb_numbers, latency_summary(latencies)))
+
+
+if __name__ == '__main__':
+    main_crf_encoding()
@@ -0,0 +1,62 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+from functools import partial
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    generate_dataset, generate_vocabulary, get_dataset_queries,
+    latency_summary, measure_latencies)
+from snips_nlu import SnipsNLUEngine, load_resources
+from snips_nlu.constants import RES_INTENT
+from snips_nlu.deadline import (
+    get_degradation_counts, reset_degradation_counts)
+
+
+def main_deadline():
+    parser = argparse.ArgumentParser(
+        description="Measure the latencies and the degradations of the "
+                    "parsing under several latency budgets")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--nb-queries", type=int, default=2000)
+    parser.add_argument("--deadlines-ms", type=float, nargs="+",
+                        default=[50, 5, 2, 1, 0])
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    vocabulary = generate_vocabulary(1000, random_state)
+    dataset = generate_dataset(args.language, vocabulary, random_state,
+                               builtin_slot_ratio=0.5)
+    queries = get_dataset_queries(dataset)
+    # Unseen queries go through the whole pipeline, the deterministic intent
+    # parser only parsing the training utterances
+    stream = ["%s %s" % (queries[i], vocabulary[j]) for i, j in zip(
+        random_state.randint(0, len(queries), args.nb_queries),
+        random_state.randint(0, len(vocabulary), args.nb_queries))]
+
+    engine = SnipsNLUEngine().fit(dataset)
+    reference_results = [engine.parse(q) for q in stream]
+    latencies = measure_latencies(engine.parse, stream)
+    print("no deadline: %s" % latency_summary(latencies))
+
+    for deadline_ms in args.deadlines_ms:
+        reset_degradation_counts()
+        parse = partial(engine.parse, deadline_ms=deadline_ms)
+        latencies = measure_latencies(parse, stream)
+        results = [parse(q) for q in stream]
+        nb_same_intents = sum(
+            res[RES_INTENT] == ref[RES_INTENT]
+            for res, ref in zip(results, reference_results))
+        nb_degraded = sum(1 for res in results if res["degradations"])
+        print("deadline=%sms: %s" % (deadline_ms, latency_summary(latencies)))
+        print("  degraded results: %.1f%%, same intent: %.1f%%"
+              % (100 * nb_degraded / len(stream),
+                 100 * nb_same_intents / len(stream)))
+        print("  degradations: %s" % get_degradation_counts())
+
+
+if __name__ == '__main__':
+    main_deadline()
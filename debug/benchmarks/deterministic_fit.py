@@ -0,0 +1,48 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    generate_dataset, generate_vocabulary, measure)
+from snips_nlu import load_resources
+from snips_nlu.constants import INTENTS, UTTERANCES
+from snips_nlu.dataset import validate_and_format_dataset
+from snips_nlu.intent_parser import DeterministicIntentParser
+
+
+def main_deterministic_fit():
+    parser = argparse.ArgumentParser(
+        description="Measure the training time of the deterministic intent "
+                    "parser on synthetic datasets of growing sizes, in which "
+                    "all the utterances have a slot")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--nb-intents", type=int, default=20)
+    parser.add_argument("--nb-utterances", type=int, nargs="+",
+                        default=[1000, 10000, 30000],
+                        help="Total numbers of utterances")
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    vocabulary = generate_vocabulary(5000, np.random.RandomState(42))
+    for nb_utterances in args.nb_utterances:
+        dataset = generate_dataset(
+            args.language, vocabulary, np.random.RandomState(42),
+            nb_intents=args.nb_intents,
+            nb_utterances=nb_utterances // args.nb_intents, slot_ratio=1.0)
+        dataset = validate_and_format_dataset(dataset)
+        intent_parser, fit_time = measure(
+            DeterministicIntentParser().fit, dataset)
+        nb_patterns = sum(len(patterns) for patterns in
+                          intent_parser.patterns.values())
+        nb_slots = sum(len(intent[UTTERANCES])
+                       for intent in dataset[INTENTS].values())
+        print("utterances=%s: fit in %.2fs, %s patterns, %s groups"
+              % (nb_slots, fit_time, nb_patterns,
+                 len(intent_parser.group_names_to_slot_names)))
+
+
+if __name__ == '__main__':
+    main_deterministic_fit()
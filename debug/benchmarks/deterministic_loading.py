@@ -0,0 +1,85 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+import shutil
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    generate_dataset, generate_vocabulary, get_dataset_queries, measure)
+from snips_nlu import load_resources
+from snips_nlu.constants import INTENTS
+from snips_nlu.dataset import validate_and_format_dataset
+from snips_nlu.intent_parser import DeterministicIntentParser
+from snips_nlu.pipeline.configs import DeterministicIntentParserConfig
+
+
+def main_deterministic_loading():
+    parser = argparse.ArgumentParser(
+        description="Measure the loading time and the memory of a persisted "
+                    "deterministic intent parser having large entities, "
+                    "before and after all its patterns are compiled")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--nb-intents", type=int, default=20)
+    parser.add_argument("--nb-utterances", type=int, default=50)
+    parser.add_argument("--nb-entity-values", type=int, default=200)
+    parser.add_argument("--max-pattern-length", type=int, default=10 ** 6)
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    vocabulary = generate_vocabulary(5000, random_state)
+    dataset = generate_dataset(args.language, vocabulary, random_state,
+                               nb_intents=args.nb_intents,
+                               nb_utterances=args.nb_utterances,
+                               nb_entity_values=args.nb_entity_values)
+    dataset = validate_and_format_dataset(dataset)
+    intent = "intent_0"
+    # Appending an unknown word bypasses the exact match index, so that the
+    # query is matched against the patterns of the intent
+    intent_queries = get_dataset_queries({INTENTS: {
+        intent: dataset[INTENTS][intent]}})
+    query = "%s %s" % (intent_queries[0], vocabulary[0])
+    config = DeterministicIntentParserConfig(
+        max_pattern_length=args.max_pattern_length)
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    try:
+        parser_path = tmp_dir / "parser"
+        DeterministicIntentParser(config).fit(dataset).persist(parser_path)
+
+        tracemalloc.start()
+        intent_parser, loading_time = measure(
+            DeterministicIntentParser.from_path, parser_path)
+        loading_memory, _ = tracemalloc.get_traced_memory()
+        print("loading: %.2fs, %.1fMB"
+              % (loading_time, loading_memory / 2 ** 20))
+
+        _, parsing_time = measure(
+            intent_parser.parse, query, intents=[intent])
+        parsing_memory, _ = tracemalloc.get_traced_memory()
+        print("first parsing restricted to one intent: %.2fs, %.1fMB"
+              % (parsing_time, parsing_memory / 2 ** 20))
+
+        _, compilation_time = measure(lambda: intent_parser.regexes_per_intent)
+        compiled_memory, _ = tracemalloc.get_traced_memory()
+        print("compilation of all the patterns: %.2fs, %.1fMB"
+              % (compilation_time, compiled_memory / 2 ** 20))
+        tracemalloc.stop()
+
+        warm_parser = DeterministicIntentParser.from_path(parser_path)
+        _, warmup_time = measure(warm_parser.warmup)
+        _, warm_parsing_time = measure(
+            warm_parser.parse, query, intents=[intent])
+        print("warmup: %.2fs, first parsing after warmup: %.4fs"
+              % (warmup_time, warm_parsing_time))
+    finally:
+        shutil.rmtree(str(tmp_dir))
+
+
+if __name__ == '__main__':
+    main_deterministic_loading()
@@ -0,0 +1,56 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    generate_dataset, generate_vocabulary, get_dataset_queries,
+    latency_summary, measure_latencies)
+from snips_nlu import load_resources
+from snips_nlu.dataset import validate_and_format_dataset
+from snips_nlu.intent_parser import DeterministicIntentParser
+
+
+def main_deterministic_prefilter():
+    parser = argparse.ArgumentParser(
+        description="Measure the parsing latency of the deterministic intent "
+                    "parser with and without the prefiltering of its "
+                    "patterns, on queries which do not match any pattern")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--nb-intents", type=int, default=50)
+    parser.add_argument("--nb-utterances", type=int, default=100)
+    parser.add_argument("--nb-queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    vocabulary = generate_vocabulary(5000, random_state)
+    dataset = generate_dataset(args.language, vocabulary, random_state,
+                               nb_intents=args.nb_intents,
+                               nb_utterances=args.nb_utterances)
+    dataset = validate_and_format_dataset(dataset)
+    queries = get_dataset_queries(dataset)
+    # Appending an unknown word makes all the patterns miss, so that the
+    # queries are matched against all the candidate patterns
+    stream = ["%s %s" % (queries[i], vocabulary[j]) for i, j in zip(
+        random_state.randint(0, len(queries), args.nb_queries),
+        random_state.randint(0, len(vocabulary), args.nb_queries))]
+
+    intent_parser = DeterministicIntentParser().fit(dataset)
+    anchors_per_intent = intent_parser.anchors_per_intent
+    nb_patterns = sum(len(patterns) for patterns in
+                      intent_parser.patterns.values())
+    print("patterns: %s" % nb_patterns)
+    for prefilter in (False, True):
+        intent_parser.anchors_per_intent = \
+            anchors_per_intent if prefilter else None
+        # Builds the prefilter
+        intent_parser.parse(stream[0])
+        latencies = measure_latencies(intent_parser.parse, stream)
+        print("prefilter=%s: %s" % (prefilter, latency_summary(latencies)))
+
+
+if __name__ == '__main__':
+    main_deterministic_prefilter()
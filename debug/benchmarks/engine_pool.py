@@ -0,0 +1,58 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    generate_dataset, generate_vocabulary, get_dataset_queries, measure)
+from snips_nlu import SnipsNLUEngine, load_resources
+from snips_nlu.nlu_engine import EnginePool
+
+
+def main_engine_pool():
+    parser = argparse.ArgumentParser(
+        description="Measure the parsing throughput of an EnginePool "
+                    "against its number of worker processes")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--nb-queries", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[1, 2, 4, 8])
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    vocabulary = generate_vocabulary(1000, random_state)
+    dataset = generate_dataset(args.language, vocabulary, random_state,
+                               builtin_slot_ratio=0.2)
+    queries = get_dataset_queries(dataset)
+    stream = [queries[i] for i in
+              random_state.randint(0, len(queries), args.nb_queries)]
+
+    engine = SnipsNLUEngine().fit(dataset)
+    _, elapsed_time = measure(lambda: [engine.parse(q) for q in stream])
+    print("single process: %.1f queries/s" % (len(stream) / elapsed_time))
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    try:
+        engine_path = tmp_dir / "engine"
+        engine.persist(engine_path)
+        for workers in args.workers:
+            with EnginePool(engine_path, workers=workers,
+                            chunk_size=args.chunk_size) as pool:
+                # Warms up the workers
+                pool.parse_many(queries[:workers])
+                _, elapsed_time = measure(pool.parse_many, stream)
+            print("%s worker(s): %.1f queries/s"
+                  % (workers, len(stream) / elapsed_time))
+    finally:
+        shutil.rmtree(str(tmp_dir))
+
+
+if __name__ == '__main__':
+    main_engine_pool()
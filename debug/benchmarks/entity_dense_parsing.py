@@ -0,0 +1,72 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+
+import numpy as np
+
+from debug.benchmarks.utils import latency_summary, measure_latencies
+from snips_nlu import load_resources
+from snips_nlu.builtin_entities import get_builtin_entities
+from snips_nlu.constants import (
+    DATA, ENTITIES, ENTITY, INTENTS, LANGUAGE, SLOT_NAME, SNIPS_NUMBER, TEXT,
+    UTTERANCES)
+from snips_nlu.dataset import validate_and_format_dataset
+from snips_nlu.intent_parser import DeterministicIntentParser
+from snips_nlu.pipeline.configs import DeterministicIntentParserConfig
+
+
+def main_entity_dense_parsing():
+    parser = argparse.ArgumentParser(
+        description="Measure the parsing latency of the deterministic intent "
+                    "parser on long inputs containing many builtin entities")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--nb-entities", type=int, nargs="+",
+                        default=[1, 10, 50, 100])
+    parser.add_argument("--nb-queries", type=int, default=200)
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    for nb_entities in args.nb_entities:
+        dataset = _get_entity_dense_dataset(args.language, nb_entities)
+        # The pattern of the entity dense utterance must not be discarded
+        config = DeterministicIntentParserConfig(max_pattern_length=10 ** 6)
+        intent_parser = DeterministicIntentParser(config).fit(dataset)
+        queries = [_get_entity_dense_query(nb_entities, random_state)
+                   for _ in range(args.nb_queries)]
+        # The builtin entities are parsed and cached beforehand, so that the
+        # latencies are those of the processing of the deterministic parser
+        for query in queries:
+            get_builtin_entities(query, args.language)
+        latencies = measure_latencies(intent_parser.parse, queries)
+        print("entities=%s, exact match index: %s"
+              % (nb_entities, latency_summary(latencies)))
+        intent_parser.exact_matches = None
+        latencies = measure_latencies(intent_parser.parse, queries)
+        print("entities=%s, patterns: %s"
+              % (nb_entities, latency_summary(latencies)))
+
+
+def _get_entity_dense_dataset(language, nb_entities):
+    chunks = [{TEXT: "add"}]
+    for i in range(nb_entities):
+        chunks.append({TEXT: " the " if i == 0 else " and "})
+        chunks.append({TEXT: "%s" % (i + 1), ENTITY: SNIPS_NUMBER,
+                       SLOT_NAME: "number_%s" % i})
+    chunks.append({TEXT: " together"})
+    dataset = {
+        INTENTS: {"add_numbers": {UTTERANCES: [{DATA: chunks}]}},
+        ENTITIES: {SNIPS_NUMBER: {}},
+        LANGUAGE: language
+    }
+    return validate_and_format_dataset(dataset)
+
+
+def _get_entity_dense_query(nb_entities, random_state):
+    numbers = random_state.randint(1, 1000, nb_entities)
+    return "add the %s together" % " and ".join("%s" % n for n in numbers)
+
+
+if __name__ == '__main__':
+    main_entity_dense_parsing()
@@ -0,0 +1,72 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+import json
+
+import numpy as np
+
+from debug.benchmarks.utils import generate_sentence, generate_vocabulary, \
+    measure
+from snips_nlu import load_resources
+from snips_nlu.dataset import validate_and_format_dataset
+from snips_nlu.intent_classifier.featurizer import Featurizer
+from snips_nlu.intent_classifier.log_reg_classifier_utils import \
+    text_to_utterance
+from snips_nlu.pipeline.configs import FeaturizerConfig
+from snips_nlu.utils import json_string
+
+
+def benchmark_featurizer(config, utterances, classes, dataset, language):
+    featurizer = Featurizer(language, None, config=config)
+    _, fit_time = measure(featurizer.fit, dataset, utterances, classes)
+    serialized, dump_time = measure(
+        lambda: json_string(featurizer.to_dict()))
+    _, load_time = measure(
+        lambda: Featurizer.from_dict(json.loads(serialized)))
+    return {
+        "fit_time": fit_time,
+        "dump_time": dump_time,
+        "load_time": load_time,
+        "model_size": len(serialized)
+    }
+
+
+def main_featurizer_hashing():
+    parser = argparse.ArgumentParser(
+        description="Compare the tf-idf featurizer with the hashing one on "
+                    "synthetic vocabularies of increasing size")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--vocabulary-sizes", type=int, nargs="+",
+                        default=[1000, 10000, 100000])
+    parser.add_argument("--nb-utterances", type=int, default=20000)
+    parser.add_argument("--nb-classes", type=int, default=10)
+    parser.add_argument("--hashing-size", type=int, default=2 ** 16)
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    dataset = validate_and_format_dataset(
+        {"intents": {}, "entities": {}, "language": args.language})
+    configs = [
+        ("vocabulary", FeaturizerConfig()),
+        ("hashing", FeaturizerConfig(feature_hashing_size=args.hashing_size))
+    ]
+
+    for vocabulary_size in args.vocabulary_sizes:
+        vocabulary = generate_vocabulary(vocabulary_size, random_state)
+        utterances = [
+            text_to_utterance(generate_sentence(vocabulary, random_state))
+            for _ in range(args.nb_utterances)]
+        classes = random_state.randint(0, args.nb_classes, len(utterances))
+        for name, config in configs:
+            res = benchmark_featurizer(config, utterances, classes, dataset,
+                                       args.language)
+            print("vocabulary_size=%s featurizer=%s fit=%.2fs dump=%.3fs "
+                  "load=%.3fs model_size=%.1fkB"
+                  % (vocabulary_size, name, res["fit_time"], res["dump_time"],
+                     res["load_time"], res["model_size"] / 1000.))
+
+
+if __name__ == '__main__':
+    main_featurizer_hashing()
@@ -0,0 +1,55 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+from builtins import range
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    generate_dataset, generate_sentence, generate_vocabulary,
+    latency_summary, measure_latencies)
+from snips_nlu import load_resources
+from snips_nlu.dataset import validate_and_format_dataset
+from snips_nlu.intent_classifier.featurizer import Featurizer
+from snips_nlu.intent_classifier.log_reg_classifier_utils import \
+    text_to_utterance
+from snips_nlu.pipeline.configs import FeaturizerConfig
+
+
+def main_featurizer_ngrams():
+    parser = argparse.ArgumentParser(
+        description="Measure the latency of the featurizer preprocessing, "
+                    "which looks up entity values and word clusters, on "
+                    "queries of increasing length")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--word-clusters-name", default="brown_clusters")
+    parser.add_argument("--query-lengths", type=int, nargs="+",
+                        default=[5, 20, 50, 100])
+    parser.add_argument("--nb-queries", type=int, default=200)
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    vocabulary = generate_vocabulary(2000, random_state)
+    dataset = validate_and_format_dataset(generate_dataset(
+        args.language, vocabulary, random_state, nb_entity_values=200))
+    featurizer = Featurizer(
+        args.language, None,
+        FeaturizerConfig(word_clusters_name=args.word_clusters_name))
+    featurizer.entity_utterances_to_feature_names = \
+        featurizer._get_normalized_utterances_to_features_names(  # pylint: disable=W0212
+            dataset)
+
+    for length in args.query_lengths:
+        utterances = [
+            text_to_utterance(generate_sentence(
+                vocabulary, random_state, length, length))
+            for _ in range(args.nb_queries)]
+        latencies = measure_latencies(
+            lambda u: featurizer.preprocess_utterances([u]), utterances)
+        print("query_length=%s %s" % (length, latency_summary(latencies)))
+
+
+if __name__ == '__main__':
+    main_featurizer_ngrams()
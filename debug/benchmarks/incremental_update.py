@@ -0,0 +1,52 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+from copy import deepcopy
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    generate_dataset, generate_sentence, generate_vocabulary, measure)
+from snips_nlu import load_resources
+from snips_nlu.constants import DATA, INTENTS, TEXT, UTTERANCES
+from snips_nlu.intent_classifier import LogRegIntentClassifier
+
+
+def main_incremental_update():
+    parser = argparse.ArgumentParser(
+        description="Compare the time needed to add a few utterances to an "
+                    "intent with a full retraining and with an incremental "
+                    "update of the intent classifier")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--vocabulary-size", type=int, default=5000)
+    parser.add_argument("--nb-intents", type=int, default=10)
+    parser.add_argument("--nb-utterances", type=int, default=200)
+    parser.add_argument("--nb-new-utterances", type=int, default=10)
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    vocabulary = generate_vocabulary(args.vocabulary_size, random_state)
+    dataset = generate_dataset(
+        args.language, vocabulary, random_state, nb_intents=args.nb_intents,
+        nb_utterances=args.nb_utterances)
+    intent = sorted(dataset[INTENTS])[0]
+    new_utterances = [
+        {DATA: [{TEXT: generate_sentence(vocabulary, random_state)}]}
+        for _ in range(args.nb_new_utterances)]
+    dataset_delta = deepcopy(dataset)
+    dataset_delta[INTENTS] = {intent: {UTTERANCES: new_utterances}}
+    updated_dataset = deepcopy(dataset)
+    updated_dataset[INTENTS][intent][UTTERANCES] += new_utterances
+
+    classifier, fit_time = measure(LogRegIntentClassifier().fit, dataset)
+    _, refit_time = measure(LogRegIntentClassifier().fit, updated_dataset)
+    _, update_time = measure(classifier.update, dataset_delta)
+    print("fit=%.2fs refit=%.2fs update=%.3fs needs_retrain=%s"
+          % (fit_time, refit_time, update_time, classifier.needs_retrain))
+    print("drift_stats=%s" % classifier.drift_stats)
+
+
+if __name__ == '__main__':
+    main_incremental_update()
@@ -0,0 +1,45 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    generate_dataset, generate_vocabulary, get_dataset_queries,
+    latency_summary, measure_latencies)
+from snips_nlu import SnipsNLUEngine, load_resources
+from snips_nlu.utils import LRUCache
+
+
+def main_parse_cache():
+    parser = argparse.ArgumentParser(
+        description="Measure the effect of the parsing results cache of the "
+                    "NLU engine on a Zipf-distributed stream of queries")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--nb-queries", type=int, default=5000)
+    parser.add_argument("--zipf-exponent", type=float, default=1.2)
+    parser.add_argument("--cache-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    vocabulary = generate_vocabulary(1000, random_state)
+    dataset = generate_dataset(args.language, vocabulary, random_state)
+    queries = get_dataset_queries(dataset)
+    random_state.shuffle(queries)
+    ranks = random_state.zipf(args.zipf_exponent, args.nb_queries)
+    stream = [queries[(r - 1) % len(queries)] for r in ranks]
+
+    engine = SnipsNLUEngine().fit(dataset)
+    latencies = measure_latencies(engine.parse, stream)
+    print("no cache: %s" % latency_summary(latencies))
+
+    engine.parse_cache = LRUCache(size_limit=args.cache_size)
+    latencies = measure_latencies(engine.parse, stream)
+    print("cache:    %s" % latency_summary(latencies))
+    print("cache stats: %s" % engine.parse_cache.stats)
+
+
+if __name__ == '__main__':
+    main_parse_cache()
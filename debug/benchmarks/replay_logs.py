@@ -0,0 +1,65 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    generate_dataset, generate_vocabulary, get_dataset_queries,
+    latency_summary, measure, measure_latencies)
+from snips_nlu import SnipsNLUEngine, load_resources
+from snips_nlu.builtin_entities import get_builtin_entity_parser
+from snips_nlu.intent_parser import DeterministicIntentParser
+
+
+class _CountingParser(object):
+    def __init__(self, parser):
+        self.parser = parser
+        self.count = 0
+
+    def parse(self, text, scope=None):
+        self.count += 1
+        return self.parser.parse(text, scope)
+
+
+def main_replay_logs():
+    parser = argparse.ArgumentParser(
+        description="Measure the throughput of the NLU engine on a replayed "
+                    "log of queries containing builtin slots")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--nb-queries", type=int, default=2000)
+    parser.add_argument("--builtin-slot-ratio", type=float, default=0.5)
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    vocabulary = generate_vocabulary(1000, random_state)
+    dataset = generate_dataset(args.language, vocabulary, random_state,
+                               builtin_slot_ratio=args.builtin_slot_ratio)
+    queries = get_dataset_queries(dataset)
+    log = [queries[i] for i in
+           random_state.randint(0, len(queries), args.nb_queries)]
+
+    engine = SnipsNLUEngine().fit(dataset)
+    builtin_parser = get_builtin_entity_parser(args.language)
+    counting_parser = _CountingParser(builtin_parser.parser)
+    builtin_parser.parser = counting_parser
+    builtin_parser.clear_cache()
+
+    # The logged queries are replayed as if they were received now, since
+    # builtin entities can only be resolved against the current time
+    latencies, elapsed_time = measure(measure_latencies, engine.parse, log)
+    print("latencies: %s" % latency_summary(latencies))
+    print("throughput: %.1f queries/s" % (len(log) / elapsed_time))
+    print("builtin entity parser calls per query: %.2f"
+          % (counting_parser.count / len(log)))
+    print("builtin entities cache stats: %s" % builtin_parser.cache_stats)
+    for intent_parser in engine.intent_parsers:
+        if isinstance(intent_parser, DeterministicIntentParser):
+            print("exact match index stats: %s"
+                  % intent_parser.exact_match_stats)
+
+
+if __name__ == '__main__':
+    main_replay_logs()
@@ -0,0 +1,49 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    generate_dataset, generate_vocabulary, get_dataset_queries,
+    latency_summary, measure_latencies)
+from snips_nlu import SnipsNLUEngine, load_resources
+
+
+def main_speculative_parsing():
+    parser = argparse.ArgumentParser(
+        description="Measure the parsing latencies with and without "
+                    "speculative parsing, on queries matched by the "
+                    "deterministic intent parser (hits) and on the other "
+                    "ones (misses)")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--nb-queries", type=int, default=2000)
+    parser.add_argument("--speculative-workers", type=int, default=1)
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    vocabulary = generate_vocabulary(1000, random_state)
+    dataset = generate_dataset(args.language, vocabulary, random_state,
+                               builtin_slot_ratio=0.2)
+    queries = get_dataset_queries(dataset)
+    hits = [queries[i] for i in
+            random_state.randint(0, len(queries), args.nb_queries)]
+    # Appending an unknown word makes the deterministic parser miss
+    misses = ["%s %s" % (query, vocabulary[i]) for query, i in zip(
+        hits, random_state.randint(0, len(vocabulary), args.nb_queries))]
+
+    with SnipsNLUEngine().fit(dataset) as engine:
+        for speculative_workers in (0, args.speculative_workers):
+            engine.speculative_workers = speculative_workers
+            # Warms up the worker threads
+            engine.parse(misses[0])
+            print("speculative_workers=%s" % speculative_workers)
+            for name, stream in (("hits", hits), ("misses", misses)):
+                latencies = measure_latencies(engine.parse, stream)
+                print("  %s: %s" % (name, latency_summary(latencies)))
+
+
+if __name__ == '__main__':
+    main_speculative_parsing()
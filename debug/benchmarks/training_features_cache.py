@@ -0,0 +1,56 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    generate_dataset, generate_vocabulary, measure)
+from snips_nlu import load_resources
+from snips_nlu.constants import INTENTS
+from snips_nlu.dataset import validate_and_format_dataset
+from snips_nlu.pipeline.configs import CRFSlotFillerConfig
+from snips_nlu.slot_filler import CRFSlotFiller
+from snips_nlu.slot_filler.crf_slot_filler import TrainingFeaturesCache
+
+
+def main_training_features_cache():
+    parser = argparse.ArgumentParser(
+        description="Measure the training time of the slot fillers of all "
+                    "the intents of a synthetic dataset, when each slot "
+                    "filler computes its own training features and when the "
+                    "features which do not depend on the intent are shared")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--nb-intents", type=int, default=10)
+    parser.add_argument("--nb-utterances", type=int, default=50)
+    args = parser.parse_args()
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    vocabulary = generate_vocabulary(1000, random_state)
+    dataset = generate_dataset(args.language, vocabulary, random_state,
+                               nb_intents=args.nb_intents,
+                               nb_utterances=args.nb_utterances,
+                               builtin_slot_ratio=0.2)
+    dataset = validate_and_format_dataset(dataset)
+    config = CRFSlotFillerConfig(random_seed=42)
+
+    def fit_slot_fillers(shared):
+        training_features_cache = TrainingFeaturesCache()
+        for intent in dataset[INTENTS]:
+            if not shared:
+                training_features_cache = TrainingFeaturesCache()
+            CRFSlotFiller(config).fit(
+                dataset, intent,
+                training_features_cache=training_features_cache)
+
+    # Warms up the resources and the builtin entities cache
+    fit_slot_fillers(shared=False)
+    for shared in (False, True):
+        _, fit_time = measure(fit_slot_fillers, shared)
+        print("shared training features cache=%s: %.2fs" % (shared, fit_time))
+
+
+if __name__ == '__main__':
+    main_training_features_cache()
@@ -0,0 +1,129 @@
+# coding=utf-8
+from __future__ import division, unicode_literals
+
+import string
+from builtins import range
+from timeit import default_timer
+
+import numpy as np
+
+from snips_nlu.constants import (
+    AUTOMATICALLY_EXTENSIBLE, DATA, ENTITIES, ENTITY, INTENTS, LANGUAGE,
+    SLOT_NAME, SYNONYMS, TEXT, USE_SYNONYMS, UTTERANCES, VALUE)
+
+BUILTIN_ENTITIES_VALUES = {
+    "snips/number": ["two", "3", "twelve", "forty five", "100"],
+    "snips/datetime": ["tomorrow", "at 9pm", "next monday", "in two hours",
+                       "on march 3rd at noon"]
+}
+
+
+def generate_vocabulary(size, random_state, min_length=3, max_length=10):
+    """Generates *size* distinct random lowercase words"""
+    letters = list(string.ascii_lowercase)
+    vocabulary = set()
+    while len(vocabulary) < size:
+        length = random_state.randint(min_length, max_length + 1)
+        vocabulary.add("".join(random_state.choice(letters, length)))
+    return sorted(vocabulary)
+
+
+def generate_sentence(vocabulary, random_state, min_length=3, max_length=8):
+    length = random_state.randint(min_length, max_length + 1)
+    return " ".join(random_state.choice(vocabulary, length))
+
+
+def generate_dataset(language, vocabulary, random_state, nb_intents=10,
+                     nb_utterances=50, nb_entities=5, nb_entity_values=20,
+                     slot_ratio=0.5, builtin_slot_ratio=0.,
+                     builtin_entities=None):
+    """Generates a synthetic Snips dataset whose utterances are made of
+    random words drawn from *vocabulary*
+
+    A fraction *slot_ratio* of the utterances contains a slot referring to a
+    custom entity, and a fraction *builtin_slot_ratio* a slot referring to
+    one of the *builtin_entities*, which default to all the builtin entities
+    of :data:`BUILTIN_ENTITIES_VALUES`
+    """
+    entities = dict()
+    for i in range(nb_entities):
+        values = set(generate_sentence(vocabulary, random_state, 1, 3)
+                     for _ in range(nb_entity_values))
+        entities["entity_%s" % i] = {
+            DATA: [{VALUE: v, SYNONYMS: []} for v in sorted(values)],
+            USE_SYNONYMS: False,
+            AUTOMATICALLY_EXTENSIBLE: True
+        }
+    entity_names = sorted(entities)
+    if builtin_entities is None:
+        builtin_entities = BUILTIN_ENTITIES_VALUES
+    builtin_entity_names = sorted(builtin_entities)
+    if builtin_slot_ratio > 0:
+        for entity_name in builtin_entity_names:
+            entities[entity_name] = dict()
+
+    intents = dict()
+    for i in range(nb_intents):
+        utterances = []
+        for _ in range(nb_utterances):
+            chunks = [{TEXT: generate_sentence(vocabulary, random_state)}]
+            if random_state.rand() < slot_ratio:
+                entity_name = random_state.choice(entity_names)
+                entity_value = random_state.choice(
+                    entities[entity_name][DATA])[VALUE]
+                chunks.append({TEXT: " "})
+                chunks.append({
+                    TEXT: entity_value,
+                    ENTITY: entity_name,
+                    SLOT_NAME: "slot_%s" % entity_name
+                })
+            if random_state.rand() < builtin_slot_ratio:
+                entity_name = random_state.choice(builtin_entity_names)
+                entity_value = random_state.choice(
+                    BUILTIN_ENTITIES_VALUES[entity_name])
+                chunks.append({TEXT: " "})
+                chunks.append({
+                    TEXT: entity_value,
+                    ENTITY: entity_name,
+                    SLOT_NAME: "slot_%s" % entity_name.replace("/", "_")
+                })
+            utterances.append({DATA: chunks})
+        intents["intent_%s" % i] = {UTTERANCES: utterances}
+
+    return {
+        INTENTS: intents,
+        ENTITIES: entities,
+        LANGUAGE: language
+    }
+
+
+def get_dataset_queries(dataset):
+    """Returns the raw texts of all the utterances of a dataset"""
+    return ["".join(chunk[TEXT] for chunk in utterance[DATA])
+            for intent in dataset[INTENTS].values()
+            for utterance in intent[UTTERANCES]]
+
+
+def measure(fn, *args, **kwargs):
+    """Returns the output of *fn* along with the elapsed time in seconds"""
+    start = default_timer()
+    res = fn(*args, **kwargs)
+    return res, default_timer() - start
+
+
+def measure_latencies(fn, inputs):
+    """Returns the list of latencies, in milliseconds, of *fn* called on each
+    input"""
+    latencies = []
+    for x in inputs:
+        start = default_timer()
+        fn(x)
+        latencies.append((default_timer() - start) * 1000)
+    return latencies
+
+
+def latency_summary(latencies):
+    return "mean=%.3fms p50=%.3fms p95=%.3fms p99=%.3fms max=%.3fms" % (
+        np.mean(latencies), np.percentile(latencies, 50),
+        np.percentile(latencies, 95), np.percentile(latencies, 99),
+        np.max(latencies))
@@ -0,0 +1,95 @@
+# coding=utf-8
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from debug.benchmarks.utils import (
+    generate_dataset, generate_vocabulary, get_dataset_queries,
+    latency_summary, measure, measure_latencies)
+
+
+def main_warmup():
+    parser = argparse.ArgumentParser(
+        description="Measure the latency of the first queries parsed by a "
+                    "freshly loaded engine, with and without warmup")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--nb-queries", type=int, default=20)
+    parser.add_argument("--nb-runs", type=int, default=5)
+    # Internal arguments, used to measure a cold engine in a new process
+    parser.add_argument("--engine-path", help=argparse.SUPPRESS)
+    parser.add_argument("--queries-path", help=argparse.SUPPRESS)
+    parser.add_argument("--warmup", action="store_true",
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.engine_path is not None:
+        _measure_cold_engine(args.engine_path, args.queries_path,
+                             args.warmup)
+        return
+
+    from snips_nlu import SnipsNLUEngine, load_resources
+
+    load_resources(args.language)
+    random_state = np.random.RandomState(42)
+    vocabulary = generate_vocabulary(1000, random_state)
+    dataset = generate_dataset(args.language, vocabulary, random_state,
+                               builtin_slot_ratio=0.2)
+    queries = get_dataset_queries(dataset)
+    queries = [queries[i] for i in
+               random_state.randint(0, len(queries), args.nb_queries)]
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    try:
+        engine_path = tmp_dir / "engine"
+        SnipsNLUEngine().fit(dataset).persist(engine_path)
+        queries_path = tmp_dir / "queries.json"
+        with queries_path.open("w", encoding="utf8") as f:
+            f.write(json.dumps(queries, ensure_ascii=False))
+        for warmup in (False, True):
+            runs = [_run_cold_engine(engine_path, queries_path, warmup)
+                    for _ in range(args.nb_runs)]
+            first_latencies = [run["latencies"][0] for run in runs]
+            next_latencies = [l for run in runs for l in run["latencies"][1:]]
+            print("warmup=%s" % warmup)
+            if warmup:
+                print("  warmup time: %.1fms" % np.mean(
+                    [run["warmup_time"] * 1000 for run in runs]))
+            print("  first query: %s" % latency_summary(first_latencies))
+            print("  next queries: %s" % latency_summary(next_latencies))
+    finally:
+        shutil.rmtree(str(tmp_dir))
+
+
+def _run_cold_engine(engine_path, queries_path, warmup):
+    command = [sys.executable, "-m", "debug.benchmarks.warmup",
+               "--engine-path", str(engine_path),
+               "--queries-path", str(queries_path)]
+    if warmup:
+        command.append("--warmup")
+    output = subprocess.check_output(command)
+    return json.loads(output.decode("utf8").strip().splitlines()[-1])
+
+
+def _measure_cold_engine(engine_path, queries_path, warmup):
+    from snips_nlu import SnipsNLUEngine
+
+    with Path(queries_path).open(encoding="utf8") as f:
+        queries = json.load(f)
+    engine = SnipsNLUEngine.from_path(engine_path)
+    warmup_time = None
+    if warmup:
+        warmup_time, _ = measure(engine.warmup)
+    latencies = measure_latencies(engine.parse, queries)
+    print(json.dumps({"warmup_time": warmup_time, "latencies": latencies}))
+
+
+if __name__ == '__main__':
+    main_warmup()
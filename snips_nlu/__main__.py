@@ -7,7 +7,8 @@ import plac
 from snips_nlu.cli import (
     cross_val_metrics, download, download_all_languages, generate_dataset,
     link, train_test_metrics)
-from snips_nlu.cli.inference import parse
+from snips_nlu.cli.inference import parse, parse_file
+from snips_nlu.cli.serve import load_test, serve
 from snips_nlu.cli.training import train
 from snips_nlu.cli.utils import PrettyPrintLevel, pretty_print
 
@@ -16,6 +17,9 @@ def main():
     commands = {
         "train": train,
         "parse": parse,
+        "parse-file": parse_file,
+        "serve": serve,
+        "load-test": load_test,
         "download": download,
         "download-all-languages": download_all_languages,
         "link": link,
@@ -1,43 +1,242 @@
-from __future__ import unicode_literals
+from __future__ import division, unicode_literals
 
-from builtins import object, str
+import time
+from builtins import object
+from contextlib import contextmanager
+from threading import Lock, local
 
+from future.utils import iteritems
 from snips_nlu_ontology import (
     BuiltinEntityParser as _BuiltinEntityParser, get_all_builtin_entities,
     get_supported_entities)
 
-from snips_nlu.utils import LimitedSizeDict
+from snips_nlu.constants import ENTITY_KIND
+from snips_nlu.utils import LRUCache
+
+# Size, in seconds, of the reference time buckets used in the cache keys:
+# builtin entities parsed against reference times falling in the same bucket
+# are considered identical
+REFERENCE_TIME_BUCKET_SIZE = 1
+
+# Builtin entities whose resolved values depend on the reference time
+TIME_DEPENDENT_ENTITIES = {"snips/datetime"}
+
+_PARSING_CONTEXT = local()
+
+
+@contextmanager
+def builtin_entities_context(scope=None):
+    """Context in which all the builtin entities share the same reference
+    time, in the current thread
+
+    The reference time is pinned to the current time when the outermost
+    context is entered, and inherited by the nested ones. Builtin entities
+    parsed within the context share the cache entries computed for this
+    reference time, so that an input which is parsed several times along the
+    pipeline is only parsed once. Cached results which do not contain any of
+    the :data:`TIME_DEPENDENT_ENTITIES` are shared across all reference
+    times.
+
+    Note:
+        The underlying parser always resolves builtin entities against the
+        current time of the machine, in its local timezone, hence the
+        reference time cannot be chosen.
+
+    Args:
+        scope (list of str, optional): Builtin entities to parse when no
+            explicit scope is passed to :func:`get_builtin_entities`.
+            Defaults to the scope of the enclosing context, if any, and to
+            all the supported builtin entities otherwise.
+    """
+    previous_reference_time = getattr(_PARSING_CONTEXT, "reference_time",
+                                      None)
+    previous_scope = getattr(_PARSING_CONTEXT, "scope", None)
+    reference_time = previous_reference_time
+    if reference_time is None:
+        reference_time = time.time()
+    if scope is None:
+        scope = previous_scope
+    _PARSING_CONTEXT.reference_time = reference_time
+    _PARSING_CONTEXT.scope = scope
+    try:
+        yield reference_time
+    finally:
+        _PARSING_CONTEXT.reference_time = previous_reference_time
+        _PARSING_CONTEXT.scope = previous_scope
+
+
+def get_reference_time():
+    """Returns the reference time, as a POSIX timestamp, for which builtin
+    entities parsing results are currently cached in this thread"""
+    reference_time = getattr(_PARSING_CONTEXT, "reference_time", None)
+    if reference_time is None:
+        return time.time()
+    return reference_time
+
+
+def get_builtin_entities_scope():
+    """Returns the builtin entities which are parsed by default in this
+    thread, or *None* when all the supported builtin entities are"""
+    return getattr(_PARSING_CONTEXT, "scope", None)
+
+
+def _get_reference_time_bucket(reference_time):
+    return int(reference_time // REFERENCE_TIME_BUCKET_SIZE)
+
+
+# Default maximum number of texts whose builtin entities are cached by each
+# BuiltinEntityParser
+BUILTIN_ENTITIES_CACHE_SIZE = 1000
 
 
 class BuiltinEntityParser(object):
-    def __init__(self, language):
+    """Wrapper around the builtin entity parser of *snips_nlu_ontology*
+    which caches its results
+
+    For each text, the results are cached per scope, and a request with a
+    given scope is also served by a result cached with a wider scope when
+    all the entities of this result belong to the requested scope: parsing
+    with the requested scope would then give the same result. The cache is
+    thread-safe, has a Least Recently Used eviction policy and keeps track
+    of its hits, misses and evictions, see :attr:`cache_stats`.
+
+    Args:
+        language (str): Language of the parser
+        cache_size (int, optional): Maximum number of texts whose results are
+            cached. Defaults to :data:`BUILTIN_ENTITIES_CACHE_SIZE`.
+    """
+
+    def __init__(self, language, cache_size=None):
         self.language = language
         self.parser = _BuiltinEntityParser(language)
         self.supported_entities = get_supported_entities(language)
-        self._cache = LimitedSizeDict(size_limit=1000)
+        self._lock = Lock()
+        self._cache = None
+        self._hits = 0
+        self._misses = 0
+        self.resize_cache(cache_size)
 
     def parse(self, text, scope=None, use_cache=True):
         text = text.lower()  # Rustling only works with lowercase
+        if scope is None:
+            scope = get_builtin_entities_scope()
+        if scope is not None and not scope:
+            return []
         if not use_cache:
             return self.parser.parse(text, scope)
-        cache_key = (text, str(scope))
-        if cache_key not in self._cache:
-            parser_result = self.parser.parse(text, scope)
-            self._cache[cache_key] = parser_result
-        return self._cache[cache_key]
+        scope_key = None if scope is None else frozenset(scope)
+        reference_time_bucket = _get_reference_time_bucket(
+            get_reference_time())
+        with self._lock:
+            parser_result = self._get_cached_result(text, scope_key,
+                                                    reference_time_bucket)
+            if parser_result is not None:
+                self._hits += 1
+                return parser_result
+            self._misses += 1
+
+        # The parsing itself is done outside of the lock, at the risk of
+        # parsing the same text concurrently
+        parser_result = self.parser.parse(text, scope)
+        # Results which do not contain any time dependent entity are valid
+        # whatever the reference time, hence they are cached without any
+        # reference time bucket
+        bucket = None
+        if any(ent[ENTITY_KIND] in TIME_DEPENDENT_ENTITIES
+               for ent in parser_result):
+            bucket = reference_time_bucket
+        with self._lock:
+            cached_results = self._cache.get(text)
+            if cached_results is None:
+                cached_results = dict()
+                self._cache.put(text, cached_results)
+            cached_results[scope_key] = (bucket, parser_result)
+        return parser_result
+
+    def _get_cached_result(self, text, scope_key, reference_time_bucket):
+        cached_results = self._cache.get(text)
+        if cached_results is None:
+            return None
+        for cached_scope_key, (bucket, parser_result) in \
+                iteritems(cached_results):
+            if bucket is not None and bucket != reference_time_bucket:
+                continue
+            if cached_scope_key == scope_key:
+                return parser_result
+            if scope_key is None:
+                continue
+            if cached_scope_key is not None \
+                    and not scope_key.issubset(cached_scope_key):
+                continue
+            if all(ent[ENTITY_KIND] in scope_key for ent in parser_result):
+                return parser_result
+        return None
+
+    def resize_cache(self, cache_size=None):
+        """Replaces the cache with an empty one of size *cache_size*, which
+        defaults to :data:`BUILTIN_ENTITIES_CACHE_SIZE`"""
+        if cache_size is None:
+            cache_size = BUILTIN_ENTITIES_CACHE_SIZE
+        with self._lock:
+            self._cache = LRUCache(size_limit=cache_size)
+
+    def clear_cache(self):
+        """Empties the cache and resets its statistics"""
+        with self._lock:
+            self._cache.clear()
+            self._cache.reset_stats()
+            self._hits = 0
+            self._misses = 0
+
+    @property
+    def cache_stats(self):
+        """dict: Number of hits, misses and evictions of the cache, along with
+        its hit rate and the number of texts it currently holds"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._cache.evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "size": len(self._cache)
+            }
 
     def supports_entity(self, entity):
         return entity in self.supported_entities
 
 
 _RUSTLING_PARSERS = dict()
+_RUSTLING_PARSERS_LOCK = Lock()
 
 
 def get_builtin_entity_parser(language):
     global _RUSTLING_PARSERS
-    if language not in _RUSTLING_PARSERS:
-        _RUSTLING_PARSERS[language] = BuiltinEntityParser(language)
-    return _RUSTLING_PARSERS[language]
+    parser = _RUSTLING_PARSERS.get(language)
+    if parser is None:
+        with _RUSTLING_PARSERS_LOCK:
+            if language not in _RUSTLING_PARSERS:
+                _RUSTLING_PARSERS[language] = BuiltinEntityParser(language)
+            parser = _RUSTLING_PARSERS[language]
+    return parser
+
+
+def set_builtin_entities_cache_size(cache_size):
+    """Sets the size of the builtin entities cache of all the languages
+
+    The caches which have already been created are emptied.
+    """
+    global BUILTIN_ENTITIES_CACHE_SIZE
+    BUILTIN_ENTITIES_CACHE_SIZE = cache_size
+    for parser in _RUSTLING_PARSERS.values():
+        parser.resize_cache(cache_size)
+
+
+def get_builtin_entities_cache_stats():
+    """Returns the :attr:`BuiltinEntityParser.cache_stats` of the parsers
+    which have been loaded so far, by language"""
+    return {language: parser.cache_stats
+            for language, parser in list(_RUSTLING_PARSERS.items())}
 
 
 def get_builtin_entities(text, language, scope=None, use_cache=True):
@@ -45,5 +244,13 @@ def get_builtin_entities(text, language, scope=None, use_cache=True):
     return parser.parse(text, scope=scope, use_cache=use_cache)
 
 
+def merge_required_builtin_entities(lhs, rhs):
+    """Merges the builtin entities required by two components, *None*
+    standing for all the supported builtin entities"""
+    if lhs is None or rhs is None:
+        return None
+    return set(lhs).union(rhs)
+
+
 def is_builtin_entity(entity_label):
     return entity_label in get_all_builtin_entities()
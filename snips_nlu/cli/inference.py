@@ -1,11 +1,19 @@
-from __future__ import unicode_literals, print_function
+from __future__ import division, print_function, unicode_literals
 
+import io
 import json
-from builtins import input
+import sys
+from builtins import input, str
+from itertools import islice
+from timeit import default_timer
 
 import plac
 
 from snips_nlu import SnipsNLUEngine
+from snips_nlu.nlu_engine.engine_pool import EnginePool
+from snips_nlu.utils import json_string
+
+STDIO_PATH = "-"
 
 
 @plac.annotations(
@@ -32,3 +40,99 @@ def print_parsing_result(engine, query):
         query = query.decode("utf8")
     json_dump = json.dumps(engine.parse(query), sort_keys=True, indent=2)
     print(json_dump)
+
+
+@plac.annotations(
+    training_path=("Path to a trained engine", "positional", None, str),
+    input_path=("Path of the queries to parse, either a text file with one "
+                "query per line or a JSONL file whose objects have a 'text' "
+                "key, '-' meaning stdin", "positional", None, str),
+    output_path=("Path of the JSONL file where parsing results are written "
+                 "in the order of the queries, '-' meaning stdout",
+                 "positional", None, str),
+    input_format=("Format of the input, inferred from its extension by "
+                  "default", "option", "f", str, ["text", "jsonl"]),
+    workers=("Number of worker processes, defaults to the number of CPUs",
+             "option", "w", int),
+    chunk_size=("Number of queries sent at once to a worker", "option", "c",
+                int),
+    progress_interval=("Number of queries between two progress reports, 0 "
+                       "disabling them", "option", "p", int))
+def parse_file(training_path, input_path, output_path, input_format=None,
+               workers=None, chunk_size=100, progress_interval=10000):
+    """Parse the queries of a file with a trained NLU engine, and write the
+    results to a JSONL file"""
+    if input_format is None:
+        input_format = "jsonl" if input_path.endswith(".jsonl") else "text"
+    start = default_timer()
+    nb_parsed = 0
+    with _open_stream(input_path, "r") as input_file, \
+            _open_stream(output_path, "w") as output_file:
+        texts = _read_queries(input_file, input_format)
+        for result in parse_stream(training_path, texts, workers, chunk_size):
+            output_file.write(json_string(result, indent=None,
+                                          sort_keys=False))
+            output_file.write("\n")
+            nb_parsed += 1
+            if progress_interval and nb_parsed % progress_interval == 0:
+                _report_progress(nb_parsed, default_timer() - start)
+    if not progress_interval or nb_parsed % progress_interval:
+        _report_progress(nb_parsed, default_timer() - start)
+
+
+def parse_stream(training_path, texts, workers=None, chunk_size=100):
+    """Lazily parses the *texts* iterable with the engine persisted at
+    *training_path*, and yields the results in order
+
+    When a single worker is requested, the texts are parsed by chunks in the
+    current process with :func:`.SnipsNLUEngine.parse_batch`, otherwise they
+    are dispatched to an :class:`.EnginePool`.
+    """
+    if workers == 1:
+        engine = SnipsNLUEngine.from_path(training_path)
+        texts = iter(texts)
+        while True:
+            chunk = list(islice(texts, chunk_size))
+            if not chunk:
+                return
+            for result in engine.parse_batch(chunk):
+                yield result
+    else:
+        with EnginePool(training_path, workers=workers,
+                        chunk_size=chunk_size) as pool:
+            for result in pool.imap(texts):
+                yield result
+
+
+def _open_stream(path, mode):
+    if path == STDIO_PATH:
+        stream = sys.stdin if mode == "r" else sys.stdout
+        return io.open(stream.fileno(), mode, encoding="utf8", closefd=False)
+    return io.open(path, mode, encoding="utf8")
+
+
+def _read_queries(input_file, input_format):
+    # A query is yielded for every line, so that the results stay aligned
+    # with the lines of the input. Blank and invalid lines are replaced by
+    # empty queries, whose parsing results are empty.
+    for line_number, line in enumerate(input_file, 1):
+        line = line.strip()
+        if not line or input_format != "jsonl":
+            yield line
+            continue
+        try:
+            text = json.loads(line)["text"]
+        except (KeyError, TypeError, ValueError):
+            text = None
+        if not isinstance(text, str):
+            print("Invalid query at line %d, expected a JSON object with a "
+                  "'text' string" % line_number, file=sys.stderr)
+            text = ""
+        yield text
+
+
+def _report_progress(nb_parsed, duration):
+    # Progress is reported on stderr as results may be written to stdout
+    print("Parsed %d queries in %.1fs (%.1f queries/s)"
+          % (nb_parsed, duration, nb_parsed / duration if duration else 0.0),
+          file=sys.stderr)
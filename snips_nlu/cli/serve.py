@@ -0,0 +1,399 @@
+from __future__ import division, print_function, unicode_literals
+
+import json
+import os
+from bisect import bisect_left
+from builtins import object, range, str
+from collections import defaultdict
+from threading import Lock, Thread
+from timeit import default_timer
+
+import numpy as np
+import plac
+from future.moves.http.client import HTTPConnection
+from future.moves.http.server import BaseHTTPRequestHandler, HTTPServer
+from future.moves.socketserver import ThreadingMixIn
+from future.moves.urllib.parse import urlparse
+
+from snips_nlu.builtin_entities import get_builtin_entities_cache_stats
+from snips_nlu.nlu_engine.engine_pool import EnginePool
+
+# Upper bounds, in milliseconds, of the buckets of the latency histograms
+LATENCY_BUCKETS_MS = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+# Latencies measured for each request: whole request handling in the server,
+# waiting for a free worker, and parsing within the worker
+LATENCY_STAGES = ["request", "queue", "parse"]
+
+PARSE_ENDPOINTS = {"/parse", "/parse_batch"}
+
+
+class LatencyHistogram(object):
+    """Histogram of latencies, with fixed buckets"""
+
+    def __init__(self, buckets=None):
+        if buckets is None:
+            buckets = LATENCY_BUCKETS_MS
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, latency_ms):
+        self.counts[bisect_left(self.buckets, latency_ms)] += 1
+        self.count += 1
+        self.total += latency_ms
+
+    def to_dict(self):
+        labels = ["<=%s" % bound for bound in self.buckets] + ["+inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0
+        }
+
+
+class ServerMetrics(object):
+    """Thread-safe metrics of the NLU server, exposed on */metrics*"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.requests = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.nb_parsed_texts = 0
+        self.latencies = {stage: LatencyHistogram()
+                          for stage in LATENCY_STAGES}
+        # Latest cache statistics reported by each worker process
+        self.workers_stats = dict()
+
+    def record_request(self, endpoint, status):
+        with self._lock:
+            self.requests[endpoint] += 1
+            if status >= 400:
+                self.errors[endpoint] += 1
+
+    def record_parsing(self, nb_texts, latencies, worker_stats):
+        with self._lock:
+            self.nb_parsed_texts += nb_texts
+            for stage, latency_ms in latencies.items():
+                self.latencies[stage].observe(latency_ms)
+            self.workers_stats[worker_stats["pid"]] = worker_stats
+
+    def to_dict(self):
+        with self._lock:
+            workers_stats = list(self.workers_stats.values())
+            return {
+                "requests": dict(self.requests),
+                "errors": dict(self.errors),
+                "parsed_texts": self.nb_parsed_texts,
+                "latencies": {stage: histogram.to_dict() for stage, histogram
+                              in self.latencies.items()},
+                "caches": {
+                    "parse": _merge_cache_stats(
+                        [s["parse_cache"] for s in workers_stats
+                         if s["parse_cache"] is not None]),
+                    "builtin_entities": _merge_cache_stats(
+                        [stats for s in workers_stats
+                         for stats in s["builtin_entities_caches"].values()])
+                },
+                "workers": len(workers_stats)
+            }
+
+
+def _merge_cache_stats(stats_list):
+    merged = {key: sum(stats[key] for stats in stats_list)
+              for key in ("hits", "misses", "evictions", "size")}
+    lookups = merged["hits"] + merged["misses"]
+    merged["hit_rate"] = merged["hits"] / lookups if lookups else 0.0
+    return merged
+
+
+def _parse_texts(engine, texts, intents, sent_time):
+    # Executed in a worker process of the pool
+    start = default_timer()
+    results = engine.parse_batch(texts, intents)
+    end = default_timer()
+    parse_cache = None
+    if engine.parse_cache is not None:
+        parse_cache = engine.parse_cache.stats
+    worker_stats = {
+        "pid": os.getpid(),
+        "parse_cache": parse_cache,
+        "builtin_entities_caches": get_builtin_entities_cache_stats()
+    }
+    latencies = {
+        "queue": (start - sent_time) * 1000,
+        "parse": (end - start) * 1000
+    }
+    return results, latencies, worker_stats
+
+
+class _BadRequest(Exception):
+    pass
+
+
+class NLURequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps the connections alive between requests
+    protocol_version = "HTTP/1.1"
+    server_version = "snips-nlu"
+    # Headers and body are written separately, which would otherwise delay
+    # the responses on kept-alive connections
+    disable_nagle_algorithm = True
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        path = urlparse(self.path).path
+        if path == "/metrics":
+            self._send_json(200, self.server.metrics.to_dict(), path)
+        else:
+            self._send_json(404, {"error": "Unknown endpoint: %s" % path},
+                            path)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        start = default_timer()
+        path = urlparse(self.path).path
+        try:
+            body = self._read_json()
+        except _BadRequest as e:
+            self._send_json(400, {"error": str(e)}, path)
+            return
+        if path not in PARSE_ENDPOINTS:
+            self._send_json(404, {"error": "Unknown endpoint: %s" % path},
+                            path)
+            return
+        try:
+            texts, intents = _get_parse_args(path, body)
+        except _BadRequest as e:
+            self._send_json(400, {"error": str(e)}, path)
+            return
+        try:
+            results, latencies, worker_stats = self.server.pool.run(
+                _parse_texts, texts, intents, default_timer())
+        except Exception as e:  # pylint: disable=broad-except
+            self._send_json(500, {"error": "%s" % e}, path)
+            return
+        latencies["request"] = (default_timer() - start) * 1000
+        self.server.metrics.record_parsing(len(texts), latencies,
+                                           worker_stats)
+        response = results[0] if path == "/parse" else results
+        self._send_json(200, response, path)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        # The body is always consumed so that the connection can be reused
+        data = self.rfile.read(length)
+        try:
+            return json.loads(data.decode("utf8")) if data else dict()
+        except ValueError:
+            raise _BadRequest("Request body must be valid JSON")
+
+    def _send_json(self, status, content, endpoint):
+        data = json.dumps(content).encode("utf8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        # Metrics are recorded before the response is received by the client
+        self.server.metrics.record_request(endpoint, status)
+        self.wfile.write(data)
+
+
+def _get_parse_args(endpoint, body):
+    if not isinstance(body, dict):
+        raise _BadRequest("Request body must be a JSON object")
+    if endpoint == "/parse":
+        texts = [body.get("text")]
+    else:
+        texts = body.get("texts")
+        if not isinstance(texts, list):
+            raise _BadRequest("'texts' must be a list of strings")
+    if not all(isinstance(text, str) for text in texts):
+        raise _BadRequest("Texts to parse must be strings")
+    intents = body.get("intents")
+    if intents is not None and not isinstance(intents, (str, list)):
+        raise _BadRequest("'intents' must be a string or a list of strings")
+    return texts, intents
+
+
+class NLUServer(ThreadingMixIn, HTTPServer):
+    """HTTP server parsing with the workers of an :class:`.EnginePool`
+
+    Each connection is handled in its own thread, which waits for the
+    parsing results of the workers. The server exposes the following
+    endpoints:
+
+    - ``POST /parse`` with a ``{"text": ..., "intents": ...}`` JSON body,
+      *intents* being optional, returns the parsing result
+    - ``POST /parse_batch`` with a ``{"texts": [...], "intents": ...}`` JSON
+      body returns the list of the parsing results
+    - ``GET /metrics`` returns the request counts, the latency histograms of
+      each stage of the requests and the hit rates of the caches
+
+    Args:
+        engine_path (str): Path of the persisted NLU engine
+        address (tuple): Host and port of the server, the port 0 meaning
+            that any free port is used
+        workers (int, optional): Number of worker processes. Defaults to the
+            number of CPUs.
+        cache_size (int, optional): Size of the parsing results cache of each
+            worker, no cache being used when it is 0 or None
+        verbose (bool, optional): Whether or not to log the requests
+        warmup (bool, optional): Whether or not to warm up the engine before
+            listening, see :func:`.SnipsNLUEngine.warmup`. Defaults to True.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, engine_path, address, workers=None, cache_size=None,
+                 verbose=False, warmup=True):
+        start = default_timer()
+        self.pool = EnginePool(engine_path, workers=workers,
+                               parse_cache_size=cache_size, warmup=warmup)
+        self.loading_time = default_timer() - start
+        self.metrics = ServerMetrics()
+        self.verbose = verbose
+        try:
+            HTTPServer.__init__(self, address, NLURequestHandler)
+        except Exception:
+            self.pool.close()
+            raise
+
+    def server_close(self):
+        HTTPServer.server_close(self)
+        self.pool.close()
+
+
+@plac.annotations(
+    training_path=("Path to a trained engine", "positional", None, str),
+    host=("Host of the server", "option", "H", str),
+    port=("Port of the server", "option", "p", int),
+    workers=("Number of worker processes, defaults to the number of CPUs",
+             "option", "w", int),
+    cache_size=("Number of parsing results cached by each worker, 0 "
+                "disabling the cache", "option", "c", int),
+    verbose=("Log the requests", "flag", "v"),
+    no_warmup=("Do not warm up the engine before listening", "flag", "W"))
+def serve(training_path, host="127.0.0.1", port=8337, workers=None,
+          cache_size=1000, verbose=False, no_warmup=False):
+    """Serve a trained NLU engine through a local HTTP JSON API"""
+    server = NLUServer(training_path, (host, port), workers=workers,
+                       cache_size=cache_size, verbose=verbose,
+                       warmup=not no_warmup)
+    print("Loaded the engine%s in %.2fs"
+          % ("" if no_warmup else " and warmed it up", server.loading_time))
+    print("Serving %s on http://%s:%s with %s workers (Ctrl-C to stop)"
+          % (training_path, host, server.server_address[1],
+             server.pool.workers))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+@plac.annotations(
+    url=("Url of the server, such as http://127.0.0.1:8337", "positional",
+         None, str),
+    queries_path=("Path of a text file with one query per line",
+                  "positional", None, str),
+    nb_requests=("Total number of requests to send", "option", "n", int),
+    concurrency=("Number of concurrent connections", "option", "c", int),
+    batch_size=("If provided, queries are sent by batches of this size to "
+                "/parse_batch", "option", "b", int))
+def load_test(url, queries_path, nb_requests=1000, concurrency=8,
+              batch_size=None):
+    """Load test an NLU server, and report its throughput and latencies"""
+    with open(queries_path, "rb") as f:
+        queries = [l.decode("utf8").strip() for l in f]
+    queries = [q for q in queries if q]
+    if not queries:
+        raise ValueError("No query found in %s" % queries_path)
+    report = run_load_test(url, queries, nb_requests, concurrency,
+                           batch_size)
+    print(json.dumps(report, indent=2, sort_keys=True))
+
+
+def run_load_test(url, queries, nb_requests, concurrency, batch_size=None):
+    """Sends *nb_requests* requests to the NLU server at *url*, cycling over
+    *queries*, over *concurrency* keep-alive connections
+
+    Returns:
+        dict: The throughput in requests and queries per second, the number
+        of errors, and the percentiles of the request latencies in
+        milliseconds
+    """
+    parsed_url = urlparse(url)
+    requests_lock = Lock()
+    remaining = [nb_requests]
+    latencies = []
+    errors = [0]
+
+    def next_body(request_index):
+        if batch_size is None:
+            text = queries[request_index % len(queries)]
+            return "/parse", {"text": text}
+        start = request_index * batch_size
+        texts = [queries[(start + i) % len(queries)]
+                 for i in range(batch_size)]
+        return "/parse_batch", {"texts": texts}
+
+    def send_requests():
+        connection = HTTPConnection(parsed_url.hostname, parsed_url.port)
+        try:
+            while True:
+                with requests_lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                    request_index = nb_requests - remaining[0] - 1
+                endpoint, body = next_body(request_index)
+                start = default_timer()
+                try:
+                    connection.request(
+                        "POST", endpoint, json.dumps(body).encode("utf8"),
+                        {"Content-Type": "application/json"})
+                    response = connection.getresponse()
+                    response.read()
+                    success = response.status == 200
+                except Exception:  # pylint: disable=broad-except
+                    connection.close()
+                    success = False
+                latency = (default_timer() - start) * 1000
+                with requests_lock:
+                    if success:
+                        latencies.append(latency)
+                    else:
+                        errors[0] += 1
+        finally:
+            connection.close()
+
+    threads = [Thread(target=send_requests) for _ in range(concurrency)]
+    start = default_timer()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = default_timer() - start
+
+    queries_per_request = batch_size or 1
+    report = {
+        "requests": nb_requests,
+        "errors": errors[0],
+        "duration_s": duration,
+        "requests_per_second": len(latencies) / duration,
+        "queries_per_second":
+            len(latencies) * queries_per_request / duration,
+    }
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        report["latency_ms"] = {
+            "p50": p50,
+            "p95": p95,
+            "p99": p99,
+            "max": max(latencies)
+        }
+    return report
@@ -20,6 +20,7 @@ RES_ENTITY = "entity"
 RES_VALUE = "value"
 RES_RAW_VALUE = "rawValue"
 RES_MATCH_RANGE = "range"
+RES_DEGRADATIONS = "degradations"
 
 # miscellaneous
 AUTOMATICALLY_EXTENSIBLE = "automatically_extensible"
@@ -0,0 +1,134 @@
+from __future__ import division, unicode_literals
+
+from collections import defaultdict
+from contextlib import contextmanager
+from threading import Lock, local
+from timeit import default_timer
+
+# Degradations which can be applied when the latency budget of a parsing is
+# exhausted, from the mildest to the most severe. Each pipeline stage checks
+# the budget before running, and applies its degradation if there is no time
+# left:
+# - the permutations of builtin slots are not rescored with the CRF, the
+#   builtin slots tagged by the CRF being kept as they are
+# - the slots are not extracted, the result only containing the intent
+#   found by the intent classifier
+# - the remaining intent parsers are not called, once a first parser, the
+#   deterministic one by default, has failed to parse the input. The
+#   parsers which support the slot filling degradation, such as the
+#   probabilistic one, are still called and apply the milder degradations
+DEGRADATION_BUILTIN_SLOTS_RESCORING = "builtin_slots_rescoring"
+DEGRADATION_SLOT_FILLING = "slot_filling"
+DEGRADATION_INTENT_PARSERS = "intent_parsers"
+
+DEGRADATIONS = [
+    DEGRADATION_BUILTIN_SLOTS_RESCORING,
+    DEGRADATION_SLOT_FILLING,
+    DEGRADATION_INTENT_PARSERS
+]
+
+_DEADLINE_CONTEXT = local()
+
+_DEGRADATION_COUNTS = defaultdict(int)
+_DEGRADATION_COUNTS_LOCK = Lock()
+
+
+@contextmanager
+def deadline_context(deadline_ms, count_degradations=True):
+    """Context in which the parsing of the current thread must complete
+    within *deadline_ms* milliseconds
+
+    The deadline is cooperative: a stage which has started always completes,
+    but the next stages are degraded once the deadline has passed, see
+    :data:`DEGRADATIONS`. The degradations applied within the context are
+    yielded as a list, which is filled as they happen.
+
+    Args:
+        deadline_ms (float): Latency budget, in milliseconds
+        count_degradations (bool, optional): Whether or not the degradations
+            applied within the context are added to the counts of
+            :func:`get_degradation_counts`. A parsing done on behalf of
+            another thread does not count them, as its result may be
+            discarded, and they are counted by :func:`add_degradations` when
+            the result is used. Defaults to *True*.
+
+    Raises:
+        ValueError: When the budget is negative
+    """
+    if deadline_ms < 0:
+        raise ValueError("deadline_ms must be positive but received: %s"
+                         % deadline_ms)
+    previous_deadline = getattr(_DEADLINE_CONTEXT, "deadline", None)
+    previous_degradations = getattr(_DEADLINE_CONTEXT, "degradations", None)
+    previous_count_degradations = getattr(
+        _DEADLINE_CONTEXT, "count_degradations", True)
+    deadline = default_timer() + deadline_ms / 1000
+    if previous_deadline is not None:
+        deadline = min(deadline, previous_deadline)
+    degradations = []
+    _DEADLINE_CONTEXT.deadline = deadline
+    _DEADLINE_CONTEXT.degradations = degradations
+    _DEADLINE_CONTEXT.count_degradations = count_degradations
+    try:
+        yield degradations
+    finally:
+        _DEADLINE_CONTEXT.deadline = previous_deadline
+        _DEADLINE_CONTEXT.degradations = previous_degradations
+        _DEADLINE_CONTEXT.count_degradations = previous_count_degradations
+
+
+def get_remaining_time():
+    """Returns the remaining latency budget of the current thread, in
+    seconds, or *None* when there is no deadline"""
+    deadline = getattr(_DEADLINE_CONTEXT, "deadline", None)
+    if deadline is None:
+        return None
+    return deadline - default_timer()
+
+
+def should_degrade(degradation):
+    """Checks whether the latency budget of the current thread is exhausted,
+    in which case the *degradation* is recorded and *True* is returned"""
+    remaining_time = get_remaining_time()
+    if remaining_time is None or remaining_time > 0:
+        return False
+    _DEADLINE_CONTEXT.degradations.append(degradation)
+    if _DEADLINE_CONTEXT.count_degradations:
+        _count_degradations([degradation])
+    return True
+
+
+def add_degradations(degradations):
+    """Adds *degradations*, which have been applied in another thread on
+    behalf of the current one without being counted, to the current deadline
+    context, and counts them"""
+    if degradations and get_remaining_time() is not None:
+        _DEADLINE_CONTEXT.degradations.extend(degradations)
+        if _DEADLINE_CONTEXT.count_degradations:
+            _count_degradations(degradations)
+
+
+def _count_degradations(degradations):
+    with _DEGRADATION_COUNTS_LOCK:
+        for degradation in degradations:
+            _DEGRADATION_COUNTS[degradation] += 1
+
+
+def get_degradations():
+    """Returns the degradations applied so far within the current deadline
+    context, if any"""
+    degradations = getattr(_DEADLINE_CONTEXT, "degradations", None)
+    return [] if degradations is None else list(degradations)
+
+
+def get_degradation_counts():
+    """Returns the number of times each degradation has been applied since
+    the last call to :func:`reset_degradation_counts`, across all threads"""
+    with _DEGRADATION_COUNTS_LOCK:
+        return {degradation: _DEGRADATION_COUNTS[degradation]
+                for degradation in DEGRADATIONS}
+
+
+def reset_degradation_counts():
+    with _DEGRADATION_COUNTS_LOCK:
+        _DEGRADATION_COUNTS.clear()
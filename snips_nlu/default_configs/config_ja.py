@@ -187,7 +187,8 @@ CONFIG = {
                     "capitalization_ratio": 0.2,
                     "add_builtin_entities_examples": True
                 },
-                "random_seed": None
+                "random_seed": None,
+                "inference_backend": "crfsuite"
             },
             "intent_classifier_config": {
                 "unit_name": "log_reg_intent_classifier",
@@ -201,9 +202,13 @@ CONFIG = {
                 "featurizer_config": {
                     "sublinear_tf": False,
                     "pvalue_threshold": 0.4,
-                    "word_clusters_name": None
+                    "word_clusters_name": None,
+                    "feature_hashing_size": None,
+                    "n_jobs": 1,
+                    "preprocessing_chunk_size": 200
                 },
-                "random_seed": None
+                "random_seed": None,
+                "replay_buffer_size": 100
             }
         }
     ]
@@ -2,24 +2,31 @@ from __future__ import division, unicode_literals
 
 from builtins import object, range
 from collections import defaultdict
+from multiprocessing import Pool, cpu_count
+from pathlib import Path
 
 import numpy as np
 import scipy.sparse as sp
 from future.utils import iteritems
-from sklearn.feature_extraction.text import TfidfTransformer, TfidfVectorizer
+from sklearn.feature_extraction.text import (
+    HashingVectorizer, TfidfTransformer, TfidfVectorizer)
 from sklearn.feature_selection import chi2
+from snips_nlu_ontology import get_supported_entities
 from snips_nlu_utils import normalize
 
-from snips_nlu.builtin_entities import get_builtin_entities, is_builtin_entity
+from snips_nlu.builtin_entities import (
+    builtin_entities_context, get_builtin_entities, get_builtin_entities_scope,
+    is_builtin_entity)
 from snips_nlu.constants import (
-    DATA, ENTITIES, ENTITY, ENTITY_KIND, NGRAM, TEXT, UTTERANCES)
+    DATA, ENTITIES, ENTITY, ENTITY_KIND, TEXT, UTTERANCES)
 from snips_nlu.dataset import get_text_from_chunks
 from snips_nlu.languages import get_default_sep
 from snips_nlu.pipeline.configs import FeaturizerConfig
 from snips_nlu.preprocessing import stem, tokenize_light
 from snips_nlu.resources import (
-    MissingResource, get_stop_words, get_word_cluster)
-from snips_nlu.slot_filler.features_utils import get_all_ngrams
+    MissingResource, get_resources_dir, get_stop_words, get_word_cluster,
+    load_resources_from_dir)
+from snips_nlu.utils import LRUCache
 
 
 class Featurizer(object):
@@ -29,8 +36,13 @@ class Featurizer(object):
         self.config = config
         self.language = language
         if tfidf_vectorizer is None:
-            tfidf_vectorizer = _get_tfidf_vectorizer(
-                self.language, sublinear_tf=self.config.sublinear_tf)
+            if self.config.feature_hashing_size is not None:
+                tfidf_vectorizer = HashingTfidfVectorizer(
+                    self.language, self.config.feature_hashing_size,
+                    sublinear_tf=self.config.sublinear_tf)
+            else:
+                tfidf_vectorizer = _get_tfidf_vectorizer(
+                    self.language, sublinear_tf=self.config.sublinear_tf)
         self.tfidf_vectorizer = tfidf_vectorizer
         self.best_features = best_features
         self.entity_utterances_to_feature_names = \
@@ -40,57 +52,109 @@ class Featurizer(object):
             unknown_words_replacement_string
 
     def fit(self, dataset, utterances, classes):
+        if self._fit(dataset, utterances, classes) is None:
+            return None
+        return self
+
+    def _fit(self, dataset, utterances, classes):
         utterances_texts = (get_text_from_chunks(u[DATA]) for u in utterances)
         if not any(tokenize_light(q, self.language) for q in utterances_texts):
             return None
 
-        utterances_to_features = _get_utterances_to_features_names(
-            dataset, self.language)
-        normalized_utterances_to_features = defaultdict(set)
-        for k, v in iteritems(utterances_to_features):
-            normalized_utterances_to_features[
-                _normalize_stem(k, self.language)].update(v)
-        if self.unknown_words_replacement_string is not None \
-                and self.unknown_words_replacement_string in \
-                normalized_utterances_to_features:
-            normalized_utterances_to_features.pop(
-                self.unknown_words_replacement_string)
-        self.entity_utterances_to_feature_names = dict(
-            normalized_utterances_to_features)
+        self.entity_utterances_to_feature_names = \
+            self._get_normalized_utterances_to_features_names(dataset)
 
-        preprocessed_utterances = self.preprocess_utterances(utterances)
+        preprocessed_utterances = self.preprocess_utterances(
+            utterances, n_jobs=self.config.n_jobs)
         # pylint: disable=C0103
         X_train_tfidf = self.tfidf_vectorizer.fit_transform(
             preprocessed_utterances)
         # pylint: enable=C0103
-        features_idx = {self.tfidf_vectorizer.vocabulary_[word]: word for word
-                        in self.tfidf_vectorizer.vocabulary_}
-
         stop_words = get_stop_words(self.language)
+        stop_words_features = self._get_features_indexes(stop_words)
 
+        # Hashed features may take negative values while chi2 requires
+        # non-negative ones
+        if self.config.feature_hashing_size is not None:
+            X_train_tfidf = abs(X_train_tfidf)  # pylint: disable=C0103
         _, pval = chi2(X_train_tfidf, classes)
+        # Columns which are never activated, which happens with hashed
+        # features, have an undefined pvalue
+        pval[np.isnan(pval)] = np.inf
         self.best_features = [i for i, v in enumerate(pval) if
                               v < self.config.pvalue_threshold]
         if not self.best_features:
             self.best_features = [idx for idx, val in enumerate(pval) if
                                   val == pval.min()]
 
-        feature_names = {}
-        for utterance_index in self.best_features:
-            feature_names[utterance_index] = {
-                "word": features_idx[utterance_index],
-                "pval": pval[utterance_index]}
-
-        for feat in feature_names:
-            if feature_names[feat]["word"] in stop_words:
-                if feature_names[feat]["pval"] > \
-                        self.config.pvalue_threshold / 2.0:
+        for feat in list(self.best_features):
+            if feat in stop_words_features:
+                if pval[feat] > self.config.pvalue_threshold / 2.0:
                     self.best_features.remove(feat)
 
-        return self
+        return preprocessed_utterances
+
+    def update(self, dataset, utterances):
+        """Extends the fitted featurizer with the entity values of *dataset*
+        and the vocabulary of *utterances*, without refitting it
+
+        The vocabulary cannot be extended when features are hashed, in which
+        case only the entity values are added.
+
+        Returns:
+            int: The number of features which have been appended to the
+            transformed feature space
+        """
+        for k, v in iteritems(
+                self._get_normalized_utterances_to_features_names(dataset)):
+            self.entity_utterances_to_feature_names.setdefault(
+                k, set()).update(v)
+        if self.config.feature_hashing_size is not None:
+            return 0
+
+        vocabulary = self.tfidf_vectorizer.vocabulary_
+        stop_words = get_stop_words(self.language)
+        analyzer = self.tfidf_vectorizer.build_analyzer()
+        new_words = sorted(set(
+            w for u in self.preprocess_utterances(
+                utterances, n_jobs=self.config.n_jobs)
+            for w in analyzer(u)
+            if w not in vocabulary and w not in stop_words))
+        if not new_words:
+            return 0
+
+        # New words have only been seen in a handful of utterances, so they
+        # are given the idf of the rarest words of the training set
+        # pylint: disable=W0212
+        idf = np.ravel(self.tfidf_vectorizer._tfidf._idf_diag.sum(axis=0))
+        # pylint: enable=W0212
+        nb_features = len(vocabulary)
+        for i, word in enumerate(new_words):
+            vocabulary[word] = nb_features + i
+        idf = np.concatenate([idf, np.full(len(new_words), idf.max())])
+        # pylint: disable=W0212
+        self.tfidf_vectorizer._tfidf._idf_diag = sp.spdiags(
+            idf, diags=0, m=len(idf), n=len(idf), format="csr")
+        # pylint: enable=W0212
+        self.best_features += list(
+            range(nb_features, nb_features + len(new_words)))
+        return len(new_words)
+
+    def transform(self, utterances, n_jobs=1):
+        # Inference preprocesses the utterances in the current process by
+        # default, fit and update passing the configured n_jobs instead
+        return self._transform_preprocessed(
+            self.preprocess_utterances(utterances, n_jobs=n_jobs))
 
-    def transform(self, utterances):
-        preprocessed_utterances = self.preprocess_utterances(utterances)
+    def fit_transform(self, dataset, queries, y):
+        # The training utterances are preprocessed only once, possibly in
+        # worker processes, and reused to build the features matrix
+        preprocessed_utterances = self._fit(dataset, queries, y)
+        if preprocessed_utterances is None:
+            return None
+        return self._transform_preprocessed(preprocessed_utterances)
+
+    def _transform_preprocessed(self, preprocessed_utterances):
         # pylint: disable=C0103
         X_train_tfidf = self.tfidf_vectorizer.transform(
             preprocessed_utterances)
@@ -98,10 +162,57 @@ class Featurizer(object):
         # pylint: enable=C0103
         return X
 
-    def fit_transform(self, dataset, queries, y):
-        return self.fit(dataset, queries, y).transform(queries)
+    def get_used_builtin_entities(self):
+        """Builtin entities whose features are part of the vocabulary, or
+        *None* when features are hashed
 
-    def preprocess_utterances(self, utterances):
+        The features of the other builtin entities are ignored by
+        :func:`transform`, hence these builtin entities do not need to be
+        parsed. Hashed features are never ignored.
+        """
+        if self.config.feature_hashing_size is not None:
+            return None
+        vocabulary = getattr(self.tfidf_vectorizer, "vocabulary_", None)
+        if vocabulary is None:
+            return set()
+        analyzer = self.tfidf_vectorizer.build_analyzer()
+        return set(
+            entity for entity in get_supported_entities(self.language)
+            if any(w in vocabulary for w in analyzer(
+                _builtin_entity_to_feature(entity, self.language))))
+
+    def _get_normalized_utterances_to_features_names(self, dataset):
+        utterances_to_features = _get_utterances_to_features_names(
+            dataset, self.language)
+        normalized_utterances_to_features = defaultdict(set)
+        for k, v in iteritems(utterances_to_features):
+            normalized_utterances_to_features[
+                _normalize_stem(k, self.language)].update(v)
+        if self.unknown_words_replacement_string is not None \
+                and self.unknown_words_replacement_string in \
+                normalized_utterances_to_features:
+            normalized_utterances_to_features.pop(
+                self.unknown_words_replacement_string)
+        return dict(normalized_utterances_to_features)
+
+    def _get_features_indexes(self, words):
+        if self.config.feature_hashing_size is not None:
+            return self.tfidf_vectorizer.get_features_indexes(words)
+        vocabulary = self.tfidf_vectorizer.vocabulary_
+        return set(vocabulary[w] for w in words if w in vocabulary)
+
+    def preprocess_utterances(self, utterances, n_jobs=1):
+        # Worker processes are only spawned when fit and update pass the
+        # configured n_jobs, so that the inference never forks new processes
+        utterances = list(utterances)
+        if n_jobs == -1:
+            n_jobs = cpu_count()
+        chunk_size = self.config.preprocessing_chunk_size
+        if n_jobs > 1 and len(utterances) > chunk_size:
+            return _parallel_preprocess_utterances(
+                utterances, self.language,
+                self.entity_utterances_to_feature_names,
+                self.config.word_clusters_name, n_jobs, chunk_size)
         return [
             _preprocess_utterance(
                 u, self.language, self.entity_utterances_to_feature_names,
@@ -111,26 +222,22 @@ class Featurizer(object):
 
     def to_dict(self):
         """Returns a json-serializable dict"""
-        if hasattr(self.tfidf_vectorizer, "vocabulary_"):
-            # pylint: # pylint: disable=W0212
-            vocab = {k: int(v) for k, v in
-                     iteritems(self.tfidf_vectorizer.vocabulary_)}
-            idf_diag = self.tfidf_vectorizer._tfidf._idf_diag.data.tolist()
-            # pylint: enable=W0212
+        if self.config.feature_hashing_size is not None:
+            tfidf_vectorizer = self.tfidf_vectorizer.to_dict()
+            fitted = self.tfidf_vectorizer.fitted
+        else:
+            tfidf_vectorizer = _serialize_tfidf_vectorizer(
+                self.tfidf_vectorizer)
+            fitted = tfidf_vectorizer["vocab"] is not None
+
+        if fitted:
             entity_utterances_to_entity_names = {
                 k: list(v)
                 for k, v in iteritems(self.entity_utterances_to_feature_names)
             }
         else:
-            vocab = None
-            idf_diag = None
             entity_utterances_to_entity_names = dict()
 
-        tfidf_vectorizer = {
-            'vocab': vocab,
-            'idf_diag': idf_diag
-        }
-
         return {
             'language_code': self.language,
             'tfidf_vectorizer': tfidf_vectorizer,
@@ -150,8 +257,13 @@ class Featurizer(object):
         """
         language = obj_dict['language_code']
         config = FeaturizerConfig.from_dict(obj_dict["config"])
-        tfidf_vectorizer = _deserialize_tfidf_vectorizer(
-            obj_dict["tfidf_vectorizer"], language, config.sublinear_tf)
+        if config.feature_hashing_size is not None:
+            tfidf_vectorizer = HashingTfidfVectorizer.from_dict(
+                obj_dict["tfidf_vectorizer"], language,
+                config.feature_hashing_size, config.sublinear_tf)
+        else:
+            tfidf_vectorizer = _deserialize_tfidf_vectorizer(
+                obj_dict["tfidf_vectorizer"], language, config.sublinear_tf)
         entity_utterances_to_entity_names = {
             k: set(v) for k, v in
             iteritems(obj_dict['entity_utterances_to_feature_names'])
@@ -169,6 +281,96 @@ class Featurizer(object):
         return self
 
 
+class HashingTfidfVectorizer(object):
+    """Tf-idf vectorizer which maps tokens into a fixed-width feature space
+
+    Tokens are mapped to columns using a signed hash, so that no vocabulary
+    needs to be stored: the size of the fitted vectorizer is bounded by
+    *n_features* no matter how many distinct tokens are seen during training.
+    Idf weights are computed over the hashed columns.
+    """
+
+    def __init__(self, language, n_features, sublinear_tf=False):
+        self.language = language
+        self.n_features = n_features
+        self.sublinear_tf = sublinear_tf
+        self._hashing_vectorizer = HashingVectorizer(
+            tokenizer=lambda x: tokenize_light(x, language),
+            n_features=n_features, alternate_sign=True, norm=None)
+        self._tfidf = TfidfTransformer()
+
+    @property
+    def fitted(self):
+        return hasattr(self._tfidf, "_idf_diag")
+
+    def fit_transform(self, raw_documents):
+        # pylint: disable=C0103
+        X = self._get_term_frequencies(raw_documents)
+        self._tfidf.fit(X)
+        return self._tfidf.transform(X, copy=False)
+        # pylint: enable=C0103
+
+    def transform(self, raw_documents):
+        # pylint: disable=C0103
+        X = self._get_term_frequencies(raw_documents)
+        return self._tfidf.transform(X, copy=False)
+        # pylint: enable=C0103
+
+    def get_features_indexes(self, words):
+        """Returns the set of columns which the provided words are hashed to
+        """
+        if not words:
+            return set()
+        return set(self._hashing_vectorizer.transform(list(words)).indices)
+
+    def _get_term_frequencies(self, raw_documents):
+        # pylint: disable=C0103
+        X = self._hashing_vectorizer.transform(raw_documents)
+        # Tokens hashed with opposite signs on the same column may cancel out
+        X.eliminate_zeros()
+        if self.sublinear_tf:
+            # The sublinear scaling must preserve the sign of the hash
+            X.data = np.sign(X.data) * (np.log(np.abs(X.data)) + 1)
+        return X
+        # pylint: enable=C0103
+
+    def to_dict(self):
+        """Returns a json-serializable dict
+
+        Only the idf weights of the columns which have been activated during
+        training are stored, the other ones all share the same maximum value
+        """
+        if not self.fitted:
+            return {
+                "idf_indexes": None,
+                "idf_values": None,
+                "default_idf": None
+            }
+        # pylint: disable=W0212
+        idf = np.ravel(self._tfidf._idf_diag.sum(axis=0))
+        # pylint: enable=W0212
+        default_idf = idf.max()
+        indexes = np.where(idf < default_idf)[0]
+        return {
+            "idf_indexes": indexes.tolist(),
+            "idf_values": idf[indexes].tolist(),
+            "default_idf": float(default_idf)
+        }
+
+    @classmethod
+    def from_dict(cls, vectorizer_dict, language, n_features, sublinear_tf):
+        vectorizer = cls(language, n_features, sublinear_tf)
+        default_idf = vectorizer_dict["default_idf"]
+        if default_idf is not None:  # If the vectorizer has been fitted
+            idf = np.full(n_features, default_idf, dtype=np.float64)
+            idf[vectorizer_dict["idf_indexes"]] = vectorizer_dict["idf_values"]
+            # pylint: disable=W0212
+            vectorizer._tfidf._idf_diag = sp.spdiags(
+                idf, diags=0, m=n_features, n=n_features, format="csr")
+            # pylint: enable=W0212
+        return vectorizer
+
+
 def _get_tfidf_vectorizer(language, sublinear_tf=False):
     return TfidfVectorizer(tokenizer=lambda x: tokenize_light(x, language),
                            sublinear_tf=sublinear_tf)
@@ -201,26 +403,62 @@ def _normalize_stem(text, language):
 def _get_word_cluster_features(query_tokens, clusters_name, language):
     if not clusters_name:
         return []
-    ngrams = get_all_ngrams(query_tokens)
-    cluster_features = []
-    for ngram in ngrams:
-        cluster = get_word_cluster(language, clusters_name).get(
-            ngram[NGRAM].lower(), None)
-        if cluster is not None:
-            cluster_features.append(cluster)
-    return cluster_features
+    clusters = get_word_cluster(language, clusters_name)
+    return list(_get_ngrams_values([t.lower() for t in query_tokens],
+                                   clusters))
 
 
 def _get_dataset_entities_features(normalized_stemmed_tokens,
                                    entity_utterances_to_entity_names):
-    ngrams = get_all_ngrams(normalized_stemmed_tokens)
     entity_features = []
-    for ngram in ngrams:
-        entity_features += entity_utterances_to_entity_names.get(
-            ngram[NGRAM], [])
+    for features in _get_ngrams_values(normalized_stemmed_tokens,
+                                       entity_utterances_to_entity_names):
+        entity_features += features
     return entity_features
 
 
+# Strict token prefixes of the keys of the dicts indexed by n-grams, such as
+# the word clusters, which together with the dict itself form a token trie
+_NGRAMS_PREFIXES_CACHE = LRUCache(size_limit=10)
+
+
+def _get_ngrams_prefixes(ngrams_dict):
+    cached = _NGRAMS_PREFIXES_CACHE.get(id(ngrams_dict))
+    # The dict is kept in the cache so that its id cannot be reused, and the
+    # prefixes are recomputed when it is extended
+    if cached is None or cached[0] is not ngrams_dict \
+            or cached[1] != len(ngrams_dict):
+        prefixes = set()
+        for ngram in ngrams_dict:
+            ngram_tokens = ngram.split(" ")
+            for i in range(1, len(ngram_tokens)):
+                prefixes.add(" ".join(ngram_tokens[:i]))
+        cached = (ngrams_dict, len(ngrams_dict), prefixes)
+        _NGRAMS_PREFIXES_CACHE.put(id(ngrams_dict), cached)
+    return cached[2]
+
+
+def _get_ngrams_values(tokens, ngrams_dict):
+    """Yields the values of *ngrams_dict* for all the n-grams of *tokens*
+    which are keys of it
+
+    N-grams are only extended while they are a prefix of some key, so that
+    the scan is linear in the number of tokens for a given dict.
+    """
+    prefixes = _get_ngrams_prefixes(ngrams_dict)
+    for start in range(len(tokens)):
+        ngram = tokens[start]
+        end = start + 1
+        while True:
+            value = ngrams_dict.get(ngram)
+            if value is not None:
+                yield value
+            if end == len(tokens) or ngram not in prefixes:
+                break
+            ngram += " " + tokens[end]
+            end += 1
+
+
 def _preprocess_utterance(utterance, language,
                           entity_utterances_to_features_names,
                           word_clusters_name):
@@ -259,6 +497,56 @@ def _preprocess_utterance(utterance, language,
     return features
 
 
+# State shared by all the chunks preprocessed in a worker process, it is sent
+# once when the worker starts rather than along with each chunk
+_WORKER_PREPROCESSING_ARGS = dict()
+
+
+_WORKER_BUILTIN_ENTITIES_CONTEXT_ARGS = dict()
+
+
+def _init_preprocessing_worker(resources_dir, language,
+                               entity_utterances_to_features_names,
+                               word_clusters_name, builtin_entities_scope):
+    # Resources are already there when the worker has been forked from the
+    # parent process, in which case this is a no-op
+    load_resources_from_dir(Path(resources_dir))
+    _WORKER_PREPROCESSING_ARGS.update(
+        language=language,
+        entity_utterances_to_features_names=
+        entity_utterances_to_features_names,
+        word_clusters_name=word_clusters_name)
+    # The builtin entities context of the parent thread is not inherited by
+    # the worker processes
+    _WORKER_BUILTIN_ENTITIES_CONTEXT_ARGS.update(scope=builtin_entities_scope)
+
+
+def _preprocess_utterances_chunk(utterances):
+    with builtin_entities_context(**_WORKER_BUILTIN_ENTITIES_CONTEXT_ARGS):
+        return [_preprocess_utterance(u, **_WORKER_PREPROCESSING_ARGS)
+                for u in utterances]
+
+
+def _parallel_preprocess_utterances(utterances, language,
+                                    entity_utterances_to_features_names,
+                                    word_clusters_name, n_jobs, chunk_size):
+    chunks = [utterances[i:i + chunk_size]
+              for i in range(0, len(utterances), chunk_size)]
+    initargs = (get_resources_dir(language), language,
+                entity_utterances_to_features_names, word_clusters_name,
+                get_builtin_entities_scope())
+    pool = Pool(processes=min(n_jobs, len(chunks)),
+                initializer=_init_preprocessing_worker, initargs=initargs)
+    try:
+        # Pool.map returns the chunks in order, so that the output is the
+        # same as the one of the sequential preprocessing
+        preprocessed_chunks = pool.map(_preprocess_utterances_chunk, chunks)
+    finally:
+        pool.terminate()
+        pool.join()
+    return [u for chunk in preprocessed_chunks for u in chunk]
+
+
 def _get_utterances_to_features_names(dataset, language):
     utterances_to_features = defaultdict(set)
     for entity_name, entity_data in iteritems(dataset[ENTITIES]):
@@ -270,6 +558,22 @@ def _get_utterances_to_features_names(dataset, language):
     return dict(utterances_to_features)
 
 
+def _serialize_tfidf_vectorizer(tfidf_vectorizer):
+    if not hasattr(tfidf_vectorizer, "vocabulary_"):
+        return {
+            'vocab': None,
+            'idf_diag': None
+        }
+    vocab = {k: int(v) for k, v in iteritems(tfidf_vectorizer.vocabulary_)}
+    # pylint: disable=W0212
+    idf_diag = tfidf_vectorizer._tfidf._idf_diag.data.tolist()
+    # pylint: enable=W0212
+    return {
+        'vocab': vocab,
+        'idf_diag': idf_diag
+    }
+
+
 def _deserialize_tfidf_vectorizer(vectorizer_dict, language, sublinear_tf):
     tfidf_vectorizer = _get_tfidf_vectorizer(language, sublinear_tf)
     tfidf_transformer = TfidfTransformer()
@@ -36,3 +36,37 @@ class IntentClassifier(with_metaclass(ABCMeta, ProcessingUnit)):
             :func:`.intent_classification_result` for the output format.
         """
         pass
+
+    def get_intent_batch(self, texts, intents_filter=None):
+        """Performs intent classification on several *texts* at once
+
+        By default, :func:`get_intent` is called on each text.
+
+        Args:
+            texts (list of str): Inputs
+            intents_filter (str or list of str): When defined, it will find
+                the most likely intent among the list, otherwise it will use
+                the whole list of intents defined in the dataset
+
+        Returns:
+            list of dict or None: The result of :func:`get_intent` for each
+            text
+        """
+        return [self.get_intent(text, intents_filter) for text in texts]
+
+    def get_intents(self, text, intents_filter=None):
+        """Performs intent classification on the provided *text* and returns
+        the list of all intents sorted by decreasing probability
+
+        Args:
+            text (str): Input
+            intents_filter (str or list of str): When defined, only these
+                intents, along with the *None* intent, are returned
+
+        Returns:
+            list of dict: The list of intents along with their probability.
+            See :func:`.intent_classification_result` for the output format
+            of each item. The *None* intent may be part of the list.
+        """
+        raise NotImplementedError("%s does not support the classification of "
+                                  "all intents at once" % type(self).__name__)
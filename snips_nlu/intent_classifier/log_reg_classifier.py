@@ -1,4 +1,4 @@
-from __future__ import unicode_literals
+from __future__ import division, unicode_literals
 
 import json
 import logging
@@ -8,8 +8,9 @@ from pathlib import Path
 import numpy as np
 from future.utils import iteritems
 from sklearn.linear_model import SGDClassifier
+from sklearn.utils.class_weight import compute_class_weight
 
-from snips_nlu.constants import LANGUAGE
+from snips_nlu.constants import INTENTS, LANGUAGE, UTTERANCES
 from snips_nlu.dataset import validate_and_format_dataset
 from snips_nlu.intent_classifier.featurizer import Featurizer
 from snips_nlu.intent_classifier.intent_classifier import IntentClassifier
@@ -31,6 +32,12 @@ LOG_REG_ARGS = {
     "n_jobs": -1
 }
 
+# Thresholds beyond which incremental updates are considered to have drifted
+# too much from the original training, and a full retraining is advised
+MAX_UPDATED_UTTERANCES_RATIO = 0.2
+MAX_ADDED_FEATURES_RATIO = 0.2
+MAX_REPLAY_ACCURACY_DROP = 0.05
+
 
 class LogRegIntentClassifier(IntentClassifier):
     """Intent classifier which uses a Logistic Regression underneath"""
@@ -48,6 +55,9 @@ class LogRegIntentClassifier(IntentClassifier):
         self.classifier = None
         self.intent_list = None
         self.featurizer = None
+        self.replay_buffer = None
+        self.drift_stats = None
+        self._random_state = None
 
     # pylint:enable=line-too-long
 
@@ -68,12 +78,17 @@ class LogRegIntentClassifier(IntentClassifier):
         dataset = validate_and_format_dataset(dataset)
         language = dataset[LANGUAGE]
         random_state = check_random_state(self.config.random_seed)
+        # The same random state keeps being used by the updates, so that
+        # they do not replay the same reservoir sampling draws
+        self._random_state = random_state
 
         data_augmentation_config = self.config.data_augmentation_config
         utterances, classes, intent_list = build_training_data(
             dataset, language, data_augmentation_config, random_state)
 
         self.intent_list = intent_list
+        self.replay_buffer = None
+        self.drift_stats = None
         if len(self.intent_list) <= 1:
             return self
 
@@ -81,18 +96,195 @@ class LogRegIntentClassifier(IntentClassifier):
             language,
             data_augmentation_config.unknown_words_replacement_string,
             self.config.featurizer_config)
-        self.featurizer = self.featurizer.fit(dataset, utterances, classes)
-        if self.featurizer is None:
+        # pylint: disable=C0103
+        X = self.featurizer.fit_transform(dataset, utterances, classes)
+        # pylint: enable=C0103
+        if X is None:
+            self.featurizer = None
             return self
 
-        X = self.featurizer.transform(utterances)  # pylint: disable=C0103
         alpha = get_regularization_factor(dataset)
         self.classifier = SGDClassifier(random_state=random_state,
                                         alpha=alpha, **LOG_REG_ARGS)
         self.classifier.fit(X, classes)
         logger.debug("%s", DifferedLoggingMessage(self.log_best_features))
+
+        replay_indexes = random_state.choice(
+            len(utterances), min(self.config.replay_buffer_size,
+                                 len(utterances)), replace=False)
+        self.replay_buffer = [
+            {"utterance": utterances[i], "class": int(classes[i])}
+            for i in sorted(replay_indexes)]
+        replay_accuracy = self._get_replay_accuracy()
+        self.drift_stats = {
+            "nb_fitted_utterances": len(utterances),
+            "nb_fitted_features": len(self.featurizer.best_features),
+            "fitted_replay_accuracy": replay_accuracy,
+            "nb_updates": 0,
+            "nb_updated_utterances": 0,
+            "nb_added_features": 0,
+            "replay_accuracy": replay_accuracy
+        }
+        return self
+
+    @log_elapsed_time(logger, logging.DEBUG,
+                      "Updated LogRegIntentClassifier in {elapsed_time}")
+    @fitted_required
+    def update(self, dataset_delta, n_epochs=LOG_REG_ARGS["max_iter"]):
+        """Updates the fitted intent classifier with new utterances, without
+        retraining it from scratch
+
+        The utterances of *dataset_delta* are used as they are, without data
+        augmentation. The vocabulary of the featurizer is extended with
+        them when possible, and a few epochs of stochastic gradient descent
+        are run on them along with the replay buffer of training
+        utterances. After each update, :attr:`drift_stats` and
+        :attr:`needs_retrain` tell whether a full retraining is advised.
+
+        Args:
+            dataset_delta (dict): Valid Snips dataset containing the new
+                utterances, which can only belong to intents already known
+                by the classifier
+            n_epochs (int, optional): Number of passes over the new
+                utterances and the replay buffer
+
+        Returns:
+            :class:`LogRegIntentClassifier`: The same instance, updated
+
+        Raises:
+            NotTrained: When the intent classifier is not fitted
+            ValueError: When the update cannot be performed incrementally
+        """
+        dataset_delta = validate_and_format_dataset(dataset_delta)
+        if self.classifier is None:
+            raise ValueError("The intent classifier was fitted without any "
+                             "usable training data and must be refitted")
+        if self.drift_stats is None:
+            raise ValueError("The intent classifier was persisted without "
+                             "the data needed by incremental updates and "
+                             "must be refitted")
+        if dataset_delta[LANGUAGE] != self.featurizer.language:
+            raise ValueError("Expected a dataset in '%s' but received one in "
+                             "'%s'" % (self.featurizer.language,
+                                       dataset_delta[LANGUAGE]))
+        unknown_intents = [
+            intent for intent in dataset_delta[INTENTS]
+            if intent not in self.intent_list]
+        if unknown_intents:
+            raise ValueError("New intents require a full retraining: %s"
+                             % sorted(unknown_intents))
+
+        utterances = []
+        classes = []
+        for intent, intent_data in iteritems(dataset_delta[INTENTS]):
+            utterances += intent_data[UTTERANCES]
+            classes += [self.intent_list.index(intent)
+                        for _ in intent_data[UTTERANCES]]
+
+        nb_added_features = self.featurizer.update(dataset_delta, utterances)
+        if nb_added_features:
+            self.classifier.coef_ = np.hstack([
+                self.classifier.coef_,
+                np.zeros((self.classifier.coef_.shape[0], nb_added_features))
+            ])
+
+        if utterances:
+            replayed_utterances = [s["utterance"] for s in self.replay_buffer]
+            replayed_classes = [s["class"] for s in self.replay_buffer]
+            # pylint: disable=C0103
+            X = self.featurizer.transform(
+                utterances + replayed_utterances,
+                n_jobs=self.featurizer.config.n_jobs)
+            # pylint: enable=C0103
+            y = np.array(classes + replayed_classes)
+            self._partial_fit(X, y, n_epochs)
+
+        self.drift_stats["nb_updates"] += 1
+        self.drift_stats["nb_added_features"] += nb_added_features
+        self.drift_stats["replay_accuracy"] = self._get_replay_accuracy()
+        self._add_to_replay_buffer(utterances, classes)
+        if self.needs_retrain:
+            logger.warning("The intent classifier has drifted from its "
+                           "original training, a full retraining is advised: "
+                           "%s", self.drift_stats)
         return self
 
+    @property
+    def needs_retrain(self):
+        """Whether or not the incremental updates have drifted enough from
+        the original training to warrant a full retraining"""
+        stats = self.drift_stats
+        if not stats or not stats["nb_updates"]:
+            return False
+        updated_ratio = stats["nb_updated_utterances"] / \
+            max(stats["nb_fitted_utterances"], 1)
+        added_features_ratio = stats["nb_added_features"] / \
+            max(stats["nb_fitted_features"], 1)
+        accuracy_drop = 0.0
+        if stats["fitted_replay_accuracy"] is not None:
+            accuracy_drop = stats["fitted_replay_accuracy"] - \
+                stats["replay_accuracy"]
+        return updated_ratio > MAX_UPDATED_UTTERANCES_RATIO \
+            or added_features_ratio > MAX_ADDED_FEATURES_RATIO \
+            or accuracy_drop > MAX_REPLAY_ACCURACY_DROP
+
+    def _partial_fit(self, X, y, n_epochs):  # pylint: disable=C0103
+        # The 'balanced' class weights are not supported by partial_fit, so
+        # they are computed explicitly on the update batch
+        present_classes = np.unique(y)
+        class_weights = compute_class_weight(
+            "balanced", classes=present_classes, y=y)
+        self.classifier.class_weight = {
+            int(c): w for c, w in zip(present_classes, class_weights)}
+        all_classes = np.arange(len(self.intent_list))
+        try:
+            for _ in range(n_epochs):
+                self.classifier.partial_fit(X, y, classes=all_classes)
+        finally:
+            self.classifier.class_weight = LOG_REG_ARGS["class_weight"]
+
+    def _get_replay_accuracy(self):
+        if not self.replay_buffer:
+            return None
+        # pylint: disable=C0103
+        X = self.featurizer.transform(
+            [s["utterance"] for s in self.replay_buffer])
+        # pylint: enable=C0103
+        scores = self.classifier.decision_function(X)
+        if scores.ndim == 1:
+            predictions = (scores > 0).astype(int)
+        else:
+            predictions = np.argmax(scores, axis=1)
+        classes = np.array([s["class"] for s in self.replay_buffer])
+        return float(np.mean(predictions == classes))
+
+    def _add_to_replay_buffer(self, utterances, classes):
+        # Reservoir sampling, so that the replay buffer remains a uniform
+        # sample of all the utterances seen so far
+        nb_seen = self.drift_stats["nb_fitted_utterances"] + \
+            self.drift_stats["nb_updated_utterances"]
+        if self._random_state is None:
+            self._random_state = check_random_state(self.config.random_seed)
+        for utterance, intent_class in zip(utterances, classes):
+            nb_seen += 1
+            if len(self.replay_buffer) < self.config.replay_buffer_size:
+                self.replay_buffer.append(
+                    {"utterance": utterance, "class": intent_class})
+                continue
+            index = self._random_state.randint(nb_seen)
+            if index < len(self.replay_buffer):
+                self.replay_buffer[index] = {
+                    "utterance": utterance, "class": intent_class}
+        self.drift_stats["nb_updated_utterances"] += len(utterances)
+
+    @fitted_required
+    def get_used_builtin_entities(self):
+        """Builtin entities whose features are part of the vocabulary of the
+        featurizer"""
+        if self.featurizer is None:
+            return set()
+        return self.featurizer.get_used_builtin_entities()
+
     @fitted_required
     def get_intent(self, text, intents_filter=None):
         """Performs intent classification on the provided *text*
@@ -127,7 +319,46 @@ class LogRegIntentClassifier(IntentClassifier):
         X = self.featurizer.transform([text_to_utterance(text)])
         # pylint: enable=C0103
         proba_vec = self._predict_proba(X, intents_filter=intents_filter)
-        intents_probas = sorted(zip(self.intent_list, proba_vec[0]),
+        return self._get_most_likely_intent(proba_vec[0], intents_filter)
+
+    @fitted_required
+    def get_intent_batch(self, texts, intents_filter=None):
+        """Performs intent classification on several *texts* at once
+
+        The texts are featurized and classified in a single pass, which is
+        much faster than calling :func:`get_intent` on each of them.
+
+        Returns:
+            list of dict or None: The result of :func:`get_intent` for each
+            text
+
+        Raises:
+            NotTrained: When the intent classifier is not fitted
+        """
+        if isinstance(intents_filter, str):
+            intents_filter = [intents_filter]
+
+        if len(self.intent_list) <= 1 \
+                or self.featurizer is None or self.classifier is None:
+            return [self.get_intent(text, intents_filter) for text in texts]
+
+        results = [None] * len(texts)
+        indexes = [i for i, text in enumerate(texts) if text]
+        if not indexes:
+            return results
+
+        # pylint: disable=C0103
+        X = self.featurizer.transform(
+            [text_to_utterance(texts[i]) for i in indexes])
+        # pylint: enable=C0103
+        probas = self._predict_proba(X, intents_filter=intents_filter)
+        for i, proba_vec in zip(indexes, probas):
+            results[i] = self._get_most_likely_intent(proba_vec,
+                                                      intents_filter)
+        return results
+
+    def _get_most_likely_intent(self, proba_vec, intents_filter):
+        intents_probas = sorted(zip(self.intent_list, proba_vec),
                                 key=lambda p: -p[1])
         for intent, proba in intents_probas:
             if intent is None:
@@ -136,6 +367,52 @@ class LogRegIntentClassifier(IntentClassifier):
                 return intent_classification_result(intent, proba)
         return None
 
+    @fitted_required
+    def get_intents(self, text, intents_filter=None):
+        """Performs intent classification on the provided *text* and returns
+        the list of all intents sorted by decreasing probability
+
+        All the probabilities are obtained with a single featurization and
+        prediction, and the *None* intent is part of the list. The
+        probabilities are the ones of :func:`get_intent`, so that the first
+        intent is the one it returns, unless the *None* intent comes first.
+
+        Args:
+            text (str): Input
+            intents_filter (str or list of str): When defined, the
+                probabilities are normalized over these intents and the other
+                ones are left out of the list
+
+        Returns:
+            list of dict: The list of intents along with their probability,
+            which is empty when no intent can be found
+
+        Raises:
+            NotTrained: When the intent classifier is not fitted
+        """
+        if isinstance(intents_filter, str):
+            intents_filter = [intents_filter]
+
+        if not text or not self.intent_list \
+                or self.featurizer is None or self.classifier is None:
+            return []
+
+        if len(self.intent_list) == 1:
+            if self.intent_list[0] is None:
+                return []
+            return [intent_classification_result(self.intent_list[0], 1.0)]
+
+        # pylint: disable=C0103
+        X = self.featurizer.transform([text_to_utterance(text)])
+        # pylint: enable=C0103
+        proba_vec = self._predict_proba(X, intents_filter=intents_filter)
+        intents_probas = sorted(zip(self.intent_list, proba_vec[0]),
+                                key=lambda p: -p[1])
+        return [intent_classification_result(intent, proba)
+                for intent, proba in intents_probas
+                if intents_filter is None or intent is None
+                or intent in intents_filter]
+
     def _predict_proba(self, X, intents_filter):  # pylint: disable=C0103
         self.classifier._check_proba()  # pylint: disable=W0212
 
@@ -211,6 +488,8 @@ class LogRegIntentClassifier(IntentClassifier):
         featurizer = unit_dict['featurizer']
         if featurizer is not None:
             intent_classifier.featurizer = Featurizer.from_dict(featurizer)
+        intent_classifier.replay_buffer = unit_dict.get("replay_buffer")
+        intent_classifier.drift_stats = unit_dict.get("drift_stats")
         return intent_classifier
 
     def to_dict(self):
@@ -233,15 +512,21 @@ class LogRegIntentClassifier(IntentClassifier):
             "t_": t_,
             "intent_list": self.intent_list,
             "featurizer": featurizer_dict,
+            "replay_buffer": self.replay_buffer,
+            "drift_stats": self.drift_stats,
         }
 
     def log_best_features(self, top_n=20):
         log = "Top {} features weights by intent:\n".format(top_n)
-        voca = {
-            v: k for k, v in
-            iteritems(self.featurizer.tfidf_vectorizer.vocabulary_)
-        }
-        features = [voca[i] for i in self.featurizer.best_features]
+        vocabulary = getattr(
+            self.featurizer.tfidf_vectorizer, "vocabulary_", None)
+        if vocabulary is not None:
+            voca = {v: k for k, v in iteritems(vocabulary)}
+            features = [voca[i] for i in self.featurizer.best_features]
+        else:
+            # Hashed features cannot be mapped back to the original n-grams
+            features = ["hashed_feature_%s" % i
+                        for i in self.featurizer.best_features]
         for intent_ix in range(self.classifier.coef_.shape[0]):
             intent_name = self.intent_list[intent_ix]
             log += "\n\n\nFor intent {}\n".format(intent_name)
@@ -1,18 +1,22 @@
-from __future__ import unicode_literals
+from __future__ import division, unicode_literals
 
 import json
 import logging
 import re
-from builtins import str
+from builtins import range, str
+from bisect import bisect_left, bisect_right
+from collections import deque
 from pathlib import Path
+from threading import Lock
 
-from future.utils import iteritems
+from future.utils import iteritems, itervalues
 
 from snips_nlu.builtin_entities import (get_builtin_entities,
                                         is_builtin_entity)
 from snips_nlu.constants import (
     DATA, END, ENTITIES, ENTITY, ENTITY_KIND, INTENTS, LANGUAGE,
-    RES_MATCH_RANGE, RES_VALUE, SLOT_NAME, START, TEXT, UTTERANCES)
+    RES_INTENT_NAME, RES_MATCH_RANGE, RES_SLOTS, RES_VALUE, SLOT_NAME, START,
+    TEXT, UTTERANCES)
 from snips_nlu.dataset import validate_and_format_dataset
 from snips_nlu.intent_parser.intent_parser import IntentParser
 from snips_nlu.pipeline.configs import DeterministicIntentParserConfig
@@ -21,8 +25,8 @@ from snips_nlu.result import (
     empty_result, intent_classification_result, parsing_result,
     unresolved_slot)
 from snips_nlu.utils import (
-    check_persisted_path, fitted_required, get_slot_name_mappings, json_string,
-    log_elapsed_time, log_result, ranges_overlap, regex_escape)
+    LRUCache, check_persisted_path, fitted_required, get_slot_name_mappings,
+    json_string, log_elapsed_time, log_result, ranges_overlap, regex_escape)
 
 GROUP_NAME_PREFIX = "group"
 GROUP_NAME_SEPARATOR = "_"
@@ -37,6 +41,20 @@ class DeterministicIntentParser(IntentParser):
     This intent parser is very strict by nature, and tends to have a very good
     precision but a low recall. For this reason, it is interesting to use it
     first before potentially falling back to another parser.
+
+    The training utterances matched by the patterns are also indexed by their
+    normalized text, so that the queries which are copies of them are parsed
+    with a single lookup, before trying any pattern. The hits and misses of
+    this index are reported in :attr:`exact_match_stats`.
+
+    The other queries are only matched against the patterns which may match
+    them: each pattern is anchored by one of the literal tokens it requires,
+    and the patterns whose anchor does not occur in the query are skipped.
+
+    The patterns of an intent are only compiled the first time they are
+    used, the number of intents whose patterns are kept compiled being bounded
+    by the ``regex_cache_size`` of the config. They can be compiled
+    beforehand with :func:`warmup`.
     """
 
     unit_name = "deterministic_intent_parser"
@@ -49,31 +67,88 @@ class DeterministicIntentParser(IntentParser):
             config = self.config_type()
         super(DeterministicIntentParser, self).__init__(config)
         self.language = None
-        self.regexes_per_intent = None
+        self._patterns_per_intent = None
+        self._regexes_cache = None
         self.group_names_to_slot_names = None
         self.slot_names_to_entities = None
+        self.exact_matches = None
+        self._anchors_per_intent = None
+        self._prefilter = None
+        self._exact_match_stats_lock = Lock()
+        self._exact_match_hits = 0
+        self._exact_match_misses = 0
 
     @property
     def patterns(self):
         """Dictionary of patterns per intent"""
-        if self.regexes_per_intent is not None:
-            return {i: [r.pattern for r in regex_list] for i, regex_list in
-                    iteritems(self.regexes_per_intent)}
-        return None
+        return self._patterns_per_intent
 
     @patterns.setter
     def patterns(self, value):
+        self._patterns_per_intent = value
+        self._regexes_cache = None
         if value is not None:
-            self.regexes_per_intent = dict()
-            for intent, pattern_list in iteritems(value):
-                regexes = [re.compile(r"%s" % p, re.IGNORECASE)
-                           for p in pattern_list]
-                self.regexes_per_intent[intent] = regexes
+            cache_size = self.config.regex_cache_size
+            if cache_size is None:
+                cache_size = max(len(value), 1)
+            self._regexes_cache = LRUCache(cache_size)
+        self._prefilter = None
+
+    @property
+    def regexes_per_intent(self):
+        """Dictionary of compiled patterns per intent
+
+        Accessing it compiles the patterns of all the intents.
+        """
+        if self._patterns_per_intent is None:
+            return None
+        return {intent: self._get_regexes(intent)
+                for intent in self._patterns_per_intent}
+
+    def _get_regexes(self, intent):
+        regexes = self._regexes_cache.get(intent)
+        if regexes is None:
+            regexes = [re.compile(p, re.IGNORECASE)
+                       for p in self._patterns_per_intent[intent]]
+            self._regexes_cache.put(intent, regexes)
+        return regexes
+
+    @property
+    def anchors_per_intent(self):
+        """Dictionary of the anchors of the patterns per intent
+
+        The anchor of a pattern is the longest literal token it requires, in
+        lowercase, or *None* when it only contains slots.
+        """
+        return self._anchors_per_intent
+
+    @anchors_per_intent.setter
+    def anchors_per_intent(self, value):
+        self._anchors_per_intent = value
+        self._prefilter = None
 
     @property
     def fitted(self):
         """Whether or not the intent parser has already been trained"""
-        return self.regexes_per_intent is not None
+        return self._patterns_per_intent is not None
+
+    @property
+    def exact_match_stats(self):
+        """dict: Number of hits and misses of the exact match index, along with
+        the hit rate"""
+        with self._exact_match_stats_lock:
+            lookups = self._exact_match_hits + self._exact_match_misses
+            return {
+                "hits": self._exact_match_hits,
+                "misses": self._exact_match_misses,
+                "hit_rate": self._exact_match_hits / lookups
+                if lookups else 0.0
+            }
+
+    def reset_exact_match_stats(self):
+        with self._exact_match_stats_lock:
+            self._exact_match_hits = 0
+            self._exact_match_misses = 0
 
     @log_elapsed_time(
         logger, logging.INFO, "Fitted deterministic parser in {elapsed_time}")
@@ -82,23 +157,87 @@ class DeterministicIntentParser(IntentParser):
         logger.info("Fitting deterministic parser...")
         dataset = validate_and_format_dataset(dataset)
         self.language = dataset[LANGUAGE]
-        self.regexes_per_intent = dict()
+        patterns_per_intent = dict()
+        self.anchors_per_intent = dict()
         self.group_names_to_slot_names = dict()
         joined_entity_utterances = _get_joined_entity_utterances(
             dataset, self.language)
         self.slot_names_to_entities = get_slot_name_mappings(dataset)
         for intent_name, intent in iteritems(dataset[INTENTS]):
             utterances = intent[UTTERANCES]
-            patterns, self.group_names_to_slot_names = _generate_patterns(
-                utterances, joined_entity_utterances,
-                self.group_names_to_slot_names, self.language)
+            patterns, patterns_anchors, self.group_names_to_slot_names = \
+                _generate_patterns(utterances, joined_entity_utterances,
+                                   self.group_names_to_slot_names,
+                                   self.language)
             patterns = [p for p in patterns
                         if len(p) < self.config.max_pattern_length]
             patterns = patterns[:self.config.max_queries]
-            regexes = [re.compile(p, re.IGNORECASE) for p in patterns]
-            self.regexes_per_intent[intent_name] = regexes
+            patterns_per_intent[intent_name] = patterns
+            self.anchors_per_intent[intent_name] = [
+                patterns_anchors.get(p) for p in patterns]
+        self.patterns = patterns_per_intent
+        self.exact_matches = self._build_exact_matches(dataset)
         return self
 
+    def _build_exact_matches(self, dataset):
+        """Indexes the training utterances matched by the patterns of their
+        intent by their normalized text, in which builtin slots are replaced
+        by placeholders
+
+        Each entry maps to the intent of the utterance and to its slots, given
+        as ranges of tokens. The texts shared by utterances having different
+        intents or different slots are left out of the index, and thus are
+        still parsed with the patterns.
+        """
+        exact_matches = dict()
+        ambiguous_keys = set()
+        for intent_name, intent in iteritems(dataset[INTENTS]):
+            prefilter = _PatternsPrefilter(
+                {intent_name: self.patterns[intent_name]},
+                {intent_name: self.anchors_per_intent[intent_name]})
+            for utterance in intent[UTTERANCES]:
+                processed_text, slot_ranges = _get_processed_utterance(
+                    utterance, self.language)
+                cleaned_text = _replace_tokenized_out_characters(
+                    processed_text, self.language)
+                candidates = prefilter.get_candidates([cleaned_text])
+                regexes = self._get_regexes(intent_name) if candidates else []
+                if not any(regexes[i].match(cleaned_text)
+                           for _, i in candidates):
+                    continue
+                tokens = tokenize(processed_text, self.language)
+                slots = _get_slots_token_ranges(tokens, slot_ranges)
+                if slots is None:
+                    continue
+                key = _get_exact_match_key(tokens)
+                exact_match = {RES_INTENT_NAME: intent_name, RES_SLOTS: slots}
+                if key in exact_matches and exact_matches[key] != exact_match:
+                    ambiguous_keys.add(key)
+                exact_matches[key] = exact_match
+        for key in ambiguous_keys:
+            del exact_matches[key]
+        return exact_matches
+
+    @fitted_required
+    def warmup(self):
+        """Compiles the patterns of as many intents as the regexes cache can
+        hold, see ``regex_cache_size``, and builds the prefilter of the
+        patterns"""
+        if self._prefilter is None:
+            self._prefilter = _PatternsPrefilter(self.patterns,
+                                                 self.anchors_per_intent)
+        intents = sorted(self.patterns)[:self._regexes_cache.size_limit]
+        for intent in intents:
+            self._get_regexes(intent)
+
+    @fitted_required
+    def get_used_builtin_entities(self):
+        """Builtin entities of the slots, which the patterns match through
+        their placeholders"""
+        return set(
+            entity for mapping in itervalues(self.slot_names_to_entities)
+            for entity in itervalues(mapping) if is_builtin_entity(entity))
+
     @log_result(
         logger, logging.DEBUG, "DeterministicIntentParser result -> {result}")
     @log_elapsed_time(logger, logging.DEBUG, "Parsed in {elapsed_time}.")
@@ -128,23 +267,33 @@ class DeterministicIntentParser(IntentParser):
         ranges_mapping, processed_text = _replace_builtin_entities(
             text, self.language)
 
+        res = self._get_exact_match_result(
+            text, processed_text, intents, ranges_mapping)
+        if res is not None:
+            return res
+
         # We try to match both the input text and the preprocessed text to
         # cover inconsistencies between labeled data and builtin entity parsing
         cleaned_text = _replace_tokenized_out_characters(text, self.language)
         cleaned_processed_text = _replace_tokenized_out_characters(
             processed_text, self.language)
 
-        for intent, regexes in iteritems(self.regexes_per_intent):
+        if self._prefilter is None:
+            self._prefilter = _PatternsPrefilter(self.patterns,
+                                                 self.anchors_per_intent)
+        candidates = self._prefilter.get_candidates(
+            [cleaned_processed_text, cleaned_text])
+        for intent, pattern_index in candidates:
             if intents is not None and intent not in intents:
                 continue
-            for regex in regexes:
-                res = self._get_matching_result(text, cleaned_processed_text,
-                                                regex, intent, ranges_mapping)
-                if res is None:
-                    res = self._get_matching_result(text, cleaned_text, regex,
-                                                    intent)
-                if res is not None:
-                    return res
+            regex = self._get_regexes(intent)[pattern_index]
+            res = self._get_matching_result(text, cleaned_processed_text,
+                                            regex, intent, ranges_mapping)
+            if res is None:
+                res = self._get_matching_result(text, cleaned_text, regex,
+                                                intent)
+            if res is not None:
+                return res
         return empty_result(text)
 
     def _get_matching_result(self, text, processed_text, regex, intent,
@@ -157,29 +306,61 @@ class DeterministicIntentParser(IntentParser):
         slots = []
         for group_name in found_result.groupdict():
             slot_name = self.group_names_to_slot_names[group_name]
-            entity = self.slot_names_to_entities[intent][slot_name]
             rng = (found_result.start(group_name),
                    found_result.end(group_name))
-            if builtin_entities_ranges_mapping is not None:
-                if rng in builtin_entities_ranges_mapping:
-                    rng = builtin_entities_ranges_mapping[rng]
-                else:
-                    shift = _get_range_shift(
-                        rng, builtin_entities_ranges_mapping)
-                    rng = {START: rng[0] + shift, END: rng[1] + shift}
-            else:
-                rng = {START: rng[0], END: rng[1]}
-            value = text[rng[START]:rng[END]]
-            parsed_slot = unresolved_slot(
-                match_range=rng, value=value, entity=entity,
-                slot_name=slot_name)
-            slots.append(parsed_slot)
+            slots.append(self._get_slot(text, intent, slot_name, rng,
+                                        builtin_entities_ranges_mapping))
         parsed_slots = _deduplicate_overlapping_slots(
             slots, self.language)
         parsed_slots = sorted(parsed_slots,
                               key=lambda s: s[RES_MATCH_RANGE][START])
         return parsing_result(text, parsed_intent, parsed_slots)
 
+    def _get_exact_match_result(self, text, processed_text, intents,
+                                builtin_entities_ranges_mapping):
+        if not self.exact_matches:
+            return None
+        # As with the patterns, the input text is looked up as well, to cover
+        # inconsistencies between labeled data and builtin entity parsing
+        candidates = [(processed_text, builtin_entities_ranges_mapping)]
+        if builtin_entities_ranges_mapping:
+            candidates.append((text, None))
+        exact_match = None
+        for candidate_text, ranges_mapping in candidates:
+            tokens = tokenize(candidate_text, self.language)
+            exact_match = self.exact_matches.get(_get_exact_match_key(tokens))
+            if exact_match is not None and intents is not None \
+                    and exact_match[RES_INTENT_NAME] not in intents:
+                exact_match = None
+            if exact_match is not None:
+                break
+        with self._exact_match_stats_lock:
+            if exact_match is None:
+                self._exact_match_misses += 1
+                return None
+            self._exact_match_hits += 1
+
+        intent = exact_match[RES_INTENT_NAME]
+        parsed_intent = intent_classification_result(intent_name=intent,
+                                                     probability=1.0)
+        parsed_slots = []
+        for slot in exact_match[RES_SLOTS]:
+            rng = (tokens[slot[START]].start, tokens[slot[END] - 1].end)
+            parsed_slots.append(self._get_slot(
+                text, intent, slot[SLOT_NAME], rng, ranges_mapping))
+        return parsing_result(text, parsed_intent, parsed_slots)
+
+    def _get_slot(self, text, intent, slot_name, rng,
+                  builtin_entities_ranges_mapping):
+        entity = self.slot_names_to_entities[intent][slot_name]
+        if builtin_entities_ranges_mapping is not None:
+            rng = builtin_entities_ranges_mapping.get_original_range(rng)
+        else:
+            rng = {START: rng[0], END: rng[1]}
+        value = text[rng[START]:rng[END]]
+        return unresolved_slot(match_range=rng, value=value, entity=entity,
+                               slot_name=slot_name)
+
     @check_persisted_path
     def persist(self, path):
         """Persist the object at the given path"""
@@ -215,8 +396,10 @@ class DeterministicIntentParser(IntentParser):
             "config": self.config.to_dict(),
             "language_code": self.language,
             "patterns": self.patterns,
+            "anchors_per_intent": self.anchors_per_intent,
             "group_names_to_slot_names": self.group_names_to_slot_names,
-            "slot_names_to_entities": self.slot_names_to_entities
+            "slot_names_to_entities": self.slot_names_to_entities,
+            "exact_matches": self.exact_matches
         }
 
     @classmethod
@@ -229,10 +412,15 @@ class DeterministicIntentParser(IntentParser):
         config = cls.config_type.from_dict(unit_dict["config"])
         parser = cls(config=config)
         parser.patterns = unit_dict["patterns"]
+        # The patterns of parsers persisted without anchors are all tried
+        parser.anchors_per_intent = unit_dict.get("anchors_per_intent")
         parser.language = unit_dict["language_code"]
         parser.group_names_to_slot_names = unit_dict[
             "group_names_to_slot_names"]
         parser.slot_names_to_entities = unit_dict["slot_names_to_entities"]
+        # Parsers persisted before the introduction of the exact match index
+        # only use their patterns
+        parser.exact_matches = unit_dict.get("exact_matches")
         return parser
 
 
@@ -250,50 +438,62 @@ def _replace_tokenized_out_characters(string, language, replacement_char=" "):
     """
     tokens = tokenize(string, language)
     current_idx = 0
-    cleaned_string = ""
+    cleaned_chunks = []
     for token in tokens:
-        prefix_length = token.start - current_idx
-        cleaned_string += "".join(
-            (replacement_char for _ in range(prefix_length)))
-        cleaned_string += token.value
+        cleaned_chunks.append(replacement_char * (token.start - current_idx))
+        cleaned_chunks.append(token.value)
         current_idx = token.end
-    suffix_length = len(string) - current_idx
-    cleaned_string += "".join((replacement_char for _ in range(suffix_length)))
-    return cleaned_string
+    cleaned_chunks.append(replacement_char * (len(string) - current_idx))
+    return "".join(cleaned_chunks)
 
 
-def _get_range_shift(matched_range, ranges_mapping):
-    shift = 0
-    previous_replaced_range_end = None
-    matched_start = matched_range[0]
-    for replaced_range, orig_range in iteritems(ranges_mapping):
-        if replaced_range[1] <= matched_start:
-            if previous_replaced_range_end is None \
-                    or replaced_range[1] > previous_replaced_range_end:
-                previous_replaced_range_end = replaced_range[1]
-                shift = orig_range[END] - replaced_range[1]
-    return shift
+class _RangesMapping(dict):
+    """Mapping of the ranges of the builtin entities placeholders in a
+    processed text to the ranges of the builtin entities in the original text
 
+    The replaced ranges are also kept sorted along with the shifts they
+    induce, so that any range of the processed text is mapped back to the
+    original text with a binary search.
+    """
 
-def _get_index(index):
-    split = index.split(GROUP_NAME_SEPARATOR)
-    if len(split) != 2 or split[0] != GROUP_NAME_PREFIX:
-        raise ValueError("Misformatted index")
-    return int(split[1])
+    def __init__(self, *args, **kwargs):
+        super(_RangesMapping, self).__init__(*args, **kwargs)
+        replaced_ranges = sorted(self, key=lambda rng: rng[1])
+        self._replaced_starts = [rng[0] for rng in replaced_ranges]
+        self._replaced_ends = [rng[1] for rng in replaced_ranges]
+        self._shifts = [self[rng][END] - rng[1] for rng in replaced_ranges]
+
+    def get_shift(self, position):
+        """Returns the shift to apply to *position* to get the corresponding
+        position in the original text, which is induced by the last replaced
+        range ending before *position*"""
+        index = bisect_right(self._replaced_ends, position) - 1
+        return self._shifts[index] if index >= 0 else 0
+
+    def get_original_range(self, rng):
+        """Maps the range *rng* of the processed text to the original text
+
+        A range within the placeholder of a builtin entity, which may only be
+        partially covered when some of its characters are tokenized out, is
+        mapped to the range of the builtin entity.
+        """
+        index = bisect_left(self._replaced_ends, rng[1])
+        if index < len(self._replaced_ends) \
+                and self._replaced_starts[index] <= rng[0]:
+            return self[(self._replaced_starts[index],
+                         self._replaced_ends[index])]
+        shift = self.get_shift(rng[0])
+        return {START: rng[0] + shift, END: rng[1] + shift}
 
 
-def _make_index(i):
-    return "%s%s%s" % (GROUP_NAME_PREFIX, GROUP_NAME_SEPARATOR, i)
+def _get_range_shift(matched_range, ranges_mapping):
+    if not isinstance(ranges_mapping, _RangesMapping):
+        ranges_mapping = _RangesMapping(ranges_mapping)
+    return ranges_mapping.get_shift(matched_range[0])
 
 
-def _generate_new_index(slots_name_to_labels):
-    if not slots_name_to_labels:
-        index = _make_index(0)
-    else:
-        max_index = max(slots_name_to_labels, key=_get_index)
-        max_index = _get_index(max_index) + 1
-        index = _make_index(max_index)
-    return index
+def _make_index(i):
+    return "%s%s%s" % (GROUP_NAME_PREFIX, GROUP_NAME_SEPARATOR, i)
 
 
 def _query_to_pattern(query, joined_entity_utterances,
@@ -301,12 +501,14 @@ def _query_to_pattern(query, joined_entity_utterances,
     pattern = []
     for chunk in query[DATA]:
         if SLOT_NAME in chunk:
-            max_index = _generate_new_index(group_names_to_slot_names)
+            # Groups are numbered sequentially from 0, hence the number of
+            # groups allocated so far is the index of the next one
+            group_name = _make_index(len(group_names_to_slot_names))
             slot_name = chunk[SLOT_NAME]
             entity = chunk[ENTITY]
-            group_names_to_slot_names[max_index] = slot_name
+            group_names_to_slot_names[group_name] = slot_name
             pattern.append(
-                r"(?P<%s>%s)" % (max_index, joined_entity_utterances[entity]))
+                r"(?P<%s>%s)" % (group_name, joined_entity_utterances[entity]))
         else:
             tokens = tokenize_light(chunk[TEXT], language)
             pattern += [regex_escape(t) for t in tokens]
@@ -317,6 +519,14 @@ def _query_to_pattern(query, joined_entity_utterances,
     return pattern, group_names_to_slot_names
 
 
+def _get_pattern_anchor(query, language):
+    literals = [t.lower() for chunk in query[DATA] if SLOT_NAME not in chunk
+                for t in tokenize_light(chunk[TEXT], language)]
+    if not literals:
+        return None
+    return max(literals, key=len)
+
+
 def _get_queries_with_unique_context(intent_queries, language):
     contexts = set()
     queries = []
@@ -340,11 +550,130 @@ def _generate_patterns(intent_queries, joined_entity_utterances,
     queries = _get_queries_with_unique_context(intent_queries, language)
     # Join all the entities utterances with a "|" to create the patterns
     patterns = set()
+    patterns_anchors = dict()
     for query in queries:
         pattern, group_names_to_labels = _query_to_pattern(
             query, joined_entity_utterances, group_names_to_labels, language)
         patterns.add(pattern)
-    return list(patterns), group_names_to_labels
+        patterns_anchors[pattern] = _get_pattern_anchor(query, language)
+    return list(patterns), patterns_anchors, group_names_to_labels
+
+
+class _PatternsPrefilter(object):
+    """Selects the patterns whose anchor occurs in a text, without compiling
+    them
+
+    The anchors are searched with an Aho-Corasick automaton, in a single scan
+    of the text whatever the number of patterns. The candidate patterns are
+    returned in the order in which the intent parser would try them.
+    """
+
+    def __init__(self, patterns_per_intent, anchors_per_intent):
+        # Patterns are referred to by their intent and their index within the
+        # patterns of the intent
+        self.patterns = []
+        self.unanchored_patterns = []
+        self.patterns_per_anchor = dict()
+        for intent, patterns in iteritems(patterns_per_intent):
+            anchors = None
+            if anchors_per_intent is not None:
+                anchors = anchors_per_intent.get(intent)
+            for i in range(len(patterns)):
+                pattern_index = len(self.patterns)
+                self.patterns.append((intent, i))
+                anchor = anchors[i] if anchors is not None else None
+                if anchor is None:
+                    self.unanchored_patterns.append(pattern_index)
+                else:
+                    self.patterns_per_anchor.setdefault(anchor, []).append(
+                        pattern_index)
+        self._build_automaton(list(self.patterns_per_anchor))
+
+    def get_candidates(self, texts):
+        if not self.patterns_per_anchor:
+            return self.patterns
+        indexes = set(self.unanchored_patterns)
+        for text in texts:
+            for anchor in self._find_anchors(text.lower()):
+                indexes.update(self.patterns_per_anchor[anchor])
+        return [self.patterns[i] for i in sorted(indexes)]
+
+    def _build_automaton(self, anchors):
+        self._transitions = [dict()]
+        self._outputs = [[]]
+        for anchor in anchors:
+            state = 0
+            for char in anchor:
+                next_state = self._transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(self._transitions)
+                    self._transitions[state][char] = next_state
+                    self._transitions.append(dict())
+                    self._outputs.append([])
+                state = next_state
+            self._outputs[state].append(anchor)
+
+        # The failure link of a state points to the state of its longest
+        # proper suffix, whose outputs are also outputs of the state
+        self._failures = [0] * len(self._transitions)
+        queue = deque(itervalues(self._transitions[0]))
+        while queue:
+            state = queue.popleft()
+            for char, next_state in iteritems(self._transitions[state]):
+                failure = self._failures[state]
+                while failure and char not in self._transitions[failure]:
+                    failure = self._failures[failure]
+                failure = self._transitions[failure].get(char, 0)
+                self._failures[next_state] = failure
+                self._outputs[next_state] = self._outputs[next_state] + \
+                    self._outputs[failure]
+                queue.append(next_state)
+
+    def _find_anchors(self, text):
+        transitions = self._transitions
+        failures = self._failures
+        outputs = self._outputs
+        found_anchors = set()
+        state = 0
+        for char in text:
+            while state and char not in transitions[state]:
+                state = failures[state]
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                found_anchors.update(outputs[state])
+        return found_anchors
+
+
+def _get_processed_utterance(utterance, language):
+    processed_text = ""
+    slot_ranges = []
+    for chunk in utterance[DATA]:
+        chunk_text = chunk[TEXT]
+        if ENTITY in chunk and is_builtin_entity(chunk[ENTITY]):
+            chunk_text = _get_entity_name_placeholder(chunk[ENTITY], language)
+        if SLOT_NAME in chunk:
+            slot_ranges.append((len(processed_text),
+                                len(processed_text) + len(chunk_text),
+                                chunk[SLOT_NAME]))
+        processed_text += chunk_text
+    return processed_text, slot_ranges
+
+
+def _get_slots_token_ranges(tokens, slot_ranges):
+    slots = []
+    for slot_start, slot_end, slot_name in slot_ranges:
+        token_indexes = [i for i, token in enumerate(tokens)
+                         if slot_start <= token.start
+                         and token.end <= slot_end]
+        if not token_indexes:
+            return None
+        slots.append({START: token_indexes[0], END: token_indexes[-1] + 1,
+                      SLOT_NAME: slot_name})
+    return slots
+
+
+def _get_exact_match_key(tokens):
+    return " ".join(token.value.lower() for token in tokens)
 
 
 def _get_joined_entity_utterances(dataset, language):
@@ -370,37 +699,58 @@ def _get_joined_entity_utterances(dataset, language):
 
 
 def _deduplicate_overlapping_slots(slots, language):
+    if not _have_overlapping_ranges([s[RES_MATCH_RANGE] for s in slots]):
+        return list(slots)
     deduplicated_slots = []
+    # Number of tokens of each deduplicated slot, computed once per slot
+    deduplicated_nb_tokens = []
     for slot in slots:
         is_overlapping = False
+        nb_tokens = None
         for slot_index, dedup_slot in enumerate(deduplicated_slots):
             if ranges_overlap(slot[RES_MATCH_RANGE],
                               dedup_slot[RES_MATCH_RANGE]):
                 is_overlapping = True
-                tokens = tokenize(slot[RES_VALUE], language)
-                dedup_tokens = tokenize(dedup_slot[RES_VALUE], language)
-                if len(tokens) > len(dedup_tokens):
-                    deduplicated_slots[slot_index] = slot
-                elif len(tokens) == len(dedup_tokens) \
-                        and len(slot[RES_VALUE]) > len(dedup_slot[RES_VALUE]):
+                if nb_tokens is None:
+                    nb_tokens = len(tokenize(slot[RES_VALUE], language))
+                dedup_nb_tokens = deduplicated_nb_tokens[slot_index]
+                if nb_tokens > dedup_nb_tokens \
+                        or (nb_tokens == dedup_nb_tokens and
+                            len(slot[RES_VALUE]) > len(dedup_slot[RES_VALUE])):
                     deduplicated_slots[slot_index] = slot
+                    deduplicated_nb_tokens[slot_index] = nb_tokens
         if not is_overlapping:
             deduplicated_slots.append(slot)
+            deduplicated_nb_tokens.append(
+                len(tokenize(slot[RES_VALUE], language)))
     return deduplicated_slots
 
 
+def _have_overlapping_ranges(ranges):
+    ranges = sorted(ranges, key=lambda rng: rng[START])
+    return any(previous_range[END] > rng[START]
+               for previous_range, rng in zip(ranges, ranges[1:]))
+
+
+_ENTITY_NAME_PLACEHOLDERS = dict()
+
+
 def _get_entity_name_placeholder(entity_label, language):
-    return "%%%s%%" % "".join(
-        tokenize_light(entity_label, language)).upper()
+    placeholder = _ENTITY_NAME_PLACEHOLDERS.get((entity_label, language))
+    if placeholder is None:
+        placeholder = "%%%s%%" % "".join(
+            tokenize_light(entity_label, language)).upper()
+        _ENTITY_NAME_PLACEHOLDERS[(entity_label, language)] = placeholder
+    return placeholder
 
 
 def _replace_builtin_entities(text, language):
     builtin_entities = get_builtin_entities(text, language, use_cache=True)
     if not builtin_entities:
-        return dict(), text
+        return _RangesMapping(), text
 
     range_mapping = dict()
-    processed_text = ""
+    processed_chunks = []
     offset = 0
     current_ix = 0
     builtin_entities = sorted(builtin_entities,
@@ -410,7 +760,7 @@ def _replace_builtin_entities(text, language):
         ent_end = ent[RES_MATCH_RANGE][END]
         rng_start = ent_start + offset
 
-        processed_text += text[current_ix:ent_start]
+        processed_chunks.append(text[current_ix:ent_start])
 
         entity_length = ent_end - ent_start
         entity_place_holder = _get_entity_name_placeholder(ent[ENTITY_KIND],
@@ -418,11 +768,11 @@ def _replace_builtin_entities(text, language):
 
         offset += len(entity_place_holder) - entity_length
 
-        processed_text += entity_place_holder
+        processed_chunks.append(entity_place_holder)
         rng_end = ent_end + offset
         new_range = (rng_start, rng_end)
         range_mapping[new_range] = ent[RES_MATCH_RANGE]
         current_ix = ent_end
 
-    processed_text += text[current_ix:]
-    return range_mapping, processed_text
+    processed_chunks.append(text[current_ix:])
+    return _RangesMapping(range_mapping), "".join(processed_chunks)
@@ -3,6 +3,7 @@ from abc import ABCMeta, abstractmethod, abstractproperty
 from future.utils import with_metaclass
 
 from snips_nlu.pipeline.processing_unit import ProcessingUnit
+from snips_nlu.result import is_empty
 
 
 class IntentParser(with_metaclass(ABCMeta, ProcessingUnit)):
@@ -10,8 +11,16 @@ class IntentParser(with_metaclass(ABCMeta, ProcessingUnit)):
 
     A custom intent parser must inherit this class to be used in a
     :class:`.SnipsNLUEngine`
+
+    Attributes:
+        supports_slot_filling_degradation (bool): Whether or not the parser
+            only classifies the intent once the latency budget of the
+            parsing is exhausted, see :data:`.DEGRADATION_SLOT_FILLING`, in
+            which case the engine still calls it after this point
     """
 
+    supports_slot_filling_degradation = False
+
     @abstractmethod
     def fit(self, dataset, force_retrain):
         """Fit the intent parser with a valid Snips dataset
@@ -42,3 +51,61 @@ class IntentParser(with_metaclass(ABCMeta, ProcessingUnit)):
             :func:`.parsing_result` for the output format.
         """
         pass
+
+    def warmup(self):
+        """Eagerly initializes the components which would otherwise be
+        lazily initialized when parsing the first queries
+
+        By default, nothing is done.
+        """
+        pass
+
+    def close(self):
+        """Releases the resources, such as worker threads, which the parser
+        holds in order to parse
+
+        The parser can still be used afterwards. By default, nothing is done.
+        """
+        pass
+
+    def parse_batch(self, texts, intents=None):
+        """Performs intent parsing on several *texts* at once
+
+        By default, :func:`parse` is called on each text.
+
+        Args:
+            texts (list of str): Inputs
+            intents (str or list of str): If provided, reduces the scope of
+                intent parsing to the provided list of intents
+
+        Returns:
+            list of dict: The parsing result of each text. See
+            :func:`.parsing_result` for the output format.
+        """
+        return [self.parse(text, intents) for text in texts]
+
+    def parse_nbest(self, text, k, intents=None, n_jobs=1):
+        """Performs intent parsing on the provided *text* and returns up to
+        *k* results, sorted by decreasing likelihood, with distinct intents
+
+        By default, only the result of :func:`parse` is returned, if any.
+
+        Args:
+            text (str): Input
+            k (int): Maximum number of results to return
+            intents (str or list of str): If provided, reduces the scope of
+                intent parsing to the provided list of intents
+            n_jobs (int, optional): Number of threads which can be used to
+                extract the slots of the different intents
+
+        Returns:
+            list of dict: The list of parsing results. See
+            :func:`.parsing_result` for the output format.
+        """
+        # pylint: disable=unused-argument
+        if k < 1:
+            return []
+        res = self.parse(text, intents)
+        if is_empty(res):
+            return []
+        return [res]
@@ -2,20 +2,29 @@ from __future__ import unicode_literals
 
 import json
 import logging
-from builtins import str
+import os
+from builtins import str, zip
+from collections import defaultdict
 from copy import deepcopy
 from datetime import datetime
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
+from threading import Lock
 
 from future.utils import iteritems, itervalues
 
+from snips_nlu.builtin_entities import merge_required_builtin_entities
 from snips_nlu.constants import INTENTS, RES_INTENT_NAME
 from snips_nlu.dataset import validate_and_format_dataset
+from snips_nlu.deadline import DEGRADATION_SLOT_FILLING, should_degrade
 from snips_nlu.intent_parser.intent_parser import IntentParser
 from snips_nlu.pipeline.configs import ProbabilisticIntentParserConfig
 from snips_nlu.pipeline.processing_unit import (
     build_processing_unit, load_processing_unit)
+from snips_nlu.preprocessing import tokenize
 from snips_nlu.result import empty_result, parsing_result
+from snips_nlu.slot_filler.crf_slot_filler import (
+    CRFSlotFiller, TrainingFeaturesCache, get_features_cache)
 from snips_nlu.utils import (check_persisted_path, elapsed_since,
                              fitted_required, json_string, log_elapsed_time,
                              log_result)
@@ -29,6 +38,7 @@ class ProbabilisticIntentParser(IntentParser):
 
     unit_name = "probabilistic_intent_parser"
     config_type = ProbabilisticIntentParserConfig
+    supports_slot_filling_degradation = True
 
     # pylint:disable=line-too-long
     def __init__(self, config=None):
@@ -39,6 +49,9 @@ class ProbabilisticIntentParser(IntentParser):
         super(ProbabilisticIntentParser, self).__init__(config)
         self.intent_classifier = None
         self.slot_fillers = dict()
+        self._slots_pools = dict()
+        self._slots_pools_pid = None
+        self._slots_pools_lock = Lock()
 
     # pylint:enable=line-too-long
 
@@ -77,20 +90,45 @@ class ProbabilisticIntentParser(IntentParser):
         if self.slot_fillers is None:
             self.slot_fillers = dict()
         slot_fillers_start = datetime.now()
+        # The feature values which do not depend on the intent are computed
+        # once for all the slot fillers
+        training_features_cache = TrainingFeaturesCache()
         for intent_name in intents:
             # We need to copy the slot filler config as it may be mutated
             if self.slot_fillers.get(intent_name) is None:
                 slot_filler_config = deepcopy(self.config.slot_filler_config)
                 self.slot_fillers[intent_name] = build_processing_unit(
                     slot_filler_config)
-            if force_retrain or not self.slot_fillers[intent_name].fitted:
-                self.slot_fillers[intent_name].fit(dataset, intent_name)
+            slot_filler = self.slot_fillers[intent_name]
+            if not force_retrain and slot_filler.fitted:
+                continue
+            if isinstance(slot_filler, CRFSlotFiller):
+                slot_filler.fit(dataset, intent_name,
+                                training_features_cache=training_features_cache)
+            else:
+                slot_filler.fit(dataset, intent_name)
         logger.debug("Fitted slot fillers in %s",
                      elapsed_since(slot_fillers_start))
         return self
 
     # pylint:enable=arguments-differ
 
+    @fitted_required
+    def warmup(self):
+        """Warms up the slot filler of each intent"""
+        for slot_filler in itervalues(self.slot_fillers):
+            slot_filler.warmup()
+
+    @fitted_required
+    def get_used_builtin_entities(self):
+        """Builtin entities used by the intent classifier or by any of the
+        slot fillers"""
+        builtin_entities = self.intent_classifier.get_used_builtin_entities()
+        for slot_filler in itervalues(self.slot_fillers):
+            builtin_entities = merge_required_builtin_entities(
+                builtin_entities, slot_filler.get_used_builtin_entities())
+        return builtin_entities
+
     @log_result(logger, logging.DEBUG,
                 "ProbabilisticIntentParser result -> {result}")
     @log_elapsed_time(logger, logging.DEBUG,
@@ -121,10 +159,145 @@ class ProbabilisticIntentParser(IntentParser):
         if intent_result is None:
             return empty_result(text)
 
+        if should_degrade(DEGRADATION_SLOT_FILLING):
+            return parsing_result(text, intent_result, [])
+
         intent_name = intent_result[RES_INTENT_NAME]
         slots = self.slot_fillers[intent_name].get_slots(text)
         return parsing_result(text, intent_result, slots)
 
+    @log_elapsed_time(logger, logging.DEBUG,
+                      "ProbabilisticIntentParser parsed batch in "
+                      "{elapsed_time}")
+    @fitted_required
+    def parse_batch(self, texts, intents=None):
+        """Performs intent parsing on several *texts* at once
+
+        The intents of all the texts are classified in a single pass, see
+        :func:`.IntentClassifier.get_intent_batch`, before extracting the
+        slots of the texts of each intent together, see
+        :func:`.SlotFiller.get_slots_batch`.
+
+        Args:
+            texts (list of str): Inputs
+            intents (str or list of str): If provided, reduces the scope of
+                intent parsing to the provided list of intents
+
+        Returns:
+            list of dict: The parsing result of each text. See
+            :func:`.parsing_result` for the output format.
+
+        Raises:
+            NotTrained: When the intent parser is not fitted
+        """
+        if isinstance(intents, str):
+            intents = [intents]
+
+        intent_results = self.intent_classifier.get_intent_batch(texts,
+                                                                 intents)
+        results = [empty_result(text) for text in texts]
+        indexes_per_intent = defaultdict(list)
+        for i, intent_result in enumerate(intent_results):
+            if intent_result is not None:
+                indexes_per_intent[intent_result[RES_INTENT_NAME]].append(i)
+        for intent_name, indexes in iteritems(indexes_per_intent):
+            slots = self.slot_fillers[intent_name].get_slots_batch(
+                [texts[i] for i in indexes])
+            for i, text_slots in zip(indexes, slots):
+                results[i] = parsing_result(texts[i], intent_results[i],
+                                            text_slots)
+        return results
+
+    @log_elapsed_time(logger, logging.DEBUG,
+                      "ProbabilisticIntentParser parsed n-best in "
+                      "{elapsed_time}")
+    @fitted_required
+    def parse_nbest(self, text, k, intents=None, n_jobs=1):
+        """Performs intent parsing on the provided *text* and returns the *k*
+        most likely intents along with their slots
+
+        The probabilities of all intents are computed at once, and the slot
+        fillers of the *k* most likely intents share the tokenization and
+        the features of *text*. The intents less likely than the *None*
+        intent are left out, so that the first result is the one of
+        :func:`parse`.
+
+        Args:
+            text (str): Input
+            k (int): Maximum number of results to return
+            intents (str or list of str): If provided, reduces the scope of
+                intent parsing to the provided list of intents
+            n_jobs (int, optional): Number of threads used to extract the
+                slots of the different intents. These threads are reused by
+                the next calls until :func:`close` is called. Default is 1.
+
+        Returns:
+            list of dict: The list of parsing results sorted by decreasing
+            intent probability. See :func:`.parsing_result` for the output
+            format.
+
+        Raises:
+            NotTrained: When the intent parser is not fitted
+        """
+        if isinstance(intents, str):
+            intents = [intents]
+
+        intents_results = []
+        for res in self.intent_classifier.get_intents(text, intents):
+            if res[RES_INTENT_NAME] is None or len(intents_results) >= k:
+                break
+            if intents is None or res[RES_INTENT_NAME] in intents:
+                intents_results.append(res)
+        if not intents_results:
+            return []
+
+        slot_fillers = [self.slot_fillers[res[RES_INTENT_NAME]]
+                        for res in intents_results]
+        tokens = None
+        features_cache = None
+        for slot_filler in slot_fillers:
+            if isinstance(slot_filler, CRFSlotFiller):
+                tokens = tokenize(text, slot_filler.language)
+                features_cache = get_features_cache(tokens)
+                break
+
+        def get_slots(slot_filler):
+            if isinstance(slot_filler, CRFSlotFiller):
+                return slot_filler.get_slots(text, tokens, features_cache)
+            return slot_filler.get_slots(text)
+
+        if n_jobs > 1 and len(intents_results) > 1:
+            slots = self._get_slots_pool(n_jobs).map(get_slots, slot_fillers)
+        else:
+            slots = [get_slots(slot_filler) for slot_filler in slot_fillers]
+        return [parsing_result(text, intent_result, intent_slots)
+                for intent_result, intent_slots in zip(intents_results, slots)]
+
+    def _get_slots_pool(self, n_jobs):
+        # Threads do not survive a fork, hence new pools are created when the
+        # parser is used in a forked process
+        with self._slots_pools_lock:
+            if self._slots_pools_pid != os.getpid():
+                self._slots_pools = dict()
+                self._slots_pools_pid = os.getpid()
+            if n_jobs not in self._slots_pools:
+                self._slots_pools[n_jobs] = ThreadPool(n_jobs)
+            return self._slots_pools[n_jobs]
+
+    def close(self):
+        """Stops the threads used to extract the slots in
+        :func:`parse_nbest`, if any"""
+        with self._slots_pools_lock:
+            pools = list(itervalues(self._slots_pools))
+            pools_pid = self._slots_pools_pid
+            self._slots_pools = dict()
+            self._slots_pools_pid = None
+        # Pools inherited from a parent process have no running thread
+        if pools_pid == os.getpid():
+            for pool in pools:
+                pool.terminate()
+                pool.join()
+
     @check_persisted_path
     def persist(self, path):
         """Persist the object at the given path"""
@@ -1 +1,2 @@
+from .engine_pool import EnginePool
 from .nlu_engine import SnipsNLUEngine
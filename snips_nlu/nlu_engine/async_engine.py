@@ -0,0 +1,160 @@
+# This module relies on asyncio and thus requires Python 3
+from __future__ import division, unicode_literals
+
+import asyncio
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+class AsyncNLUEngine(object):
+    """Wrapper of a fitted :class:`.SnipsNLUEngine` to use it from an asyncio
+    event loop
+
+    Concurrent calls to :func:`parse` are gathered into micro-batches, which
+    are parsed with :func:`.SnipsNLUEngine.parse_batch` in a worker thread
+    so that the event loop is never blocked. A batch is dispatched as soon as
+    it contains *max_batch_size* requests, or when its oldest request has
+    waited for *max_wait_ms* milliseconds.
+
+    Example:
+
+        >>> async_engine = AsyncNLUEngine(engine, max_wait_ms=2)
+        >>> result = await async_engine.parse(text)  # doctest: +SKIP
+
+    Args:
+        engine (:class:`.SnipsNLUEngine`): Fitted NLU engine
+        max_batch_size (int, optional): Maximum number of requests parsed
+            together. Defaults to 32.
+        max_wait_ms (float, optional): Maximum time, in milliseconds, during
+            which a request waits for other ones to be batched with it.
+            Defaults to 5.
+        executor (:class:`concurrent.futures.Executor`, optional): Executor
+            in which the batches are parsed. Defaults to a single thread, the
+            batches being then parsed one after the other.
+    """
+
+    def __init__(self, engine, max_batch_size=32, max_wait_ms=5.,
+                 executor=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be a positive integer but "
+                             "received: %s" % max_batch_size)
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be positive but received: %s"
+                             % max_wait_ms)
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._own_executor = executor is None
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=1)
+        self._executor = executor
+        self._pending = defaultdict(list)
+        self._timers = dict()
+        self._nb_in_flight = 0
+        self._batch_sizes = defaultdict(int)
+
+    def parse(self, text, intents=None):
+        """Schedules the parsing of *text*, see :func:`.SnipsNLUEngine.parse`
+
+        This method must be called from the running event loop.
+
+        Returns:
+            :class:`asyncio.Future`: Future of the parsing result
+        """
+        if isinstance(intents, str):
+            intents = [intents]
+        loop = asyncio.get_event_loop()
+        future = _create_future(loop)
+        # Requests are batched together only when they have the same intents
+        # filter
+        batch_key = None if intents is None else tuple(intents)
+        pending = self._pending[batch_key]
+        pending.append((text, future))
+        if len(pending) >= self.max_batch_size:
+            self._dispatch(loop, batch_key)
+        elif batch_key not in self._timers:
+            self._timers[batch_key] = loop.call_later(
+                self.max_wait_ms / 1000, self._dispatch, loop, batch_key)
+        return future
+
+    @property
+    def metrics(self):
+        """dict: Number of requests waiting to be batched (*queue_depth*) or
+        being parsed (*in_flight*), along with the distribution of the batch
+        sizes (*batch_sizes*), the number of batches and their mean size"""
+        nb_batches = sum(self._batch_sizes.values())
+        nb_requests = sum(size * count
+                          for size, count in self._batch_sizes.items())
+        return {
+            "queue_depth": sum(len(p) for p in self._pending.values()),
+            "in_flight": self._nb_in_flight,
+            "nb_batches": nb_batches,
+            "mean_batch_size":
+                nb_requests / nb_batches if nb_batches else 0.0,
+            "batch_sizes": dict(self._batch_sizes)
+        }
+
+    def reset_metrics(self):
+        self._batch_sizes.clear()
+
+    def close(self):
+        """Shuts down the default executor, once the pending batches have
+        been parsed"""
+        if self._own_executor:
+            self._executor.shutdown(wait=True)
+
+    def _dispatch(self, loop, batch_key):
+        timer = self._timers.pop(batch_key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(batch_key, [])
+        if not batch:
+            return
+        self._batch_sizes[len(batch)] += 1
+        self._nb_in_flight += len(batch)
+        intents = None if batch_key is None else list(batch_key)
+        texts = [text for text, _ in batch]
+        batch_future = loop.run_in_executor(
+            self._executor, partial(self._parse_batch, texts, intents))
+        batch_future.add_done_callback(partial(self._on_batch_parsed, batch))
+
+    def _parse_batch(self, texts, intents):
+        try:
+            return [(res, None) for res in
+                    self.engine.parse_batch(texts, intents)]
+        except Exception:  # pylint: disable=broad-except
+            # The faulty requests are isolated by parsing them one by one
+            return [self._parse_single(text, intents) for text in texts]
+
+    def _parse_single(self, text, intents):
+        try:
+            return self.engine.parse(text, intents), None
+        except Exception as e:  # pylint: disable=broad-except
+            return None, e
+
+    def _on_batch_parsed(self, batch, batch_future):
+        self._nb_in_flight -= len(batch)
+        batch_cancelled = batch_future.cancelled()
+        exception = None if batch_cancelled else batch_future.exception()
+        for i, (_, future) in enumerate(batch):
+            if future.cancelled():
+                continue
+            if batch_cancelled:
+                future.cancel()
+                continue
+            if exception is not None:
+                future.set_exception(exception)
+                continue
+            result, error = batch_future.result()[i]
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+def _create_future(loop):
+    try:
+        return loop.create_future()
+    except AttributeError:  # Python < 3.5.2
+        return asyncio.Future(loop=loop)
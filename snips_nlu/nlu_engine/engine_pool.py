@@ -0,0 +1,181 @@
+from __future__ import division, unicode_literals
+
+import multiprocessing
+import os
+from builtins import object, str
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool, cpu_count
+
+from snips_nlu.nlu_engine.nlu_engine import SnipsNLUEngine
+from snips_nlu.utils import LRUCache
+
+# NLU engine used by the current worker process, either inherited from the
+# parent process when the worker is forked, or loaded by the worker itself
+_WORKER_ENGINE = dict()
+
+
+def _load_engine(path, parse_cache_size, warmup):
+    parse_cache = None
+    if parse_cache_size:
+        parse_cache = LRUCache(size_limit=parse_cache_size)
+    engine = SnipsNLUEngine.from_path(path, parse_cache=parse_cache)
+    if warmup:
+        engine.warmup()
+    return engine
+
+
+def _init_worker(path, parse_cache_size, warmup):
+    if "engine" not in _WORKER_ENGINE:
+        _WORKER_ENGINE["engine"] = _load_engine(path, parse_cache_size,
+                                                warmup)
+
+
+def _parse_in_worker(args):
+    text, intents = args
+    return _WORKER_ENGINE["engine"].parse(text, intents)
+
+
+def _parse_batch_in_worker(args):
+    texts, intents = args
+    return _WORKER_ENGINE["engine"].parse_batch(texts, intents)
+
+
+def _run_in_worker(args):
+    fn, fn_args = args
+    return fn(_WORKER_ENGINE["engine"], *fn_args)
+
+
+def _is_forking():
+    try:
+        return multiprocessing.get_start_method() == "fork"
+    except AttributeError:  # Python 2 always forks on posix systems
+        return os.name == "posix"
+
+
+class EnginePool(object):
+    """Pool of worker processes parsing with the same persisted
+    :class:`.SnipsNLUEngine`, in order to use several cores
+
+    When the worker processes are forked, which is the case by default on
+    Linux, the engine is loaded once in the parent process and shared with
+    the workers, whose memory pages are copied on write only. Otherwise, each
+    worker loads the engine from *path*.
+
+    Results are always returned in the order of the inputs. The pool must be
+    closed once done, which is done automatically when it is used as a
+    context manager.
+
+    Example:
+
+        >>> with EnginePool("path/to/engine", workers=4) as pool:
+        ...     results = pool.parse_many(texts)  # doctest: +SKIP
+
+    Args:
+        path (str): Path of the persisted NLU engine
+        workers (int, optional): Number of worker processes. Defaults to the
+            number of CPUs.
+        chunk_size (int, optional): Number of texts sent at once to a worker
+            by :func:`parse_many` and :func:`imap`. By default, the texts
+            passed to :func:`parse_many` are split into 4 chunks per worker,
+            and :func:`imap` sends them one by one.
+        parse_cache_size (int, optional): If provided, each worker caches
+            its parsing results in a :class:`.LRUCache` of this size
+        warmup (bool, optional): Whether or not to warm up the engine, see
+            :func:`.SnipsNLUEngine.warmup`. When the workers are forked, they
+            inherit the engine warmed up in the parent process. Defaults to
+            False.
+    """
+
+    def __init__(self, path, workers=None, chunk_size=None,
+                 parse_cache_size=None, warmup=False):
+        if workers is None:
+            workers = cpu_count()
+        if workers < 1:
+            raise ValueError("workers must be a positive integer but "
+                             "received: %s" % workers)
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer but "
+                             "received: %s" % chunk_size)
+        self.path = str(path)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.parse_cache_size = parse_cache_size
+        self._engine = None
+        if _is_forking():
+            # The engine is kept alive as long as the pool, as it removes the
+            # files of its CRF models when it is garbage collected
+            self._engine = _load_engine(self.path, parse_cache_size, warmup)
+            _WORKER_ENGINE["engine"] = self._engine
+        try:
+            self._pool = Pool(processes=workers, initializer=_init_worker,
+                              initargs=(self.path, parse_cache_size, warmup))
+        finally:
+            _WORKER_ENGINE.pop("engine", None)
+
+    def parse(self, text, intents=None):
+        """Parses *text* in one of the workers, see
+        :func:`.SnipsNLUEngine.parse`"""
+        return self._pool.apply(_parse_in_worker, ((text, intents),))
+
+    def parse_many(self, texts, intents=None, chunk_size=None):
+        """Parses *texts* in the workers, by chunks
+
+        Returns:
+            list of dict: The parsing results, in the order of *texts*
+        """
+        if chunk_size is None:
+            chunk_size = self.chunk_size
+        return self._pool.map(_parse_in_worker,
+                              [(text, intents) for text in texts],
+                              chunksize=chunk_size)
+
+    def imap(self, texts, intents=None, chunk_size=None):
+        """Lazy version of :func:`parse_many`, which consumes *texts* as an
+        iterable and yields the parsing results in order as soon as they are
+        available
+
+        Each chunk of texts is parsed with :func:`.SnipsNLUEngine.parse_batch`.
+        At most two chunks per worker are dispatched ahead of the results
+        being consumed, so that arbitrarily large iterables can be streamed
+        with a bounded memory.
+        """
+        if chunk_size is None:
+            chunk_size = self.chunk_size or 1
+        texts = iter(texts)
+        pending = deque()
+        while True:
+            while len(pending) < 2 * self.workers:
+                chunk = list(islice(texts, chunk_size))
+                if not chunk:
+                    break
+                pending.append(self._pool.apply_async(
+                    _parse_batch_in_worker, ((chunk, intents),)))
+            if not pending:
+                return
+            for result in pending.popleft().get():
+                yield result
+
+    def run(self, fn, *args):
+        """Calls ``fn(engine, *args)`` in one of the workers, *engine* being
+        the NLU engine of the worker, and returns the result
+
+        This allows to run custom code next to the engine, such as gathering
+        statistics. As *fn* is sent to the worker, it must be picklable,
+        which is the case of module-level functions.
+        """
+        return self._pool.apply(_run_in_worker, ((fn, args),))
+
+    def close(self):
+        """Stops the worker processes"""
+        self._pool.terminate()
+        self._pool.join()
+        if self._engine is not None:
+            self._engine.close()
+        self._engine = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -2,18 +2,31 @@ from __future__ import unicode_literals
 
 import json
 import logging
+import os
 from builtins import str
 from collections import defaultdict
 from copy import deepcopy
+from multiprocessing import TimeoutError as PoolTimeoutError
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
+from threading import Event, Lock
+from timeit import default_timer
 
-from future.utils import iteritems
+from future.utils import iteritems, itervalues
+from snips_nlu_ontology import (
+    get_builtin_entity_examples, get_supported_entities)
 
 from snips_nlu.__about__ import __model_version__, __version__
-from snips_nlu.builtin_entities import is_builtin_entity
+from snips_nlu.builtin_entities import (
+    builtin_entities_context, get_builtin_entities_scope,
+    get_builtin_entity_parser, is_builtin_entity)
 from snips_nlu.constants import (
-    CAPITALIZE, ENTITIES, LANGUAGE, RES_ENTITY, RES_INTENT, RES_SLOTS)
+    CAPITALIZE, ENTITIES, LANGUAGE, RES_DEGRADATIONS, RES_ENTITY, RES_INTENT,
+    RES_INTENT_NAME, RES_SLOTS)
 from snips_nlu.dataset import validate_and_format_dataset
+from snips_nlu.deadline import (
+    DEGRADATIONS, DEGRADATION_INTENT_PARSERS, add_degradations,
+    deadline_context, get_degradations, get_remaining_time, should_degrade)
 from snips_nlu.default_configs import DEFAULT_CONFIGS
 from snips_nlu.nlu_engine.utils import resolve_slots
 from snips_nlu.pipeline.configs import NLUEngineConfig
@@ -46,17 +59,58 @@ class SnipsNLUEngine(ProcessingUnit):
     caught, and then fallback on a second parser which is machine-learning
     based and will be able to parse unseen utterances while ensuring a good
     precision and recall.
+
+    Once fitted, a single engine can be shared across threads:
+    :func:`parse` and :func:`parse_nbest` can be called concurrently, the
+    shared caches being thread-safe and each thread using its own CRF
+    taggers.
+
+    When most queries are not matched by the first intent parser, the
+    latency of :func:`parse` can be reduced with speculative parsing: the
+    next intent parsers then run in worker threads at the same time as the
+    first one. The priority order is kept, the result of a parser being
+    used only when the previous ones have failed, and the results of the
+    next parsers are discarded otherwise.
     """
 
     unit_name = "nlu_engine"
     config_type = NLUEngineConfig
 
-    def __init__(self, config=None):
+    def __init__(self, config=None, parse_cache=None, speculative_workers=0):
         """The NLU engine can be configured by passing a
-        :class:`.NLUEngineConfig`"""
+        :class:`.NLUEngineConfig`
+
+        A *parse_cache*, such as a :class:`.LRUCache`, can also be passed in
+        order to cache parsing results. Only the intent and the raw slots are
+        cached, the slots being resolved at each call so that relative
+        builtin entities such as datetimes remain correct.
+
+        *speculative_workers* is the number of worker threads running the
+        intent parsers speculatively in :func:`parse`, 0 disabling the
+        speculative parsing. These threads are stopped by :func:`close`,
+        which is called automatically when the engine is used as a context
+        manager.
+        """
         super(SnipsNLUEngine, self).__init__(config)
+        if speculative_workers < 0:
+            raise ValueError("speculative_workers must be positive but "
+                             "received: %s" % speculative_workers)
         self.intent_parsers = []
         """list of :class:`.IntentParser`"""
+        self.parse_cache = parse_cache
+        """Cache of unresolved parsing results, which must implement the
+        *get*, *put* and *clear* methods of :class:`.LRUCache`"""
+        self.speculative_workers = speculative_workers
+        """int: Number of worker threads used for speculative parsing"""
+        self._speculative_pool = None
+        self._speculative_pool_pid = None
+        self._speculative_pool_lock = Lock()
+        self.builtin_entities_scope = None
+        """list of str: Builtin entities used in the training dataset or by
+        the trained intent parsers, see
+        :func:`.ProcessingUnit.get_used_builtin_entities`, to which the
+        builtin entities parsing is restricted, or *None* when all the
+        supported builtin entities are parsed"""
         self._dataset_metadata = None
 
     @property
@@ -78,13 +132,39 @@ class SnipsNLUEngine(ProcessingUnit):
             The same object, trained.
         """
         logger.info("Fitting NLU engine...")
+        if self.parse_cache is not None:
+            self.parse_cache.clear()
         dataset = validate_and_format_dataset(dataset)
         self._dataset_metadata = _get_dataset_metadata(dataset)
 
         if self.config is None:
             language = self._dataset_metadata["language_code"]
             self.config = self.config_type.from_dict(DEFAULT_CONFIGS[language])
+        training_scope = _get_builtin_entities_scope(dataset, self.config)
+        pretrained_parsers = [] if force_retrain else [
+            parser for parser in self.intent_parsers if parser.fitted]
+
+        with builtin_entities_context(scope=training_scope):
+            self.intent_parsers = self._fit_intent_parsers(dataset,
+                                                           force_retrain)
+        # The builtin entities which the trained intent parsers do not use
+        # would not change the parsing results, hence they are not parsed at
+        # inference time
+        scope = _get_used_builtin_entities_scope(dataset, self.intent_parsers)
+        if scope != training_scope:
+            # Overlapping builtin entities are resolved within the parsing
+            # scope, e.g. "in two hours" is a snips/number instead of a
+            # snips/datetime when the latter is out of scope, hence the intent
+            # parsers are retrained with the inference scope so that they get
+            # the same features
+            with builtin_entities_context(scope=scope):
+                for parser in self.intent_parsers:
+                    if not any(parser is p for p in pretrained_parsers):
+                        parser.fit(dataset, force_retrain=True)
+        self.builtin_entities_scope = scope
+        return self
 
+    def _fit_intent_parsers(self, dataset, force_retrain):
         parsers = []
         for parser_config in self.config.intent_parsers_configs:
             # Re-use existing parsers to allow pre-training
@@ -98,14 +178,12 @@ class SnipsNLUEngine(ProcessingUnit):
             if force_retrain or not recycled_parser.fitted:
                 recycled_parser.fit(dataset, force_retrain)
             parsers.append(recycled_parser)
-
-        self.intent_parsers = parsers
-        return self
+        return parsers
 
     @log_result(logger, logging.DEBUG, "Result -> {result}")
     @log_elapsed_time(logger, logging.DEBUG, "Parsed query in {elapsed_time}")
     @fitted_required
-    def parse(self, text, intents=None):
+    def parse(self, text, intents=None, deadline_ms=None):
         """Performs intent parsing on the provided *text* by calling its intent
         parsers successively
 
@@ -113,6 +191,11 @@ class SnipsNLUEngine(ProcessingUnit):
             text (str): Input
             intents (str or list of str): If provided, reduces the scope of
                 intent parsing to the provided list of intents
+            deadline_ms (float, optional): Latency budget of the parsing, in
+                milliseconds. Once it is exhausted, the remaining stages of
+                the pipeline are degraded, see :data:`.DEGRADATIONS`, and the
+                applied degradations are listed in the *degradations* key of
+                the result. Degraded results are not cached.
 
         Returns:
             dict: The most likely intent along with the extracted slots. See
@@ -121,6 +204,7 @@ class SnipsNLUEngine(ProcessingUnit):
         Raises:
             NotTrained: When the nlu engine is not fitted
             TypeError: When input type is not unicode
+            ValueError: When the latency budget is negative
         """
         logging.info("NLU engine parsing: '%s'...", text)
         if not isinstance(text, str):
@@ -129,22 +213,296 @@ class SnipsNLUEngine(ProcessingUnit):
         if isinstance(intents, str):
             intents = [intents]
 
-        language = self._dataset_metadata["language_code"]
-        entities = self._dataset_metadata["entities"]
-
-        for parser in self.intent_parsers:
+        with builtin_entities_context(scope=self.builtin_entities_scope):
+            if deadline_ms is None:
+                return self._parse_with_cache(text, intents)
+            with deadline_context(deadline_ms) as degradations:
+                res = self._parse_with_cache(text, intents)
+            res[RES_DEGRADATIONS] = [d for d in DEGRADATIONS
+                                     if d in degradations]
+            return res
+
+    def _parse_with_cache(self, text, intents):
+        if self.parse_cache is None:
+            res = self._parse(text, intents)
+        else:
+            cache_key = (text, None if intents is None else tuple(intents))
+            res = self.parse_cache.get(cache_key)
+            if res is None:
+                res = self._parse(text, intents)
+                if not get_degradations():
+                    self.parse_cache.put(cache_key, deepcopy(res))
+            else:
+                res = deepcopy(res)
+        if is_empty(res):
+            return res
+        return self._resolve_result(text, res)
+
+    def _parse(self, text, intents):
+        if self.speculative_workers and len(self.intent_parsers) > 1:
+            return self._parse_speculatively(text, intents)
+        for i, parser in enumerate(self.intent_parsers):
+            # Once the budget is exhausted, the next parsers are still called
+            # as long as they can degrade their slot filling, which is milder
+            # than not calling them
+            if i > 0 and not parser.supports_slot_filling_degradation \
+                    and should_degrade(DEGRADATION_INTENT_PARSERS):
+                break
             res = parser.parse(text, intents)
-            if is_empty(res):
-                continue
-            slots = res[RES_SLOTS]
-            scope = [s[RES_ENTITY] for s in slots
-                     if is_builtin_entity(s[RES_ENTITY])]
-            resolved_slots = resolve_slots(text, slots, entities, language,
-                                           scope)
-            return parsing_result(text, intent=res[RES_INTENT],
-                                  slots=resolved_slots)
+            if not is_empty(res):
+                return res
         return empty_result(text)
 
+    def _parse_speculatively(self, text, intents):
+        # The parsing context of the current thread is passed to the workers,
+        # along with the deadline, so that the workers which start late do not
+        # get more time than the current thread
+        remaining_time = get_remaining_time()
+        deadline = None
+        if remaining_time is not None:
+            deadline = default_timer() + remaining_time
+        context = (get_builtin_entities_scope(), deadline)
+        # Speculative parsings which have not started yet are cancelled when
+        # their result is not needed anymore
+        cancelled = Event()
+        pool = self._get_speculative_pool()
+        speculative_results = [
+            pool.apply_async(_parse_in_context,
+                             (parser, text, intents, context, cancelled))
+            for parser in self.intent_parsers[1:]]
+        try:
+            return self._get_speculative_result(
+                text, intents, speculative_results)
+        finally:
+            cancelled.set()
+
+    def _get_speculative_result(self, text, intents, speculative_results):
+        res = self.intent_parsers[0].parse(text, intents)
+        if not is_empty(res):
+            return res
+        for parser, speculative_result in zip(self.intent_parsers[1:],
+                                              speculative_results):
+            # As in the sequential parsing, the parsers which can degrade
+            # their slot filling are awaited, their own deadline bounding
+            # their parsing, while the other ones are only awaited within the
+            # latency budget
+            timeout = None
+            if not parser.supports_slot_filling_degradation:
+                timeout = get_remaining_time()
+                if timeout is not None:
+                    timeout = max(timeout, 0)
+            try:
+                res, degradations = speculative_result.get(timeout)
+            except PoolTimeoutError:
+                should_degrade(DEGRADATION_INTENT_PARSERS)
+                break
+            add_degradations(degradations)
+            if not is_empty(res):
+                return res
+        return empty_result(text)
+
+    def _get_speculative_pool(self):
+        # Threads do not survive a fork, hence a new pool is created when the
+        # engine is used in a forked process, such as an EnginePool worker
+        with self._speculative_pool_lock:
+            if self._speculative_pool_pid != os.getpid():
+                self._speculative_pool = ThreadPool(self.speculative_workers)
+                self._speculative_pool_pid = os.getpid()
+            return self._speculative_pool
+
+    def close(self):
+        """Stops the worker threads used for speculative parsing, if any,
+        and the ones of the intent parsers, see :func:`.IntentParser.close`
+
+        The engine can still be used afterwards, new worker threads being
+        started when needed.
+        """
+        for parser in self.intent_parsers:
+            parser.close()
+        with self._speculative_pool_lock:
+            pool = self._speculative_pool
+            pool_pid = self._speculative_pool_pid
+            self._speculative_pool = None
+            self._speculative_pool_pid = None
+        # A pool inherited from a parent process has no running thread
+        if pool is not None and pool_pid == os.getpid():
+            pool.terminate()
+            pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @log_elapsed_time(logger, logging.DEBUG,
+                      "Parsed batch of queries in {elapsed_time}")
+    @fitted_required
+    def parse_batch(self, texts, intents=None):
+        """Performs intent parsing on several *texts* at once
+
+        The results are the same as the ones of :func:`parse`, but each
+        intent parser processes all the texts which have not been parsed by
+        the previous parsers in a single call, which allows it to batch
+        computations such as the intent classification.
+
+        Args:
+            texts (list of str): Inputs
+            intents (str or list of str): If provided, reduces the scope of
+                intent parsing to the provided list of intents
+
+        Returns:
+            list of dict: The parsing result of each text. See
+            :func:`.parsing_result` for the output format.
+
+        Raises:
+            NotTrained: When the nlu engine is not fitted
+            TypeError: When an input type is not unicode
+        """
+        for text in texts:
+            if not isinstance(text, str):
+                raise TypeError("Expected unicode but received: %s"
+                                % type(text))
+
+        if isinstance(intents, str):
+            intents = [intents]
+
+        with builtin_entities_context(scope=self.builtin_entities_scope):
+            return self._parse_batch(texts, intents)
+
+    def _parse_batch(self, texts, intents):
+        intents_key = None if intents is None else tuple(intents)
+        results = [None] * len(texts)
+        if self.parse_cache is not None:
+            for i, text in enumerate(texts):
+                res = self.parse_cache.get((text, intents_key))
+                if res is not None:
+                    results[i] = deepcopy(res)
+
+        unparsed_indexes = [i for i, res in enumerate(results) if res is None]
+        newly_parsed_indexes = unparsed_indexes
+        for parser in self.intent_parsers:
+            if not unparsed_indexes:
+                break
+            parser_results = parser.parse_batch(
+                [texts[i] for i in unparsed_indexes], intents)
+            remaining_indexes = []
+            for i, res in zip(unparsed_indexes, parser_results):
+                if is_empty(res):
+                    remaining_indexes.append(i)
+                else:
+                    results[i] = res
+            unparsed_indexes = remaining_indexes
+        for i in unparsed_indexes:
+            results[i] = empty_result(texts[i])
+
+        if self.parse_cache is not None:
+            for i in newly_parsed_indexes:
+                self.parse_cache.put((texts[i], intents_key),
+                                     deepcopy(results[i]))
+        return [res if is_empty(res) else self._resolve_result(text, res)
+                for text, res in zip(texts, results)]
+
+    @log_elapsed_time(logger, logging.DEBUG,
+                      "Parsed n-best query in {elapsed_time}")
+    @fitted_required
+    def parse_nbest(self, text, k, intents=None, n_jobs=1):
+        """Performs intent parsing on the provided *text* and returns the *k*
+        most likely intents, each one with its slots
+
+        The intent parsers are called successively and their results are
+        gathered in this order, an intent found by a parser being skipped if
+        an earlier parser has already found it. This way, the first result
+        is the one that :func:`parse` would have returned.
+
+        Args:
+            text (str): Input
+            k (int): Maximum number of results to return
+            intents (str or list of str): If provided, reduces the scope of
+                intent parsing to the provided list of intents
+            n_jobs (int, optional): Number of threads which the intent parsers
+                can use to extract the slots of the different intents.
+                Default is 1.
+
+        Returns:
+            list of dict: Up to *k* parsing results with distinct intents.
+            See :func:`.parsing_result` for the output format of each item.
+
+        Raises:
+            NotTrained: When the nlu engine is not fitted
+            TypeError: When input type is not unicode
+        """
+        if not isinstance(text, str):
+            raise TypeError("Expected unicode but received: %s" % type(text))
+
+        if isinstance(intents, str):
+            intents = [intents]
+
+        with builtin_entities_context(scope=self.builtin_entities_scope):
+            return self._parse_nbest(text, k, intents, n_jobs)
+
+    def _parse_nbest(self, text, k, intents, n_jobs):
+        results = []
+        found_intents = set()
+        for parser in self.intent_parsers:
+            if len(results) >= k:
+                break
+            for res in parser.parse_nbest(text, k, intents, n_jobs=n_jobs):
+                intent_name = res[RES_INTENT][RES_INTENT_NAME]
+                if intent_name in found_intents:
+                    continue
+                found_intents.add(intent_name)
+                results.append(self._resolve_result(text, res))
+                if len(results) >= k:
+                    break
+        return results
+
+    @fitted_required
+    def warmup(self, queries=None):
+        """Eagerly initializes the components of the engine which are
+        otherwise lazily initialized by the first queries, so that these
+        queries are not slower than the next ones
+
+        The builtin entity parser of the language is loaded, the intent
+        parsers initialize their lazy components, and the *queries* are
+        parsed so that the models and resources are touched and the caches
+        primed. By default, synthetic queries are generated from the entity
+        values and the slots of the training dataset.
+
+        Thread-local components, such as CRF taggers, are only initialized
+        for the calling thread.
+
+        Args:
+            queries (list of str, optional): Queries to parse during the
+                warmup
+
+        Returns:
+            float: The duration of the warmup, in seconds, which allows to
+            report when the engine is ready to receive traffic
+        """
+        start = default_timer()
+        get_builtin_entity_parser(self._dataset_metadata["language_code"])
+        for parser in self.intent_parsers:
+            parser.warmup()
+        if queries is None:
+            queries = _get_warmup_queries(self._dataset_metadata)
+        for query in queries:
+            self.parse(query)
+        duration = default_timer() - start
+        logger.info("Warmed up NLU engine with %d queries in %.3fs",
+                    len(queries), duration)
+        return duration
+
+    def _resolve_result(self, text, result):
+        language = self._dataset_metadata["language_code"]
+        entities = self._dataset_metadata["entities"]
+        slots = result[RES_SLOTS]
+        scope = [s[RES_ENTITY] for s in slots
+                 if is_builtin_entity(s[RES_ENTITY])]
+        resolved_slots = resolve_slots(text, slots, entities, language, scope)
+        return parsing_result(text, intent=result[RES_INTENT],
+                              slots=resolved_slots)
+
     @check_persisted_path
     def persist(self, path):
         """Persist the NLU engine at the given directory path
@@ -175,6 +533,7 @@ class SnipsNLUEngine(ProcessingUnit):
         model = {
             "unit_name": self.unit_name,
             "dataset_metadata": self._dataset_metadata,
+            "builtin_entities_scope": self.builtin_entities_scope,
             "intent_parsers": intent_parsers,
             "config": config,
             "model_version": __model_version__,
@@ -195,7 +554,7 @@ class SnipsNLUEngine(ProcessingUnit):
                                   required_resources, language)
 
     @classmethod
-    def from_path(cls, path):
+    def from_path(cls, path, parse_cache=None, speculative_workers=0):
         """Load a :class:`SnipsNLUEngine` instance from a directory path
 
         The data at the given path must have been generated using
@@ -203,6 +562,10 @@ class SnipsNLUEngine(ProcessingUnit):
 
         Args:
             path (str): The path where the nlu engine is stored.
+            parse_cache (optional): Cache of parsing results to use, which is
+                cleared when loading the engine
+            speculative_workers (int, optional): Number of worker threads
+                used for speculative parsing, see :class:`SnipsNLUEngine`
         """
         directory_path = Path(path)
         model_path = directory_path / "nlu_engine.json"
@@ -223,10 +586,17 @@ class SnipsNLUEngine(ProcessingUnit):
             for subdir in resources_dir.iterdir():
                 load_resources_from_dir(subdir)
 
-        nlu_engine = cls(config=model["config"])
+        if parse_cache is not None:
+            parse_cache.clear()
+        nlu_engine = cls(config=model["config"], parse_cache=parse_cache,
+                         speculative_workers=speculative_workers)
         # pylint:disable=protected-access
         nlu_engine._dataset_metadata = model["dataset_metadata"]
         # pylint:enable=protected-access
+        # Engines persisted before the builtin entities scope was introduced
+        # parse all the supported builtin entities
+        nlu_engine.builtin_entities_scope = model.get(
+            "builtin_entities_scope")
         intent_parsers = []
         for intent_parser_name in model["intent_parsers"]:
             intent_parser_path = directory_path / intent_parser_name
@@ -236,6 +606,80 @@ class SnipsNLUEngine(ProcessingUnit):
         return nlu_engine
 
 
+def _parse_in_context(parser, text, intents, context, cancelled):
+    if cancelled.is_set():
+        return None, []
+    scope, deadline = context
+    with builtin_entities_context(scope=scope):
+        if deadline is None:
+            return parser.parse(text, intents), []
+        # The degradations are counted by the calling thread, only when it
+        # uses the result
+        remaining_time_ms = max((deadline - default_timer()) * 1000, 0)
+        with deadline_context(remaining_time_ms,
+                              count_degradations=False) as degradations:
+            return parser.parse(text, intents), list(degradations)
+
+
+def _get_builtin_entities_scope(dataset, config):
+    # The intent parsers are trained with the builtin entities of the dataset
+    # along with the ones which they may need, such as the builtin entities
+    # features
+    language = dataset[LANGUAGE]
+    required_entities = config.get_required_builtin_entities(language)
+    if required_entities is None:
+        required_entities = get_supported_entities(language)
+    scope = set(entity for entity in dataset[ENTITIES]
+                if is_builtin_entity(entity))
+    return sorted(scope.union(required_entities))
+
+
+def _get_used_builtin_entities_scope(dataset, intent_parsers):
+    language = dataset[LANGUAGE]
+    scope = set(entity for entity in dataset[ENTITIES]
+                if is_builtin_entity(entity))
+    for parser in intent_parsers:
+        used_entities = parser.get_used_builtin_entities()
+        if used_entities is None:
+            # Intent parsers which do not tell which builtin entities they use
+            # are assumed to use the ones required by their config
+            used_entities = parser.config.get_required_builtin_entities(
+                language)
+        if used_entities is None:
+            used_entities = get_supported_entities(language)
+        scope.update(used_entities)
+    return sorted(scope)
+
+
+def _get_warmup_queries(dataset_metadata):
+    language = dataset_metadata["language_code"]
+    entities = dataset_metadata["entities"]
+
+    def get_example(entity):
+        if is_builtin_entity(entity):
+            examples = get_builtin_entity_examples(entity, language)
+            return examples[0] if examples else None
+        utterances = entities[entity]["utterances"]
+        return min(utterances) if utterances else None
+
+    # A query per builtin entity of the slots, and a query per intent made of
+    # an example of each of its slots
+    slot_name_mappings = dataset_metadata["slot_name_mappings"]
+    builtin_entities = set(
+        entity for mapping in itervalues(slot_name_mappings)
+        for entity in itervalues(mapping) if is_builtin_entity(entity))
+    queries = [get_example(entity) for entity in sorted(builtin_entities)]
+    for intent, mapping in sorted(iteritems(slot_name_mappings)):
+        examples = [get_example(entity) for _, entity
+                    in sorted(iteritems(mapping))]
+        queries.append(" ".join(e for e in examples if e) or intent)
+    unique_queries = []
+    for query in queries:
+        if query and query not in unique_queries:
+            unique_queries.append(query)
+    return unique_queries
+
+
 def _get_dataset_metadata(dataset):
     entities = dict()
     for entity_name, entity in iteritems(dataset[ENTITIES]):
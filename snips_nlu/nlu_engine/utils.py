@@ -9,10 +9,9 @@ from snips_nlu.result import builtin_slot, custom_slot
 
 # pylint:disable=redefined-builtin
 def resolve_slots(input, slots, dataset_entities, language, scope):
-    # Do not use cached entities here as datetimes must be computed using
-    # current context
-    builtin_entities = get_builtin_entities(input, language, scope,
-                                            use_cache=False)
+    # Cached entities are keyed by reference time, hence the datetimes found
+    # here are resolved against the reference time of the current context
+    builtin_entities = get_builtin_entities(input, language, scope)
     resolved_slots = []
     for slot in slots:
         entity_name = slot[RES_ENTITY]
@@ -28,8 +27,7 @@ def resolve_slots(input, slots, dataset_entities, language, scope):
                     break
             if not found:
                 builtin_matches = get_builtin_entities(raw_value, language,
-                                                       scope=[entity_name],
-                                                       use_cache=False)
+                                                       scope=[entity_name])
                 if builtin_matches:
                     resolved_slot = builtin_slot(slot,
                                                  builtin_matches[0][VALUE])
@@ -27,3 +27,9 @@ class ProcessingUnitConfig(with_metaclass(ABCMeta, Config)):
     @abstractmethod
     def get_required_resources(self):
         raise NotImplementedError
+
+    def get_required_builtin_entities(self, language):
+        """Builtin entities which the processing unit needs to parse in the
+        given *language*, in addition to the ones of the training dataset,
+        or *None* when it may need all the supported builtin entities"""
+        return None
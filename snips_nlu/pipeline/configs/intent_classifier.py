@@ -2,6 +2,8 @@ from __future__ import unicode_literals
 
 from copy import deepcopy
 
+from snips_nlu_ontology import get_supported_entities
+
 from snips_nlu.constants import NOISE, STOP_WORDS, WORD_CLUSTERS
 from snips_nlu.pipeline.configs import Config, ProcessingUnitConfig
 from snips_nlu.resources import merge_required_resources
@@ -19,13 +21,17 @@ class LogRegIntentClassifierConfig(ProcessingUnitConfig):
             :class:`.Featurizer` used underneath
         random_seed (int, optional): Allows to fix the seed ot have
             reproducible trainings
+        replay_buffer_size (int, optional): Number of training utterances
+            which are sampled and kept along with the model, so that they can
+            be replayed when updating the classifier incrementally. Default
+            is 100.
     """
 
     # pylint: enable=line-too-long
 
     # pylint: disable=super-init-not-called
     def __init__(self, data_augmentation_config=None, featurizer_config=None,
-                 random_seed=None):
+                 random_seed=None, replay_buffer_size=100):
         if data_augmentation_config is None:
             data_augmentation_config = IntentClassifierDataAugmentationConfig()
         if featurizer_config is None:
@@ -35,6 +41,10 @@ class LogRegIntentClassifierConfig(ProcessingUnitConfig):
         self._featurizer_config = None
         self.featurizer_config = featurizer_config
         self.random_seed = random_seed
+        if replay_buffer_size < 0:
+            raise ValueError("replay_buffer_size must be a non-negative "
+                             "integer but received: %s" % replay_buffer_size)
+        self.replay_buffer_size = replay_buffer_size
 
     # pylint: enable=super-init-not-called
 
@@ -80,13 +90,17 @@ class LogRegIntentClassifierConfig(ProcessingUnitConfig):
             resources, self.featurizer_config.get_required_resources())
         return resources
 
+    def get_required_builtin_entities(self, language):
+        return self.featurizer_config.get_required_builtin_entities(language)
+
     def to_dict(self):
         return {
             "unit_name": self.unit_name,
             "data_augmentation_config":
                 self.data_augmentation_config.to_dict(),
             "featurizer_config": self.featurizer_config.to_dict(),
-            "random_seed": self.random_seed
+            "random_seed": self.random_seed,
+            "replay_buffer_size": self.replay_buffer_size
         }
 
     @classmethod
@@ -157,13 +171,42 @@ class FeaturizerConfig(Config):
             (vs linear) term frequencies, default is *False*.
         pvalue_threshold (float, optional): max pvalue for a feature to be
         kept in the feature selection
+        word_clusters_name (str, optional): Name of the word clusters to use
+            to build additional features, default is *None*.
+        feature_hashing_size (int, optional): When defined, n-grams are mapped
+            into a fixed-width space of this size using a signed hash, instead
+            of being stored in a vocabulary. This bounds the size of the model
+            regardless of the size of the vocabulary. Default is *None*.
+        n_jobs (int, optional): Number of worker processes used to preprocess
+            the training utterances, at fit and update time, -1 meaning one
+            per CPU. Utterances transformed at inference time are preprocessed
+            in the current process unless an n_jobs is explicitly passed to
+            :func:`.Featurizer.transform`. Default is 1, which keeps the
+            preprocessing in the current process.
+        preprocessing_chunk_size (int, optional): Number of utterances sent
+            at once to a worker process. Batches which fit in a single chunk
+            are always preprocessed in the current process. Default is 200.
     """
 
     def __init__(self, sublinear_tf=False, pvalue_threshold=0.4,
-                 word_clusters_name=None):
+                 word_clusters_name=None, feature_hashing_size=None,
+                 n_jobs=1, preprocessing_chunk_size=200):
         self.sublinear_tf = sublinear_tf
         self.pvalue_threshold = pvalue_threshold
         self.word_clusters_name = word_clusters_name
+        if feature_hashing_size is not None and feature_hashing_size < 1:
+            raise ValueError("feature_hashing_size must be a positive integer "
+                             "but received: %s" % feature_hashing_size)
+        self.feature_hashing_size = feature_hashing_size
+        if n_jobs == 0 or n_jobs < -1:
+            raise ValueError("n_jobs must be a positive integer or -1 but "
+                             "received: %s" % n_jobs)
+        self.n_jobs = n_jobs
+        if preprocessing_chunk_size < 1:
+            raise ValueError("preprocessing_chunk_size must be a positive "
+                             "integer but received: %s"
+                             % preprocessing_chunk_size)
+        self.preprocessing_chunk_size = preprocessing_chunk_size
 
     def get_required_resources(self):
         if self.word_clusters_name is None:
@@ -172,11 +215,18 @@ class FeaturizerConfig(Config):
             WORD_CLUSTERS: {self.word_clusters_name}
         }
 
+    def get_required_builtin_entities(self, language):
+        # Every builtin entity found in an utterance is turned into a feature
+        return set(get_supported_entities(language))
+
     def to_dict(self):
         return {
             "sublinear_tf": self.sublinear_tf,
             "pvalue_threshold": self.pvalue_threshold,
-            "word_clusters_name": self.word_clusters_name
+            "word_clusters_name": self.word_clusters_name,
+            "feature_hashing_size": self.feature_hashing_size,
+            "n_jobs": self.n_jobs,
+            "preprocessing_chunk_size": self.preprocessing_chunk_size
         }
 
     @classmethod
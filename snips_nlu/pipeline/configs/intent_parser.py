@@ -2,6 +2,7 @@ from __future__ import unicode_literals
 
 from copy import deepcopy
 
+from snips_nlu.builtin_entities import merge_required_builtin_entities
 from snips_nlu.pipeline.configs import ProcessingUnitConfig
 from snips_nlu.pipeline.processing_unit import get_processing_unit_config
 from snips_nlu.resources import merge_required_resources
@@ -46,6 +47,12 @@ class ProbabilisticIntentParserConfig(ProcessingUnitConfig):
             resources, self.slot_filler_config.get_required_resources())
         return resources
 
+    def get_required_builtin_entities(self, language):
+        return merge_required_builtin_entities(
+            self.intent_classifier_config.get_required_builtin_entities(
+                language),
+            self.slot_filler_config.get_required_builtin_entities(language))
+
     def to_dict(self):
         return {
             "unit_name": self.unit_name,
@@ -69,6 +76,10 @@ class DeterministicIntentParserConfig(ProcessingUnitConfig):
         max_queries (int, optional): Maximum number of regex patterns per
             intent. 50 by default.
         max_pattern_length (int, optional): Maximum length of regex patterns.
+        regex_cache_size (int, optional): Maximum number of intents whose
+            patterns are kept compiled. The patterns of an intent are compiled
+            the first time they are used. By default, they are kept compiled
+            for all the intents.
 
 
     This allows to deactivate the usage of regular expression when they are
@@ -80,9 +91,14 @@ class DeterministicIntentParserConfig(ProcessingUnitConfig):
     """
 
     # pylint: disable=super-init-not-called
-    def __init__(self, max_queries=100, max_pattern_length=1000):
+    def __init__(self, max_queries=100, max_pattern_length=1000,
+                 regex_cache_size=None):
         self.max_queries = max_queries
         self.max_pattern_length = max_pattern_length
+        if regex_cache_size is not None and regex_cache_size < 1:
+            raise ValueError("regex_cache_size must be a positive integer but "
+                             "received: %s" % regex_cache_size)
+        self.regex_cache_size = regex_cache_size
 
     # pylint: enable=super-init-not-called
 
@@ -95,11 +111,15 @@ class DeterministicIntentParserConfig(ProcessingUnitConfig):
     def get_required_resources(self):
         return None
 
+    def get_required_builtin_entities(self, language):
+        return set()
+
     def to_dict(self):
         return {
             "unit_name": self.unit_name,
             "max_queries": self.max_queries,
-            "max_pattern_length": self.max_pattern_length
+            "max_pattern_length": self.max_pattern_length,
+            "regex_cache_size": self.regex_cache_size
         }
 
     @classmethod
@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 from builtins import map
 from copy import deepcopy
 
+from snips_nlu.builtin_entities import merge_required_builtin_entities
 from snips_nlu.pipeline.configs import ProcessingUnitConfig
 from snips_nlu.pipeline.processing_unit import get_processing_unit_config
 from snips_nlu.resources import merge_required_resources
@@ -46,6 +47,14 @@ class NLUEngineConfig(ProcessingUnitConfig):
                 resources, config.get_required_resources())
         return resources
 
+    def get_required_builtin_entities(self, language):
+        builtin_entities = set()
+        for config in self.intent_parsers_configs:
+            builtin_entities = merge_required_builtin_entities(
+                builtin_entities,
+                config.get_required_builtin_entities(language))
+        return builtin_entities
+
     def to_dict(self):
         return {
             "unit_name": self.unit_name,
@@ -2,12 +2,17 @@ from __future__ import unicode_literals
 
 from copy import deepcopy
 
+from snips_nlu.builtin_entities import merge_required_builtin_entities
 from snips_nlu.constants import STOP_WORDS
 from snips_nlu.pipeline.configs import (
     Config, ProcessingUnitConfig, default_features_factories)
 from snips_nlu.resources import merge_required_resources
 from snips_nlu.utils import classproperty
 
+CRFSUITE_BACKEND = "crfsuite"
+NUMPY_BACKEND = "numpy"
+INFERENCE_BACKENDS = {CRFSUITE_BACKEND, NUMPY_BACKEND}
+
 
 class CRFSlotFillerConfig(ProcessingUnitConfig):
     # pylint: disable=line-too-long
@@ -26,6 +31,10 @@ class CRFSlotFillerConfig(ProcessingUnitConfig):
             corresponding config object for more details.
         random_seed (int, optional): Specify to make the CRF training
             deterministic and reproducible (default=None)
+        inference_backend (str, optional): Backend used to decode the CRF,
+            either "crfsuite" to use the crfsuite tagger, or "numpy" to decode
+            batches of sequences with a :class:`.CRFDecoder` built from the
+            weights of the CRF (default="crfsuite")
     """
 
     # pylint: enable=line-too-long
@@ -33,7 +42,8 @@ class CRFSlotFillerConfig(ProcessingUnitConfig):
     # pylint: disable=super-init-not-called
     def __init__(self, feature_factory_configs=None,
                  tagging_scheme=None, crf_args=None,
-                 data_augmentation_config=None, random_seed=None):
+                 data_augmentation_config=None, random_seed=None,
+                 inference_backend=CRFSUITE_BACKEND):
         if tagging_scheme is None:
             from snips_nlu.slot_filler.crf_utils import TaggingScheme
             tagging_scheme = TaggingScheme.BIO
@@ -50,6 +60,11 @@ class CRFSlotFillerConfig(ProcessingUnitConfig):
         self._data_augmentation_config = None
         self.data_augmentation_config = data_augmentation_config
         self.random_seed = random_seed
+        if inference_backend not in INFERENCE_BACKENDS:
+            raise ValueError("Expected inference_backend in %s but received: "
+                             "%s" % (sorted(INFERENCE_BACKENDS),
+                                     inference_backend))
+        self.inference_backend = inference_backend
 
     # pylint: enable=super-init-not-called
 
@@ -100,6 +115,18 @@ class CRFSlotFillerConfig(ProcessingUnitConfig):
                 resources, factory.get_required_resources())
         return resources
 
+    def get_required_builtin_entities(self, language):
+        # Import here to avoid circular imports
+        from snips_nlu.slot_filler.feature_factory import get_feature_factory
+
+        builtin_entities = set()
+        for config in self.feature_factory_configs:
+            factory = get_feature_factory(config)
+            builtin_entities = merge_required_builtin_entities(
+                builtin_entities,
+                factory.get_required_builtin_entities(language))
+        return builtin_entities
+
     def to_dict(self):
         return {
             "unit_name": self.unit_name,
@@ -108,7 +135,8 @@ class CRFSlotFillerConfig(ProcessingUnitConfig):
             "tagging_scheme": self.tagging_scheme.value,
             "data_augmentation_config":
                 self.data_augmentation_config.to_dict(),
-            "random_seed": self.random_seed
+            "random_seed": self.random_seed,
+            "inference_backend": self.inference_backend
         }
 
     @classmethod
@@ -45,6 +45,16 @@ class ProcessingUnit(with_metaclass(ABCMeta, object)):
     def config_type(cls):  # pylint:disable=no-self-argument
         raise NotImplementedError
 
+    def get_used_builtin_entities(self):
+        """Builtin entities which the fitted processing unit uses, or *None*
+        when it may use all the supported builtin entities
+
+        By default, *None* is returned, in which case the
+        :class:`.SnipsNLUEngine` relies on the builtin entities required by
+        the config of the processing unit instead.
+        """
+        return None
+
     @abstractmethod
     def persist(self, path):
         pass
@@ -16,17 +16,21 @@ def stem(string, language):
 
 
 def stem_token(token, language):
+    # The stemmed value is lazily computed without a lock, as concurrent
+    # computations on a token shared across threads give the same value
     if token.stemmed_value:
         return token.stemmed_value
-    token.stemmed_value = stem(normalize(token.value), language)
-    return token.stemmed_value
+    stemmed_value = stem(normalize(token.value), language)
+    token.stemmed_value = stemmed_value
+    return stemmed_value
 
 
 def normalize_token(token):
     if token.normalized_value:
         return token.normalized_value
-    token.normalized_value = normalize(token.value)
-    return token.normalized_value
+    normalized_value = normalize(token.value)
+    token.normalized_value = normalized_value
+    return normalized_value
 
 
 def _stem(string, language):
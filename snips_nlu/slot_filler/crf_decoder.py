@@ -0,0 +1,303 @@
+from __future__ import division, unicode_literals
+
+import struct
+from builtins import range, str
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+from future.utils import iteritems
+import scipy.sparse as sp
+
+_MODEL_MAGIC = b"lCRF"
+_FEATURES_HEADER_SIZE = 12
+_FEATURE_FORMAT = "<IIId"
+_FEATURE_SIZE = struct.calcsize(_FEATURE_FORMAT)
+_STATE_FEATURE = 0
+
+
+class DecodedSequence(namedtuple("DecodedSequence",
+                                 ["labels", "probability", "marginals"])):
+    """Result of the decoding of a sequence by a :class:`CRFDecoder`
+
+    Attributes:
+        labels (list of str): Most likely labels of the sequence
+        probability (float): Probability of the most likely labels
+        marginals (:class:`numpy.ndarray`): Marginal probabilities of the
+            labels, of shape (sequence length, number of labels), whose
+            columns follow :attr:`CRFDecoder.labels`
+    """
+
+    __slots__ = ()
+
+
+class CRFDecoder(object):
+    """Numpy implementation of the inference of a linear-chain CRF trained
+    with crfsuite
+
+    The weights of the CRF are exported once into numpy arrays, along with a
+    table mapping the crfsuite attributes to their rows. Sequences of feature
+    dicts are then decoded by padded batches, with a vectorized Viterbi which
+    yields the same labels as :meth:`pycrfsuite.Tagger.tag`. The marginals
+    and the sequence probabilities are computed in the same pass with the
+    forward-backward algorithm.
+
+    A decoder holds no state between calls, hence it can be shared across
+    threads.
+    """
+
+    def __init__(self, labels, attributes, state_weights,
+                 transition_weights):
+        """
+        Args:
+            labels (list of str): Labels of the CRF, in the order of the
+                columns of the weights
+            attributes (dict): Mapping between the crfsuite attributes and
+                the rows of *state_weights*
+            state_weights (:class:`numpy.ndarray`): Weights of the
+                attributes for each label, of shape (number of attributes,
+                number of labels)
+            transition_weights (:class:`numpy.ndarray`): Weights of the
+                transitions between labels, of shape (number of labels,
+                number of labels)
+        """
+        self.labels = labels
+        self.attributes = attributes
+        self.state_weights = state_weights
+        self.transition_weights = transition_weights
+        self._labels_ids = {label: i for i, label in enumerate(labels)}
+
+    @classmethod
+    def from_model_file(cls, model_file):
+        """Exports the weights of a model file written by crfsuite
+
+        The weights are read from the binary model rather than from
+        :meth:`pycrfsuite.Tagger.info`, which rounds them.
+        """
+        data = _read_model_file(model_file)
+        (nb_labels, nb_attributes, features_offset, labels_offset,
+         attributes_offset) = struct.unpack_from("<IIIII", data, 20)
+        labels = _read_strings_database(data, labels_offset)
+        attributes = {
+            attribute: i for i, attribute in
+            enumerate(_read_strings_database(data, attributes_offset))}
+        state_weights = np.zeros((nb_attributes, nb_labels))
+        transition_weights = np.zeros((nb_labels, nb_labels))
+        _, nb_features = struct.unpack_from("<II", data, features_offset + 4)
+        features_start = features_offset + _FEATURES_HEADER_SIZE
+        for i in range(nb_features):
+            feature_type, source, destination, weight = struct.unpack_from(
+                _FEATURE_FORMAT, data, features_start + i * _FEATURE_SIZE)
+            if feature_type == _STATE_FEATURE:
+                state_weights[source, destination] = weight
+            else:
+                transition_weights[source, destination] = weight
+        return cls(labels, attributes, state_weights, transition_weights)
+
+    def decode(self, sequences):
+        """Decodes a batch of sequences
+
+        Args:
+            sequences (list of list of dict): Sequences of feature dicts, in
+                the format expected by :meth:`pycrfsuite.Tagger.set`
+
+        Returns:
+            list of :class:`DecodedSequence`: The decoding of each sequence
+        """
+        if not sequences:
+            return []
+        state_scores, lengths = self._get_state_scores(sequences)
+        best_labels, best_scores = self._viterbi(state_scores, lengths)
+        log_alpha, log_beta, log_norms = self._forward_backward(
+            state_scores, lengths)
+        marginals = np.exp(log_alpha + log_beta - log_norms[:, None, None])
+        probabilities = np.exp(best_scores - log_norms)
+        return [
+            DecodedSequence(
+                labels=[self.labels[j] for j in best_labels[i, :length]],
+                probability=float(probabilities[i]),
+                marginals=marginals[i, :length])
+            for i, length in enumerate(lengths)]
+
+    def get_sequences_probabilities(self, sequences, labels):
+        """Computes the probability of each sequence to have the given labels
+
+        Args:
+            sequences (list of list of dict): Sequences of feature dicts
+            labels (list of list of str): Labels of each sequence
+
+        Returns:
+            list of float: The probabilities of the sequences, as computed by
+            :meth:`pycrfsuite.Tagger.probability`
+        """
+        if not sequences:
+            return []
+        state_scores, lengths = self._get_state_scores(sequences)
+        _, log_norms = self._forward(state_scores, lengths)
+        return [
+            self._get_labels_probabilities(
+                state_scores[i, :length], log_norms[i], [labels[i]])[0]
+            for i, length in enumerate(lengths)]
+
+    def get_labels_probabilities(self, sequence, labels):
+        """Computes the probabilities of several sequences of labels for the
+        same sequence
+
+        The state scores and the normalization of the sequence are computed
+        once, and all the sequences of labels are then scored together, which
+        is much faster than calling :meth:`get_sequences_probabilities` with
+        each of them.
+
+        Args:
+            sequence (list of dict): Sequence of feature dicts
+            labels (list of list of str): Sequences of labels, each one
+                having the length of *sequence*
+
+        Returns:
+            list of float: The probability of each sequence of labels
+        """
+        if not labels:
+            return []
+        state_scores, lengths = self._get_state_scores([sequence])
+        _, log_norms = self._forward(state_scores, lengths)
+        return self._get_labels_probabilities(state_scores[0], log_norms[0],
+                                              labels)
+
+    def _get_labels_probabilities(self, state_scores, log_norm, labels):
+        labels_ids = np.array([
+            [self._labels_ids[label] for label in sequence_labels]
+            for sequence_labels in labels])
+        scores = state_scores[np.arange(state_scores.shape[0]),
+                              labels_ids].sum(axis=1)
+        scores += self.transition_weights[
+            labels_ids[:, :-1], labels_ids[:, 1:]].sum(axis=1)
+        return [float(p) for p in np.exp(scores - log_norm)]
+
+    def _get_state_scores(self, sequences):
+        lengths = np.array([len(sequence) for sequence in sequences])
+        max_length = lengths.max()
+        # The attributes of all the positions of the padded batch are
+        # gathered in a sparse matrix, so that the state scores are computed
+        # with a single product
+        positions = []
+        attributes_ids = []
+        values = []
+        get_attribute_id = self.attributes.get
+        for i, sequence in enumerate(sequences):
+            for t, features in enumerate(sequence):
+                position = i * max_length + t
+                for attribute, value in to_crfsuite_attributes(features):
+                    attribute_id = get_attribute_id(attribute)
+                    if attribute_id is not None:
+                        positions.append(position)
+                        attributes_ids.append(attribute_id)
+                        values.append(value)
+        attributes_matrix = sp.csr_matrix(
+            (values, (positions, attributes_ids)),
+            shape=(len(sequences) * max_length, len(self.attributes)))
+        state_scores = attributes_matrix.dot(self.state_weights)
+        return state_scores.reshape((len(sequences), max_length, -1)), lengths
+
+    def _viterbi(self, state_scores, lengths):
+        nb_sequences, max_length, _ = state_scores.shape
+        sequences_range = np.arange(nb_sequences)
+        scores = state_scores[:, 0]
+        backpointers = np.zeros(state_scores.shape, dtype=int)
+        for t in range(1, max_length):
+            candidates = scores[:, :, None] + self.transition_weights
+            # Ties are broken in favor of the first label, like crfsuite
+            backpointers[:, t] = candidates.argmax(axis=1)
+            new_scores = candidates.max(axis=1) + state_scores[:, t]
+            active = (t < lengths)[:, None]
+            scores = np.where(active, new_scores, scores)
+
+        current_labels = scores.argmax(axis=1)
+        best_scores = scores[sequences_range, current_labels]
+        best_labels = np.zeros((nb_sequences, max_length), dtype=int)
+        for t in range(max_length - 1, -1, -1):
+            best_labels[:, t] = current_labels
+            if t > 0:
+                current_labels = np.where(
+                    t < lengths,
+                    backpointers[sequences_range, t, current_labels],
+                    current_labels)
+        return best_labels, best_scores
+
+    def _forward(self, state_scores, lengths):
+        nb_sequences, max_length, _ = state_scores.shape
+        log_alpha = np.zeros(state_scores.shape)
+        log_alpha[:, 0] = state_scores[:, 0]
+        for t in range(1, max_length):
+            log_alpha[:, t] = _logsumexp(
+                log_alpha[:, t - 1, :, None] + self.transition_weights,
+                axis=1) + state_scores[:, t]
+        last_log_alpha = log_alpha[np.arange(nb_sequences), lengths - 1]
+        log_norms = _logsumexp(last_log_alpha, axis=1)
+        return log_alpha, log_norms
+
+    def _forward_backward(self, state_scores, lengths):
+        _, max_length, _ = state_scores.shape
+        log_alpha, log_norms = self._forward(state_scores, lengths)
+
+        log_beta = np.zeros(state_scores.shape)
+        for t in range(max_length - 2, -1, -1):
+            log_beta_t = _logsumexp(
+                self.transition_weights[None] +
+                (state_scores[:, t + 1] + log_beta[:, t + 1])[:, None],
+                axis=2)
+            # The backward scores of the padded positions, and of the last
+            # position of each sequence, are left to zero
+            log_beta[:, t] = np.where(
+                (t < lengths - 1)[:, None], log_beta_t, 0.)
+        return log_alpha, log_beta, log_norms
+
+
+def _logsumexp(scores, axis):
+    max_scores = scores.max(axis=axis)
+    return max_scores + np.log(np.exp(
+        scores - np.expand_dims(max_scores, axis)).sum(axis=axis))
+
+
+def read_model_attributes(model_file):
+    """Reads the attributes known to a model file written by crfsuite"""
+    data = _read_model_file(model_file)
+    attributes_offset, = struct.unpack_from("<I", data, 36)
+    return _read_strings_database(data, attributes_offset)
+
+
+def to_crfsuite_attributes(features, prefix=""):
+    """Converts a feature dict into the (attribute, value) pairs of crfsuite,
+    following the conversion of :meth:`pycrfsuite.Tagger.set`"""
+    if not isinstance(features, dict):
+        return [(prefix + name, 1.0) for name in features]
+    attributes = []
+    for name, value in iteritems(features):
+        if isinstance(value, str):
+            attributes.append((prefix + name + ":" + value, 1.0))
+        elif isinstance(value, (dict, list, set)):
+            attributes += to_crfsuite_attributes(value, prefix + name + ":")
+        else:
+            attributes.append((prefix + name, float(value)))
+    return attributes
+
+
+def _read_model_file(model_file):
+    with Path(model_file).open(mode="rb") as f:
+        data = f.read()
+    if data[:4] != _MODEL_MAGIC:
+        raise ValueError("Invalid crfsuite model file: %s" % model_file)
+    return data
+
+
+def _read_strings_database(data, offset):
+    """Reads the strings of a CQDB chunk of a crfsuite model, ordered by id"""
+    nb_strings, backward_offset = struct.unpack_from("<II", data, offset + 16)
+    strings = []
+    for i in range(nb_strings):
+        record_offset, = struct.unpack_from(
+            "<I", data, offset + backward_offset + 4 * i)
+        start = offset + record_offset
+        size, = struct.unpack_from("<I", data, start + 4)
+        # The keys are null-terminated
+        strings.append(data[start + 8:start + 7 + size].decode("utf8"))
+    return strings
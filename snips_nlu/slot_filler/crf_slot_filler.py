@@ -6,22 +6,30 @@ import logging
 import math
 import shutil
 import tempfile
-from builtins import range
+from builtins import range, zip
 from copy import copy
 from itertools import groupby, product
 from pathlib import Path
+from threading import local
 
-from future.utils import iteritems
+from future.utils import iteritems, itervalues
+from pycrfsuite import ItemSequence, Tagger
 from sklearn_crfsuite import CRF
 
-from snips_nlu.builtin_entities import get_builtin_entities, is_builtin_entity
+from snips_nlu.builtin_entities import (
+    get_builtin_entities, is_builtin_entity, merge_required_builtin_entities)
 from snips_nlu.constants import (
     DATA, END, ENTITY_KIND, LANGUAGE, RES_ENTITY, RES_MATCH_RANGE, RES_VALUE,
     START)
 from snips_nlu.data_augmentation import augment_utterances
 from snips_nlu.dataset import validate_and_format_dataset
+from snips_nlu.deadline import (
+    DEGRADATION_BUILTIN_SLOTS_RESCORING, should_degrade)
 from snips_nlu.pipeline.configs import CRFSlotFillerConfig
+from snips_nlu.pipeline.configs.slot_filler import NUMPY_BACKEND
 from snips_nlu.preprocessing import tokenize
+from snips_nlu.slot_filler.crf_decoder import (
+    CRFDecoder, read_model_attributes, to_crfsuite_attributes)
 from snips_nlu.slot_filler.crf_utils import (
     OUTSIDE, TAGS, TOKENS, positive_tagging, tag_name_to_slot_name,
     tags_to_preslots, tags_to_slots, utterance_to_sample)
@@ -41,6 +49,11 @@ class CRFSlotFiller(SlotFiller):
 
     Check https://en.wikipedia.org/wiki/Conditional_random_field to learn
     more about CRFs
+
+    A fitted slot filler can extract slots from several threads concurrently,
+    each thread using its own CRF tagger. With the "numpy" inference backend,
+    the CRF is instead decoded by a :class:`.CRFDecoder` shared by all the
+    threads.
     """
 
     unit_name = "crf_slot_filler"
@@ -60,6 +73,9 @@ class CRFSlotFiller(SlotFiller):
         self.language = None
         self.intent = None
         self.slot_name_mapping = None
+        self._thread_local = local()
+        self._decoder = None
+        self._attributes = None
 
     @property
     def features(self):
@@ -83,27 +99,118 @@ class CRFSlotFiller(SlotFiller):
         prefix which depends on the :class:`.TaggingScheme` that is used
         (BIO by default).
         """
+        if self._decoder is not None:
+            return [_decode_tag(label) for label in self._decoder.labels]
         labels = []
-        if self.crf_model.tagger_ is not None:
-            labels = [_decode_tag(label) for label in
-                      self.crf_model.tagger_.labels()]
+        tagger = self._get_tagger()
+        if tagger is not None:
+            labels = [_decode_tag(label) for label in tagger.labels()]
         return labels
 
+    def warmup(self):
+        """Opens the CRF tagger of the current thread, the other threads
+        opening their own tagger when they first use the slot filler, and
+        reads the attributes known to the CRF"""
+        if self.crf_model is None or self._decoder is not None:
+            return
+        self._get_tagger()
+        self._get_attributes()
+
+    def _get_tagger(self):
+        # CRF taggers hold the state of the sequence being tagged, hence they
+        # cannot be shared across threads
+        if self.crf_model is None:
+            return None
+        thread_local = self._thread_local
+        if getattr(thread_local, "crf_model", None) is not self.crf_model:
+            tagger = None
+            if self.crf_model.modelfile.name is not None:
+                tagger = Tagger()
+                tagger.open(self.crf_model.modelfile.name)
+            thread_local.crf_model = self.crf_model
+            thread_local.tagger = tagger
+        return thread_local.tagger
+
+    def _load_model(self):
+        # The weights of the CRF are exported once, when the model is trained
+        # or loaded, while the attributes known to the CRF are read when the
+        # first sentence is encoded
+        self._decoder = None
+        self._attributes = None
+        if self.config.inference_backend != NUMPY_BACKEND:
+            return
+        if self.crf_model is not None \
+                and self.crf_model.modelfile.name is not None:
+            self._decoder = CRFDecoder.from_model_file(
+                self.crf_model.modelfile.name)
+
+    def _get_attributes(self):
+        if self._attributes is None and self.crf_model is not None \
+                and self.crf_model.modelfile.name is not None:
+            self._attributes = set(
+                read_model_attributes(self.crf_model.modelfile.name))
+        return self._attributes
+
+    def _encode_features(self, features):
+        # The features of a sentence are converted once into a crfsuite
+        # sequence, which is then reused for the tagging and for all the
+        # probability computations. The attributes unknown to the CRF, which
+        # have no weight, are dropped beforehand.
+        if self._decoder is not None:
+            return features
+        attributes = self._get_attributes()
+        if attributes is None:
+            return features
+        return ItemSequence([
+            {attribute: value for attribute, value
+             in to_crfsuite_attributes(token_features)
+             if attribute in attributes}
+            for token_features in features])
+
+    def _tag(self, sequences):
+        if self._decoder is not None:
+            return [[_decode_tag(label) for label in decoded.labels]
+                    for decoded in self._decoder.decode(sequences)]
+        tagger = self._get_tagger()
+        return [[_decode_tag(tag) for tag in tagger.tag(sequence)]
+                for sequence in sequences]
+
     @property
     def fitted(self):
         """Whether or not the slot filler has already been fitted"""
         return self.slot_name_mapping is not None
 
+    @fitted_required
+    def get_used_builtin_entities(self):
+        """Builtin entities of the slots, along with the ones whose features
+        are known to the CRF"""
+        builtin_entities = set(
+            entity for entity in itervalues(self.slot_name_mapping)
+            if is_builtin_entity(entity))
+        attributes = self._get_attributes()
+        if attributes is None:
+            # No CRF is used when the intent has no slots
+            return builtin_entities
+        for factory in self.features_factories:
+            builtin_entities = merge_required_builtin_entities(
+                builtin_entities,
+                factory.get_used_builtin_entities(self.language, attributes))
+        return builtin_entities
+
     @log_elapsed_time(logger, logging.DEBUG,
                       "Fitted CRFSlotFiller in {elapsed_time}")
     # pylint:disable=arguments-differ
-    def fit(self, dataset, intent):
+    def fit(self, dataset, intent, training_features_cache=None):
         """Fit the slot filler
 
         Args:
             dataset (dict): A valid Snips dataset
             intent (str): The specific intent of the dataset to train
                 the slot filler on
+            training_features_cache (:class:`TrainingFeaturesCache`,
+                optional): Cache of the feature values of the training
+                utterances, to share with the other slot fillers trained on
+                the same dataset
 
         Returns:
             :class:`CRFSlotFiller`: The same instance, trained
@@ -135,7 +242,14 @@ class CRFSlotFiller(SlotFiller):
         # Ensure that X, Y are safe and that the OUTSIDE label is learnt to
         # avoid segfault at inference time
         # pylint: disable=C0103
-        X = [self.compute_features(sample[TOKENS], drop_out=True)
+        if training_features_cache is None:
+            training_features_cache = TrainingFeaturesCache()
+        intent_features_names = set(
+            feature.base_name for factory in self.features_factories
+            if factory.depends_on_intent
+            for feature in factory.build_features())
+        X = [self._compute_training_features(
+            sample[TOKENS], training_features_cache, intent_features_names)
              for sample in crf_samples]
         Y = [[tag for tag in sample[TAGS]] for sample in crf_samples]
         X, Y = _ensure_safe(X, Y)
@@ -146,6 +260,7 @@ class CRFSlotFiller(SlotFiller):
         # pylint: enable=C0103
         self.crf_model = _get_crf_model(self.config.crf_args)
         self.crf_model.fit(X, Y)
+        self._load_model()
 
         logger.debug(
             "Most relevant features for %s:\n%s", self.intent,
@@ -154,10 +269,18 @@ class CRFSlotFiller(SlotFiller):
 
     # pylint:enable=arguments-differ
 
+    # pylint:disable=arguments-differ
     @fitted_required
-    def get_slots(self, text):
+    def get_slots(self, text, tokens=None, features_cache=None):
         """Extracts slots from the provided text
 
+        Args:
+            text (str): Input
+            tokens (list of :class:`.Token`, optional): Tokens of *text*, if
+                they have already been computed
+            features_cache (list of dict, optional): Cache of feature values
+                of the tokens, see :func:`compute_features`
+
         Returns:
             list of dict: The list of extracted slots
 
@@ -168,12 +291,48 @@ class CRFSlotFiller(SlotFiller):
             # Early return if the intent has no slots
             return []
 
-        tokens = tokenize(text, self.language)
+        if tokens is None:
+            tokens = tokenize(text, self.language)
         if not tokens:
             return []
-        features = self.compute_features(tokens)
-        tags = [_decode_tag(tag) for tag in
-                self.crf_model.predict_single(features)]
+        features = self._encode_features(
+            self.compute_features(tokens, cache=features_cache))
+        tags = self._tag([features])[0]
+        return self._get_slots_from_tags(text, tokens, tags, features)
+
+    # pylint:enable=arguments-differ
+
+    @fitted_required
+    def get_slots_batch(self, texts):
+        """Extracts the slots of several texts at once
+
+        With the "numpy" inference backend, the CRF decodes all the texts in
+        a single padded batch.
+
+        Args:
+            texts (list of str): Inputs
+
+        Returns:
+            list of list of dict: The slots extracted from each text
+
+        Raises:
+            NotTrained: When the slot filler is not fitted
+        """
+        if self._decoder is None or not self.slot_name_mapping:
+            return super(CRFSlotFiller, self).get_slots_batch(texts)
+
+        slots = [[] for _ in texts]
+        tokens = [tokenize(text, self.language) for text in texts]
+        indexes = [i for i, text_tokens in enumerate(tokens) if text_tokens]
+        features = [self._encode_features(self.compute_features(tokens[i]))
+                    for i in indexes]
+        for i, text_features, tags in zip(indexes, features,
+                                          self._tag(features)):
+            slots[i] = self._get_slots_from_tags(
+                texts[i], tokens[i], tags, text_features)
+        return slots
+
+    def _get_slots_from_tags(self, text, tokens, tags, features):
         slots = tags_to_slots(text, tokens, tags, self.config.tagging_scheme,
                               self.slot_name_mapping)
 
@@ -183,19 +342,29 @@ class CRFSlotFiller(SlotFiller):
         if not builtin_slots_names:
             return slots
 
+        if should_degrade(DEGRADATION_BUILTIN_SLOTS_RESCORING):
+            return slots
+
         # Replace tags corresponding to builtin entities by outside tags
         tags = _replace_builtin_tags(tags, builtin_slots_names)
-        return self._augment_slots(text, tokens, tags, builtin_slots_names)
+        return self._augment_slots(text, tokens, tags, builtin_slots_names,
+                                   features)
 
-    def compute_features(self, tokens, drop_out=False):
+    def compute_features(self, tokens, drop_out=False, cache=None):
         """Compute features on the provided tokens
 
         The *drop_out* parameters allows to activate drop out on features that
         have a positive drop out ratio. This should only be used during
         training.
+
+        The *cache* parameter, built with :func:`get_features_cache`, allows
+        to share the feature values computed on the same tokens between slot
+        fillers whose features are computed identically, such as the slot
+        fillers of a :class:`.ProbabilisticIntentParser`.
         """
 
-        cache = [{TOKEN_NAME: token} for token in tokens]
+        if cache is None:
+            cache = get_features_cache(tokens)
         features = []
         random_state = check_random_state(self.config.random_seed)
         for i in range(len(tokens)):
@@ -210,6 +379,13 @@ class CRFSlotFiller(SlotFiller):
             features.append(token_features)
         return features
 
+    def _compute_training_features(self, tokens, training_features_cache,
+                                   intent_features_names):
+        cache = training_features_cache.get_cache(tokens)
+        features = self.compute_features(tokens, drop_out=True, cache=cache)
+        training_features_cache.update(tokens, cache, intent_features_names)
+        return features
+
     @fitted_required
     def get_sequence_probability(self, tokens, labels):
         """Gives the joint probability of a sequence of tokens and CRF labels
@@ -226,20 +402,34 @@ class CRFSlotFiller(SlotFiller):
         """
         if not self.slot_name_mapping:
             return 0.0 if any(label != OUTSIDE for label in labels) else 1.0
-        features = self.compute_features(tokens)
+        features = self._encode_features(self.compute_features(tokens))
         return self._get_sequence_probability(features, labels)
 
     @fitted_required
     def _get_sequence_probability(self, features, labels):
+        cleaned_labels = self._clean_labels(labels)
+        if self._decoder is not None:
+            cleaned_labels = [label.decode("utf8") for label in cleaned_labels]
+            return self._decoder.get_sequences_probabilities(
+                [features], [cleaned_labels])[0]
+        tagger = self._get_tagger()
+        tagger.set(features)
+        return tagger.probability(cleaned_labels)
+
+    def _get_labels_probabilities(self, features, labels):
+        # The numpy decoder scores all the sequences of labels at once
+        labels = [[label.decode("utf8") for label in self._clean_labels(l)]
+                  for l in labels]
+        return self._decoder.get_labels_probabilities(features, labels)
+
+    def _clean_labels(self, labels):
         # Use a default substitution label when a label was not seen during
         # training
-        substitution_label = OUTSIDE if OUTSIDE in self.labels else \
-            self.labels[0]
-        cleaned_labels = [
-            _encode_tag(substitution_label if l not in self.labels else l)
-            for l in labels]
-        self.crf_model.tagger_.set(features)
-        return self.crf_model.tagger_.probability(cleaned_labels)
+        crf_labels = self.labels
+        substitution_label = OUTSIDE if OUTSIDE in crf_labels else \
+            crf_labels[0]
+        return [_encode_tag(substitution_label if l not in crf_labels else l)
+                for l in labels]
 
     @fitted_required
     def log_weights(self):
@@ -268,7 +458,8 @@ class CRFSlotFiller(SlotFiller):
             log += "\n%s %s: %s" % (feat, _decode_tag(tag), weight)
         return log
 
-    def _augment_slots(self, text, tokens, tags, builtin_slots_names):
+    def _augment_slots(self, text, tokens, tags, builtin_slots_names,
+                       features=None):
         scope = set(self.slot_name_mapping[slot]
                     for slot in builtin_slots_names)
         builtin_entities = [
@@ -294,7 +485,8 @@ class CRFSlotFiller(SlotFiller):
             grouped_entities,
             key=lambda entities: entities[0][RES_MATCH_RANGE][START])
 
-        features = self.compute_features(tokens)
+        if features is None:
+            features = self._encode_features(self.compute_features(tokens))
         spans_ranges = [entities[0][RES_MATCH_RANGE]
                         for entities in grouped_entities]
         tokens_indexes = _spans_to_tokens_indexes(spans_ranges, tokens)
@@ -303,8 +495,7 @@ class CRFSlotFiller(SlotFiller):
         # the best one in terms of probability
         slots_permutations = _get_slots_permutations(
             grouped_entities, self.slot_name_mapping)
-        best_updated_tags = tags
-        best_permutation_score = -1
+        permutations_tags = []
         for slots in slots_permutations:
             updated_tags = copy(tags)
             for slot_index, slot in enumerate(slots):
@@ -312,7 +503,25 @@ class CRFSlotFiller(SlotFiller):
                 sub_tags_sequence = positive_tagging(
                     self.config.tagging_scheme, slot, len(indexes))
                 updated_tags[indexes[0]:indexes[-1] + 1] = sub_tags_sequence
-            score = self._get_sequence_probability(features, updated_tags)
+            permutations_tags.append(updated_tags)
+        if self._decoder is not None:
+            # All the permutations are scored in a single pass, which costs
+            # about as much as scoring the first one
+            scores = self._get_labels_probabilities(features,
+                                                    permutations_tags)
+        else:
+            scores = []
+            for i, updated_tags in enumerate(permutations_tags):
+                # The best permutation found so far is used once the latency
+                # budget is exhausted
+                if i > 0 and should_degrade(
+                        DEGRADATION_BUILTIN_SLOTS_RESCORING):
+                    break
+                scores.append(
+                    self._get_sequence_probability(features, updated_tags))
+        best_updated_tags = tags
+        best_permutation_score = -1
+        for updated_tags, score in zip(permutations_tags, scores):
             if score > best_permutation_score:
                 best_updated_tags = updated_tags
                 best_permutation_score = score
@@ -372,6 +581,7 @@ class CRFSlotFiller(SlotFiller):
         if crf_model_file is not None:
             crf = _crf_model_from_path(path / crf_model_file)
             slot_filler.crf_model = crf
+            slot_filler._load_model()  # pylint:disable=protected-access
         return slot_filler
 
     def __del__(self):
@@ -509,6 +719,62 @@ def _crf_model_from_path(crf_model_path):
         crf = CRF(model_filename=f.name)
     return crf
 
+
+def get_features_cache(tokens):
+    """Creates a cache of feature values to pass to
+    :func:`CRFSlotFiller.compute_features`"""
+    return [{TOKEN_NAME: token} for token in tokens]
+
+
+class TrainingFeaturesCache(object):
+    """Cache of the feature values of the training utterances, shared by the
+    slot fillers trained on the same dataset
+
+    The values of the features which do not depend on the intent, such as
+    n-grams, shapes, word clusters or builtin entity matches, are computed
+    once per token sequence. The values of the features built by the
+    factories which depend on the intent, such as the custom entity matches,
+    are computed by each slot filler.
+
+    The slot fillers sharing a cache must compute their features identically,
+    like the slot fillers of a :class:`.ProbabilisticIntentParser`.
+    """
+
+    def __init__(self):
+        self._caches = dict()
+
+    def __len__(self):
+        return len(self._caches)
+
+    def get_cache(self, tokens):
+        """Returns a cache of feature values to pass to
+        :func:`CRFSlotFiller.compute_features`, filled with the values
+        already computed on the same token sequence"""
+        cache = get_features_cache(tokens)
+        shared_cache = self._caches.get(_get_tokens_key(tokens))
+        if shared_cache is not None:
+            for token_values, shared_values in zip(cache, shared_cache):
+                token_values.update(shared_values)
+        return cache
+
+    def update(self, tokens, cache, intent_features_names):
+        """Stores the values of a cache returned by :func:`get_cache`, except
+        the ones of the features whose base name is in
+        *intent_features_names*"""
+        shared_cache = []
+        for token_values in cache:
+            token_values = dict(token_values)
+            token_values.pop(TOKEN_NAME)
+            for name in intent_features_names:
+                token_values.pop(name, None)
+            shared_cache.append(token_values)
+        self._caches[_get_tokens_key(tokens)] = shared_cache
+
+
+def _get_tokens_key(tokens):
+    return tuple((token.value, token.start, token.end) for token in tokens)
+
+
 # pylint: disable=invalid-name
 def _ensure_safe(X, Y):
     """Ensure that Y has at least one not empty label, otherwise the CRF model
@@ -7,7 +7,8 @@ from future.utils import iteritems, with_metaclass
 from snips_nlu_ontology.builtin_entities import get_supported_entities
 from snips_nlu_utils import get_shape, normalize
 
-from snips_nlu.builtin_entities import get_builtin_entities
+from snips_nlu.builtin_entities import (
+    get_builtin_entities, get_builtin_entities_scope)
 from snips_nlu.constants import (END, GAZETTEERS, LANGUAGE, NGRAM,
                                  RES_MATCH_RANGE, START, STEMS, TOKEN_INDEXES,
                                  UTTERANCES, WORD_CLUSTERS)
@@ -36,8 +37,14 @@ class CRFFeatureFactory(with_metaclass(ABCMeta, object)):
 
 
     In addition, a 'drop_out' to use during train time can be specified.
+
+    The values of the features are assumed not to depend on the intent which
+    the factory is fitted on, so that they can be shared across slot fillers
+    during training, unless *depends_on_intent* is set to *True*.
     """
 
+    depends_on_intent = False
+
     def __init__(self, factory_config):
         self.factory_config = factory_config
 
@@ -70,6 +77,18 @@ class CRFFeatureFactory(with_metaclass(ABCMeta, object)):
     def get_required_resources(self):
         return None
 
+    def get_required_builtin_entities(self, language):
+        """Builtin entities which the features need to parse in the given
+        *language*"""
+        return set()
+
+    def get_used_builtin_entities(self, language, attributes):
+        """Builtin entities which the features need to parse in the given
+        *language* once the CRF is trained, *attributes* being the attributes
+        known to the CRF"""
+        # pylint: disable=unused-argument
+        return self.get_required_builtin_entities(language)
+
 
 class SingleFeatureFactory(with_metaclass(ABCMeta, CRFFeatureFactory)):
     """A CRF feature factory which produces only one feature"""
@@ -379,6 +398,7 @@ class EntityMatchFactory(CRFFeatureFactory):
     """
 
     name = "entity_match"
+    depends_on_intent = True
 
     def __init__(self, factory_config):
         super(EntityMatchFactory, self).__init__(factory_config)
@@ -496,9 +516,24 @@ class BuiltinEntityMatchFactory(CRFFeatureFactory):
 
     def fit(self, dataset, intent):
         self.language = dataset[LANGUAGE]
-        self.builtin_entities = list(get_supported_entities(self.language))
+        self.builtin_entities = list(
+            self.get_required_builtin_entities(self.language))
         self.args["entity_labels"] = self.builtin_entities
 
+    def get_required_builtin_entities(self, language):
+        return get_supported_entities(language)
+
+    def get_used_builtin_entities(self, language, attributes):
+        # The features of a builtin entity which are unknown to the CRF have
+        # no weight, and thus do not need to be computed
+        used_entities = set()
+        for builtin_entity in self.builtin_entities:
+            feature_name = "builtin_entity_match_%s" % builtin_entity
+            if any(_is_feature_attribute(attribute, feature_name)
+                   for attribute in attributes):
+                used_entities.add(builtin_entity)
+        return used_entities
+
     def build_features(self):
         features = []
 
@@ -517,6 +552,11 @@ class BuiltinEntityMatchFactory(CRFFeatureFactory):
     def _build_entity_match_fn(self, builtin_entity):
 
         def builtin_entity_match(tokens, token_index):
+            # Builtin entities out of the scope of the NLU engine are not used
+            # by its CRFs, see SnipsNLUEngine.builtin_entities_scope
+            scope = get_builtin_entities_scope()
+            if scope is not None and builtin_entity not in scope:
+                return None
             text = initial_string_from_tokens(tokens)
             start = tokens[token_index].start
             end = tokens[token_index].end
@@ -539,6 +579,15 @@ class BuiltinEntityMatchFactory(CRFFeatureFactory):
         return builtin_entity_match
 
 
+def _is_feature_attribute(attribute, feature_name):
+    # CRF attributes are made of the feature name, an optional offset such as
+    # "[+1]" and an optional ":" followed by the value
+    if not attribute.startswith(feature_name):
+        return False
+    suffix = attribute[len(feature_name):]
+    return not suffix or suffix[0] in "[:"
+
+
 FACTORIES = [IsDigitFactory, IsFirstFactory, IsLastFactory, PrefixFactory,
              SuffixFactory, LengthFactory, NgramFactory, ShapeNgramFactory,
              WordClusterFactory, EntityMatchFactory, BuiltinEntityMatchFactory]
@@ -5,19 +5,20 @@ from snips_nlu_utils import compute_all_ngrams
 from snips_nlu.builtin_entities import is_builtin_entity
 from snips_nlu.constants import (DATA, END, ENTITIES, ENTITY, INTENTS,
                                  RES_MATCH_RANGE, START, UTTERANCES)
-from snips_nlu.utils import LimitedSizeDict
+from snips_nlu.utils import LRUCache
 
-_NGRAMS_CACHE = LimitedSizeDict(size_limit=1000)
+_NGRAMS_CACHE = LRUCache(size_limit=1000)
 
 
 def get_all_ngrams(tokens):
     if not tokens:
         return []
     key = "<||>".join(tokens)
-    if key not in _NGRAMS_CACHE:
+    ngrams = _NGRAMS_CACHE.get(key)
+    if ngrams is None:
         ngrams = compute_all_ngrams(tokens, len(tokens))
-        _NGRAMS_CACHE[key] = ngrams
-    return _NGRAMS_CACHE[key]
+        _NGRAMS_CACHE.put(key, ngrams)
+    return ngrams
 
 
 def get_word_chunk(word, chunk_size, chunk_start, reverse=False):
@@ -26,3 +26,21 @@ class SlotFiller(with_metaclass(ABCMeta, ProcessingUnit)):
                 :func:`.unresolved_slot` for the output format of a slot
         """
         pass
+
+    def get_slots_batch(self, texts):
+        """Performs slot extraction on several *texts* at once
+
+        By default, :func:`get_slots` is called on each text.
+
+        Returns:
+            list of list of dict: The list of slots extracted from each text
+        """
+        return [self.get_slots(text) for text in texts]
+
+    def warmup(self):
+        """Eagerly initializes the components which would otherwise be
+        lazily initialized when extracting the slots of the first queries
+
+        By default, nothing is done.
+        """
+        pass
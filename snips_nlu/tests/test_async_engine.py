@@ -0,0 +1,100 @@
+from __future__ import unicode_literals
+
+import sys
+from unittest import skipIf
+
+from snips_nlu.constants import RES_INTENT, RES_INTENT_NAME
+from snips_nlu.nlu_engine import SnipsNLUEngine
+from snips_nlu.tests.utils import BEVERAGE_DATASET, SnipsTest
+
+
+@skipIf(sys.version_info[0] < 3, "asyncio requires Python 3")
+class TestAsyncNLUEngine(SnipsTest):
+    def setUp(self):
+        super(TestAsyncNLUEngine, self).setUp()
+        import asyncio
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.engine = SnipsNLUEngine().fit(BEVERAGE_DATASET)
+
+    def tearDown(self):
+        import asyncio
+        asyncio.set_event_loop(None)
+        self.loop.close()
+        super(TestAsyncNLUEngine, self).tearDown()
+
+    def _gather(self, futures):
+        import asyncio
+        return self.loop.run_until_complete(
+            asyncio.gather(*futures, return_exceptions=True))
+
+    def test_should_parse_requests_by_batches(self):
+        # Given
+        from snips_nlu.nlu_engine.async_engine import AsyncNLUEngine
+        async_engine = AsyncNLUEngine(self.engine, max_batch_size=4,
+                                      max_wait_ms=10)
+        texts = [
+            "Give me 3 cups of hot tea please",
+            "make me two cups of coffee",
+            "I want 4 iced teas",
+            "hello world",
+            "brew a boiling tea"
+        ] * 2
+
+        # When
+        futures = [async_engine.parse(text) for text in texts]
+        queue_depth = async_engine.metrics["queue_depth"]
+        results = self._gather(futures)
+        async_engine.close()
+
+        # Then
+        self.assertListEqual([self.engine.parse(text) for text in texts],
+                             results)
+        self.assertEqual(2, queue_depth)
+        expected_metrics = {
+            "queue_depth": 0,
+            "in_flight": 0,
+            "nb_batches": 3,
+            "mean_batch_size": 10 / 3,
+            "batch_sizes": {4: 2, 2: 1}
+        }
+        self.assertDictEqual(expected_metrics, async_engine.metrics)
+
+    def test_should_batch_requests_with_same_intents_filter(self):
+        # Given
+        from snips_nlu.nlu_engine.async_engine import AsyncNLUEngine
+        async_engine = AsyncNLUEngine(self.engine)
+        text = "Give me 3 cups of hot tea please"
+
+        # When
+        results = self._gather([
+            async_engine.parse(text),
+            async_engine.parse(text, intents=["MakeCoffee"]),
+            async_engine.parse(text, intents="MakeCoffee")
+        ])
+        async_engine.close()
+
+        # Then
+        self.assertDictEqual(self.engine.parse(text), results[0])
+        for res in results[1:]:
+            self.assertEqual("MakeCoffee",
+                             res[RES_INTENT][RES_INTENT_NAME])
+        self.assertDictEqual({2: 1, 1: 1},
+                             async_engine.metrics["batch_sizes"])
+
+    def test_should_isolate_failing_requests(self):
+        # Given
+        from snips_nlu.nlu_engine.async_engine import AsyncNLUEngine
+        async_engine = AsyncNLUEngine(self.engine)
+        text = "make me two cups of coffee"
+
+        # When
+        results = self._gather([
+            async_engine.parse(text),
+            async_engine.parse(b"make me two cups of coffee")
+        ])
+        async_engine.close()
+
+        # Then
+        self.assertDictEqual(self.engine.parse(text), results[0])
+        self.assertIsInstance(results[1], TypeError)
@@ -1,9 +1,11 @@
-from __future__ import unicode_literals
+from __future__ import division, unicode_literals
 
+from mock import MagicMock, patch
 from snips_nlu_ontology import get_all_languages
 
-from snips_nlu.builtin_entities import (BuiltinEntityParser,
-                                        get_builtin_entities)
+from snips_nlu.builtin_entities import (
+    BuiltinEntityParser, REFERENCE_TIME_BUCKET_SIZE, builtin_entities_context,
+    get_builtin_entities, get_reference_time)
 from snips_nlu.constants import ENTITY_KIND
 from snips_nlu.tests.utils import SnipsTest
 
@@ -54,3 +56,107 @@ class TestBuiltInEntities(SnipsTest):
         # Then
         self.assertEqual(len(parse), 1)
         self.assertEqual(parse[0][ENTITY_KIND], "snips/number")
+
+    def test_get_builtin_entities_should_default_to_context_scope(self):
+        # Given
+        text = "meet me tomorrow at 10 p.m."
+
+        # When
+        with builtin_entities_context(scope=["snips/number"]):
+            parse = get_builtin_entities(text, "en")
+            datetime_parse = get_builtin_entities(
+                text, "en", scope=["snips/datetime"])
+
+        # Then
+        self.assertListEqual(["snips/number"],
+                             [ent[ENTITY_KIND] for ent in parse])
+        self.assertListEqual(["snips/datetime"],
+                             [ent[ENTITY_KIND] for ent in datetime_parse])
+
+    @patch("snips_nlu.builtin_entities.time")
+    def test_context_should_pin_reference_time(self, mocked_time):
+        # Given
+        mocked_time.time.return_value = 1000.
+
+        # When
+        with builtin_entities_context():
+            context_reference_time = get_reference_time()
+            mocked_time.time.return_value = 2000.
+            with builtin_entities_context():
+                nested_reference_time = get_reference_time()
+        reference_time_after_context = get_reference_time()
+
+        # Then
+        self.assertEqual(1000., context_reference_time)
+        self.assertEqual(1000., nested_reference_time)
+        self.assertEqual(2000., reference_time_after_context)
+
+    @patch("snips_nlu.builtin_entities.time")
+    def test_builtin_entities_should_be_cached_per_reference_time(
+            self, mocked_time):
+        # Given
+        time_dependent_text = "let's meet tomorrow"
+        time_independent_text = "we'll be 2 at the meeting"
+        parser = BuiltinEntityParser("en")
+        parser.parser = MagicMock(wraps=parser.parser)
+        reference_time = 1000.
+
+        # When
+        for shift in [0, 0, REFERENCE_TIME_BUCKET_SIZE]:
+            mocked_time.time.return_value = reference_time + shift
+            with builtin_entities_context():
+                parser.parse(time_dependent_text)
+                parser.parse(time_independent_text)
+
+        # Then
+        parsed_texts = [args[0] for args, _ in
+                        parser.parser.parse.call_args_list]
+        self.assertEqual(2, parsed_texts.count(time_dependent_text))
+        self.assertEqual(1, parsed_texts.count(time_independent_text))
+
+    def test_should_reuse_results_cached_with_wider_scope(self):
+        # Given
+        text = "we'll be 2 at the meeting"
+        parser = BuiltinEntityParser("en")
+        parser.parser = MagicMock(wraps=parser.parser)
+
+        # When
+        full_parse = parser.parse(text)
+        number_parse = parser.parse(text, scope=["snips/number"])
+        datetime_parse = parser.parse(text, scope=["snips/datetime"])
+        number_and_datetime_parse = parser.parse(
+            text, scope=["snips/number", "snips/datetime"])
+
+        # Then
+        self.assertEqual(full_parse, number_parse)
+        self.assertEqual(full_parse, number_and_datetime_parse)
+        self.assertListEqual([], datetime_parse)
+        scopes = [args[1] for args, _ in parser.parser.parse.call_args_list]
+        self.assertListEqual([None, ["snips/datetime"]], scopes)
+
+    def test_cache_should_evict_least_recently_used_texts(self):
+        # Given
+        parser = BuiltinEntityParser("en", cache_size=2)
+        parser.parser = MagicMock(wraps=parser.parser)
+
+        # When
+        parser.parse("1 apple")
+        parser.parse("2 apples")
+        parser.parse("1 apple")
+        parser.parse("3 apples")
+        parser.parse("2 apples")
+        parser.parse("3 apples")
+
+        # Then
+        parsed_texts = [args[0] for args, _ in
+                        parser.parser.parse.call_args_list]
+        self.assertListEqual(["1 apple", "2 apples", "3 apples", "2 apples"],
+                             parsed_texts)
+        expected_stats = {
+            "hits": 2,
+            "misses": 4,
+            "evictions": 2,
+            "hit_rate": 2 / 6,
+            "size": 2
+        }
+        self.assertDictEqual(expected_stats, parser.cache_stats)
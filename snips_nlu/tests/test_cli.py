@@ -1,16 +1,23 @@
 # coding=utf-8
 from __future__ import unicode_literals
 
+import json
 import shutil
 import tempfile
+from threading import Thread
+
+from future.moves.http.client import HTTPConnection
 
 from snips_nlu import SnipsNLUEngine
-from snips_nlu.cli import cross_val_metrics, parse, train, train_test_metrics
+from snips_nlu.cli import (
+    cross_val_metrics, parse, parse_file, train, train_test_metrics)
+from snips_nlu.cli.serve import NLUServer, run_load_test
 from snips_nlu.cli.dataset import AssistantDataset
 from snips_nlu.cli.dataset.entities import CustomEntity
 from snips_nlu.cli.dataset.intent_dataset import IntentDataset
 from snips_nlu.constants import PACKAGE_PATH
 from snips_nlu.dataset import validate_and_format_dataset
+from snips_nlu.result import empty_result
 from snips_nlu.tests.utils import BEVERAGE_DATASET_PATH, SnipsTest, TEST_PATH
 
 
@@ -56,6 +63,121 @@ class TestCLI(SnipsTest):
         with self.fail_if_exception("Failed to parse using CLI script"):
             parse(str(self.tmp_file_path), "Make me two cups of coffee")
 
+    def test_parse_file(self):
+        # Given
+        train(BEVERAGE_DATASET_PATH, str(self.tmp_file_path), config_path=None)
+        engine = SnipsNLUEngine.from_path(self.tmp_file_path)
+        texts = ["Make me two cups of coffee", "I want 3 iced teas",
+                 "hello world"] * 3
+        text_input_path = self.fixture_dir / "queries.txt"
+        with text_input_path.open("w", encoding="utf8") as f:
+            f.write("\n".join(texts))
+        jsonl_input_path = self.fixture_dir / "queries.jsonl"
+        with jsonl_input_path.open("w", encoding="utf8") as f:
+            f.write("\n".join(json.dumps({"text": t}) for t in texts))
+        output_path = self.fixture_dir / "results.jsonl"
+
+        # When
+        all_results = []
+        for input_path, workers in [(text_input_path, 1),
+                                    (jsonl_input_path, 2)]:
+            parse_file(str(self.tmp_file_path), str(input_path),
+                       str(output_path), workers=workers, chunk_size=2)
+            with output_path.open(encoding="utf8") as f:
+                all_results.append([json.loads(line) for line in f])
+
+        # Then
+        expected_results = [engine.parse(text) for text in texts]
+        for results in all_results:
+            self.assertListEqual(expected_results, results)
+
+    def test_parse_file_should_keep_results_aligned_with_lines(self):
+        # Given
+        train(BEVERAGE_DATASET_PATH, str(self.tmp_file_path), config_path=None)
+        engine = SnipsNLUEngine.from_path(self.tmp_file_path)
+        lines = [
+            json.dumps({"text": "Make me two cups of coffee"}),
+            "",
+            "{not json",
+            json.dumps({"query": "I want 3 iced teas"}),
+            json.dumps(["I want 3 iced teas"]),
+            json.dumps({"text": 3}),
+            json.dumps({"text": "I want 3 iced teas"})
+        ]
+        input_path = self.fixture_dir / "queries.jsonl"
+        with input_path.open("w", encoding="utf8") as f:
+            f.write("\n".join(lines))
+        output_path = self.fixture_dir / "results.jsonl"
+
+        # When
+        parse_file(str(self.tmp_file_path), str(input_path), str(output_path),
+                   workers=1, chunk_size=2)
+
+        # Then
+        with output_path.open(encoding="utf8") as f:
+            results = [json.loads(line) for line in f]
+        expected_results = [engine.parse("Make me two cups of coffee")] \
+                           + [empty_result("")] * 5 \
+                           + [engine.parse("I want 3 iced teas")]
+        self.assertListEqual(expected_results, results)
+
+    def test_serve(self):
+        # Given
+        train(BEVERAGE_DATASET_PATH, str(self.tmp_file_path), config_path=None)
+        engine = SnipsNLUEngine.from_path(self.tmp_file_path)
+        text = "Make me two cups of coffee"
+        server = NLUServer(str(self.tmp_file_path), ("127.0.0.1", 0),
+                           workers=1, cache_size=10, warmup=False)
+        thread = Thread(target=server.serve_forever)
+        thread.start()
+
+        def request(connection, method, endpoint, body=None):
+            if body is not None:
+                body = json.dumps(body).encode("utf8")
+            connection.request(method, endpoint, body)
+            response = connection.getresponse()
+            return response.status, json.loads(
+                response.read().decode("utf8"))
+
+        try:
+            # When
+            connection = HTTPConnection("127.0.0.1", server.server_port)
+            parse_res = request(connection, "POST", "/parse", {"text": text})
+            # The same connection is kept alive between requests
+            batch_res = request(connection, "POST", "/parse_batch",
+                                {"texts": [text, text]})
+            bad_request_res = request(connection, "POST", "/parse",
+                                      {"texts": [text]})
+            not_found_res = request(connection, "GET", "/unknown")
+            metrics_res = request(connection, "GET", "/metrics")
+            connection.close()
+            load_test_report = run_load_test(
+                "http://127.0.0.1:%s" % server.server_port, [text],
+                nb_requests=6, concurrency=2)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        # Then
+        self.assertEqual((200, engine.parse(text)), parse_res)
+        self.assertEqual((200, [engine.parse(text)] * 2), batch_res)
+        self.assertEqual(400, bad_request_res[0])
+        self.assertEqual(404, not_found_res[0])
+        status, metrics = metrics_res
+        self.assertEqual(200, status)
+        self.assertEqual({"/parse": 2, "/parse_batch": 1, "/unknown": 1},
+                         metrics["requests"])
+        self.assertEqual({"/parse": 1, "/unknown": 1}, metrics["errors"])
+        self.assertEqual(3, metrics["parsed_texts"])
+        self.assertEqual(2, metrics["latencies"]["parse"]["count"])
+        parse_cache_stats = metrics["caches"]["parse"]
+        self.assertEqual(2, parse_cache_stats["hits"])
+        self.assertEqual(1, parse_cache_stats["misses"])
+        self.assertEqual(0, load_test_report["errors"])
+        self.assertEqual(6, load_test_report["requests"])
+        self.assertIn("p99", load_test_report["latency_ms"])
+
     def test_cross_val_metrics(self):
         # Given / When
         cross_val_metrics(str(BEVERAGE_DATASET_PATH), str(self.tmp_file_path))
@@ -56,7 +56,10 @@ class TestConfig(SnipsTest):
         config_dict = {
             "sublinear_tf": True,
             "pvalue_threshold": 0.4,
-            "word_clusters_name": None
+            "word_clusters_name": None,
+            "feature_hashing_size": None,
+            "n_jobs": 1,
+            "preprocessing_chunk_size": 200
         }
 
         # When
@@ -73,7 +76,8 @@ class TestConfig(SnipsTest):
             "data_augmentation_config":
                 IntentClassifierDataAugmentationConfig().to_dict(),
             "featurizer_config": FeaturizerConfig().to_dict(),
-            "random_seed": 42
+            "random_seed": 42,
+            "replay_buffer_size": 50
         }
 
         # When
@@ -112,7 +116,8 @@ class TestConfig(SnipsTest):
             },
             "data_augmentation_config":
                 SlotFillerDataAugmentationConfig().to_dict(),
-            "random_seed": 43
+            "random_seed": 43,
+            "inference_backend": "numpy"
         }
 
         # When
@@ -143,7 +148,8 @@ class TestConfig(SnipsTest):
         config_dict = {
             "unit_name": "deterministic_intent_parser",
             "max_queries": 666,
-            "max_pattern_length": 333
+            "max_pattern_length": 333,
+            "regex_cache_size": 3
         }
 
         # When
@@ -153,6 +159,14 @@ class TestConfig(SnipsTest):
         # Then
         self.assertDictEqual(config_dict, serialized_config)
 
+    def test_deterministic_parser_config_should_validate_regex_cache_size(
+            self):
+        # When / Then
+        for regex_cache_size in [0, -1]:
+            with self.assertRaises(ValueError):
+                DeterministicIntentParserConfig(
+                    regex_cache_size=regex_cache_size)
+
     def test_nlu_config_from_dict(self):
         # Given
         config_dict = {
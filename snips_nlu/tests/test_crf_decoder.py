@@ -0,0 +1,107 @@
+from __future__ import unicode_literals
+
+from builtins import range
+
+from pycrfsuite import Tagger
+
+from snips_nlu.constants import LANGUAGE_EN
+from snips_nlu.pipeline.configs import CRFSlotFillerConfig
+from snips_nlu.preprocessing import tokenize
+from snips_nlu.slot_filler import CRFSlotFiller
+from snips_nlu.slot_filler.crf_decoder import CRFDecoder
+from snips_nlu.tests.utils import FixtureTest, SAMPLE_DATASET
+
+
+class TestCRFDecoder(FixtureTest):
+    def setUp(self):
+        super(TestCRFDecoder, self).setUp()
+        config = CRFSlotFillerConfig(random_seed=42)
+        self.slot_filler = CRFSlotFiller(config).fit(
+            SAMPLE_DATASET, "dummy_intent_1")
+        self.model_file = self.slot_filler.crf_model.modelfile.name
+        self.tagger = Tagger()
+        self.tagger.open(self.model_file)
+        texts = [
+            "This is a dummy_a query with another dummy_c",
+            "dummy_b",
+            "dummy b dummy 3 at 10p.m.",
+            "yet another query with dummy_cc"
+        ]
+        self.sequences = [
+            self.slot_filler.compute_features(tokenize(text, LANGUAGE_EN))
+            for text in texts]
+
+    def tearDown(self):
+        self.tagger.close()
+        super(TestCRFDecoder, self).tearDown()
+
+    def test_should_decode_like_crfsuite(self):
+        # Given
+        decoder = CRFDecoder.from_model_file(self.model_file)
+
+        # When
+        decoded_sequences = decoder.decode(self.sequences)
+
+        # Then
+        self.assertListEqual(self.tagger.labels(), decoder.labels)
+        self.assertEqual(len(self.sequences), len(decoded_sequences))
+        for sequence, decoded in zip(self.sequences, decoded_sequences):
+            expected_labels = self.tagger.tag(sequence)
+            self.assertListEqual(expected_labels, decoded.labels)
+            self.assertAlmostEqual(self.tagger.probability(expected_labels),
+                                   decoded.probability)
+            self.assertEqual((len(sequence), len(decoder.labels)),
+                             decoded.marginals.shape)
+            for t in range(len(sequence)):
+                for i, label in enumerate(decoder.labels):
+                    self.assertAlmostEqual(self.tagger.marginal(label, t),
+                                           decoded.marginals[t, i])
+
+    def test_should_compute_sequences_probabilities_like_crfsuite(self):
+        # Given
+        decoder = CRFDecoder.from_model_file(self.model_file)
+        labels = decoder.labels
+        sequences_labels = [
+            [labels[(i + t) % len(labels)] for t in range(len(sequence))]
+            for i, sequence in enumerate(self.sequences)]
+
+        # When
+        probabilities = decoder.get_sequences_probabilities(
+            self.sequences, sequences_labels)
+
+        # Then
+        for sequence, sequence_labels, probability in zip(
+                self.sequences, sequences_labels, probabilities):
+            self.tagger.set(sequence)
+            self.assertAlmostEqual(self.tagger.probability(sequence_labels),
+                                   probability)
+
+    def test_should_compute_labels_probabilities_like_crfsuite(self):
+        # Given
+        decoder = CRFDecoder.from_model_file(self.model_file)
+        labels = decoder.labels
+        sequence = self.sequences[0]
+        sequences_labels = [
+            [labels[(i + t) % len(labels)] for t in range(len(sequence))]
+            for i in range(len(labels))]
+
+        # When
+        probabilities = decoder.get_labels_probabilities(sequence,
+                                                         sequences_labels)
+
+        # Then
+        self.tagger.set(sequence)
+        expected_probabilities = [self.tagger.probability(sequence_labels)
+                                  for sequence_labels in sequences_labels]
+        self.assertEqual(len(expected_probabilities), len(probabilities))
+        for expected_probability, probability in zip(expected_probabilities,
+                                                     probabilities):
+            self.assertAlmostEqual(expected_probability, probability)
+
+    def test_should_not_decode_invalid_model_file(self):
+        # Given
+        self.writeFileContent(self.tmp_file_path, "not a crfsuite model")
+
+        # When / Then
+        with self.assertRaises(ValueError):
+            CRFDecoder.from_model_file(self.tmp_file_path)
@@ -5,6 +5,7 @@ from copy import deepcopy
 
 from mock import MagicMock, patch
 
+from snips_nlu.builtin_entities import builtin_entities_context
 from snips_nlu.constants import LANGUAGE_EN, SNIPS_DATETIME, SNIPS_NUMBER
 from snips_nlu.dataset import validate_and_format_dataset
 from snips_nlu.preprocessing import tokenize
@@ -473,3 +474,36 @@ class TestCRFFeatures(SnipsTest):
         self.assertEqual(res7, None)
         self.assertEqual(res8, None)
         self.assertEqual(res9, None)
+
+    @patch("snips_nlu.slot_filler.feature_factory.get_supported_entities")
+    def test_builtin_entity_match_factory_should_skip_entities_out_of_scope(
+            self, mock_supported_entities):
+        # Given
+        mock_supported_entities.return_value = {SNIPS_NUMBER, SNIPS_DATETIME}
+        config = {
+            "factory_name": "builtin_entity_match",
+            "args": {
+                "tagging_scheme_code": TaggingScheme.BILOU.value,
+            },
+            "offsets": [0, 1]
+        }
+        tokens = tokenize("one tea tomorrow at 2pm", LANGUAGE_EN)
+        cache = [{TOKEN_NAME: token} for token in tokens]
+        factory = get_feature_factory(config)
+        factory.fit({"language": "en"}, None)
+        attributes = ["builtin_entity_match_snips/number[+1]:U-",
+                      "builtin_entity_match_snips/numberfoo:U-",
+                      "is_digit:1"]
+
+        # When
+        used_entities = factory.get_used_builtin_entities(LANGUAGE_EN,
+                                                          attributes)
+        features = sorted(factory.build_features(), key=lambda f: f.name)
+        with builtin_entities_context(scope=[SNIPS_NUMBER]):
+            datetime_res = features[0].compute(2, cache)
+            number_res = features[2].compute(0, cache)
+
+        # Then
+        self.assertSetEqual({SNIPS_NUMBER}, used_entities)
+        self.assertEqual(None, datetime_res)
+        self.assertEqual(UNIT_PREFIX, number_res)
@@ -9,10 +9,13 @@ from sklearn_crfsuite import CRF
 from snips_nlu.constants import (
     DATA, END, ENTITY, ENTITY_KIND, LANGUAGE_EN, RES_MATCH_RANGE, SLOT_NAME,
     SNIPS_DATETIME, START, TEXT, VALUE)
+from snips_nlu.deadline import (
+    DEGRADATION_BUILTIN_SLOTS_RESCORING, deadline_context)
 from snips_nlu.pipeline.configs import CRFSlotFillerConfig
 from snips_nlu.preprocessing import Token, tokenize
 from snips_nlu.result import unresolved_slot
 from snips_nlu.slot_filler.crf_slot_filler import (CRFSlotFiller,
+                                                   TrainingFeaturesCache,
                                                    _disambiguate_builtin_entities,
                                                    _ensure_safe,
                                                    _filter_overlapping_builtins,
@@ -71,6 +74,148 @@ class TestCRFSlotFiller(FixtureTest):
         ]
         self.assertListEqual(expected_slots, slots)
 
+    def test_should_not_rescore_builtin_slots_when_deadline_exhausted(self):
+        # Given
+        config = CRFSlotFillerConfig(random_seed=42)
+        slot_filler = CRFSlotFiller(config)
+        slot_filler.fit(BEVERAGE_DATASET, "MakeTea")
+        slot_filler._augment_slots = MagicMock()  # pylint: disable=W0212
+
+        # When
+        with deadline_context(0) as degradations:
+            slot_filler.get_slots("make me two cups of tea")
+
+        # Then
+        slot_filler._augment_slots.assert_not_called()  # pylint: disable=W0212
+        self.assertListEqual([DEGRADATION_BUILTIN_SLOTS_RESCORING],
+                             degradations)
+
+    def test_should_get_slots_batch_with_numpy_backend(self):
+        # Given
+        dataset = WEATHER_DATASET
+        intent = "SearchWeatherForecast"
+        config = CRFSlotFillerConfig(random_seed=42)
+        numpy_config = CRFSlotFillerConfig(random_seed=42,
+                                           inference_backend="numpy")
+        slot_filler = CRFSlotFiller(config).fit(dataset, intent)
+        numpy_slot_filler = CRFSlotFiller(numpy_config).fit(dataset, intent)
+        texts = [
+            "Give me the weather at 9p.m. in Paris",
+            "",
+            "what is the weather in Barcelona",
+            "Will it rain tomorrow in new york please"
+        ]
+
+        # When
+        slots = numpy_slot_filler.get_slots_batch(texts)
+
+        # Then
+        expected_slots = [slot_filler.get_slots(text) for text in texts]
+        self.assertListEqual(expected_slots, slots)
+
+    def test_should_augment_builtin_slots_with_numpy_backend(self):
+        # Given
+        dataset = BEVERAGE_DATASET
+        intent = "MakeTea"
+        config = CRFSlotFillerConfig(random_seed=42)
+        numpy_config = CRFSlotFillerConfig(random_seed=42,
+                                           inference_backend="numpy")
+        slot_filler = CRFSlotFiller(config).fit(dataset, intent)
+        numpy_slot_filler = CRFSlotFiller(numpy_config).fit(dataset, intent)
+        text = "Give me 3 cups of hot tea and 2 more"
+        tokens = tokenize(text, LANGUAGE_EN)
+        tags = ["O" for _ in tokens]
+
+        # When
+        # pylint: disable=protected-access
+        expected_slots = slot_filler._augment_slots(
+            text, tokens, tags, {"number_of_cups"})
+        slots = numpy_slot_filler._augment_slots(
+            text, tokens, tags, {"number_of_cups"})
+        # pylint: enable=protected-access
+
+        # Then
+        self.assertListEqual(expected_slots, slots)
+
+    def test_should_encode_features_with_known_attributes_only(self):
+        # Given
+        config = CRFSlotFillerConfig(random_seed=42)
+        slot_filler = CRFSlotFiller(config).fit(BEVERAGE_DATASET, "MakeTea")
+        tokens = tokenize("make me two cups of unknowntea", LANGUAGE_EN)
+        features = slot_filler.compute_features(tokens)
+        tagger = slot_filler._get_tagger()  # pylint: disable=W0212
+        known_attributes = set(tagger.info().attributes)
+
+        # When
+        # pylint: disable=W0212
+        encoded_features = slot_filler._encode_features(features)
+        # pylint: enable=W0212
+
+        # Then
+        items = encoded_features.items()
+        self.assertEqual(len(tokens), len(items))
+        self.assertIn("ngram_1:make", items[0])
+        self.assertNotIn("ngram_1:unknowntea", items[-1])
+        for item in items:
+            self.assertTrue(set(item).issubset(known_attributes))
+        labels = tagger.tag(features)
+        self.assertListEqual(labels, tagger.tag(encoded_features))
+        tagger.set(features)
+        expected_probability = tagger.probability(labels)
+        tagger.set(encoded_features)
+        self.assertAlmostEqual(expected_probability,
+                               tagger.probability(labels))
+
+    def test_should_fit_identically_with_shared_training_features_cache(self):
+        # Given
+        dataset = SAMPLE_DATASET
+        config = CRFSlotFillerConfig(random_seed=42)
+        training_features_cache = TrainingFeaturesCache()
+        CRFSlotFiller(config).fit(
+            dataset, "dummy_intent_2",
+            training_features_cache=training_features_cache)
+        nb_cached_sequences = len(training_features_cache)
+
+        # When
+        slot_filler = CRFSlotFiller(config).fit(
+            dataset, "dummy_intent_1",
+            training_features_cache=training_features_cache)
+
+        # Then
+        expected_slot_filler = CRFSlotFiller(config).fit(
+            dataset, "dummy_intent_1")
+        self.assertGreater(nb_cached_sequences, 0)
+        self.assertGreater(len(training_features_cache), nb_cached_sequences)
+        model_path = Path(slot_filler.crf_model.modelfile.name)
+        with model_path.open(mode="rb") as f:
+            model = f.read()
+        expected_model_path = Path(
+            expected_slot_filler.crf_model.modelfile.name)
+        with expected_model_path.open(mode="rb") as f:
+            expected_model = f.read()
+        self.assertEqual(expected_model, model)
+
+    def test_should_not_share_intent_dependent_features(self):
+        # Given
+        training_features_cache = TrainingFeaturesCache()
+        tokens = tokenize("hello world", LANGUAGE_EN)
+        other_tokens = tokenize("hello world", LANGUAGE_EN)
+        intent_features_names = {"entity_match_foo"}
+        cache = training_features_cache.get_cache(tokens)
+        cache[0]["ngram_1"] = "hello"
+        cache[0]["entity_match_foo"] = "B-"
+
+        # When
+        training_features_cache.update(tokens, cache, intent_features_names)
+        other_cache = training_features_cache.get_cache(other_tokens)
+
+        # Then
+        self.assertEqual(1, len(training_features_cache))
+        self.assertIs(other_tokens[0], other_cache[0]["token"])
+        self.assertIn("ngram_1", other_cache[0])
+        self.assertEqual("hello", other_cache[0]["ngram_1"])
+        self.assertNotIn("entity_match_foo", other_cache[0])
+
     def test_should_not_use_crf_when_dataset_with_no_slots(self):
         # Given
         dataset = {
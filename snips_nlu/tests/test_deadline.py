@@ -0,0 +1,56 @@
+from __future__ import unicode_literals
+
+from snips_nlu.deadline import (
+    DEGRADATION_SLOT_FILLING, deadline_context, get_degradation_counts,
+    get_degradations, get_remaining_time, reset_degradation_counts,
+    should_degrade)
+from snips_nlu.tests.utils import SnipsTest
+
+
+class TestDeadline(SnipsTest):
+    def setUp(self):
+        super(TestDeadline, self).setUp()
+        reset_degradation_counts()
+
+    def test_should_not_degrade_without_deadline(self):
+        # When
+        degraded = should_degrade(DEGRADATION_SLOT_FILLING)
+
+        # Then
+        self.assertFalse(degraded)
+        self.assertIsNone(get_remaining_time())
+        self.assertListEqual([], get_degradations())
+        self.assertEqual(0, get_degradation_counts()[DEGRADATION_SLOT_FILLING])
+
+    def test_should_degrade_once_deadline_is_exhausted(self):
+        # When
+        with deadline_context(1000) as degradations:
+            remaining_time = get_remaining_time()
+            degraded_in_time = should_degrade(DEGRADATION_SLOT_FILLING)
+            with deadline_context(0):
+                degraded_late = should_degrade(DEGRADATION_SLOT_FILLING)
+                nested_degradations = get_degradations()
+
+        # Then
+        self.assertTrue(0 < remaining_time <= 1)
+        self.assertFalse(degraded_in_time)
+        self.assertTrue(degraded_late)
+        self.assertListEqual([DEGRADATION_SLOT_FILLING], nested_degradations)
+        self.assertListEqual([], degradations)
+        self.assertIsNone(get_remaining_time())
+        self.assertEqual(1, get_degradation_counts()[DEGRADATION_SLOT_FILLING])
+
+    def test_nested_context_should_not_extend_deadline(self):
+        # When
+        with deadline_context(0):
+            with deadline_context(1000):
+                remaining_time = get_remaining_time()
+
+        # Then
+        self.assertLessEqual(remaining_time, 0)
+
+    def test_should_reject_negative_deadline(self):
+        # When / Then
+        with self.assertRaises(ValueError):
+            with deadline_context(-1):
+                pass
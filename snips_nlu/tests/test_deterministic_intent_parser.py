@@ -10,9 +10,9 @@ from snips_nlu.constants import (
     START, TEXT, VALUE)
 from snips_nlu.dataset import validate_and_format_dataset
 from snips_nlu.intent_parser.deterministic_intent_parser import (
-    DeterministicIntentParser, _deduplicate_overlapping_slots,
-    _get_range_shift, _replace_builtin_entities,
-    _replace_tokenized_out_characters)
+    DeterministicIntentParser, _PatternsPrefilter, _RangesMapping,
+    _deduplicate_overlapping_slots, _get_range_shift,
+    _replace_builtin_entities, _replace_tokenized_out_characters)
 from snips_nlu.pipeline.configs import DeterministicIntentParserConfig
 from snips_nlu.result import intent_classification_result, unresolved_slot
 from snips_nlu.tests.utils import FixtureTest, SAMPLE_DATASET, TEST_PATH, \
@@ -214,6 +214,153 @@ class TestDeterministicIntentParser(FixtureTest):
         self.assertEqual(intent_name_1, res_1[RES_INTENT][RES_INTENT_NAME])
         self.assertEqual(intent_name_2, res_2[RES_INTENT][RES_INTENT_NAME])
 
+    def test_should_parse_training_utterances_with_exact_match_index(self):
+        # Given
+        dataset = validate_and_format_dataset(self.slots_dataset)
+        parser = DeterministicIntentParser().fit(dataset)
+        text = "this is a DUMMY_1"
+
+        # When
+        parsing = parser.parse(text)
+        filtered_parsing = parser.parse(text, intents=["dummy_intent_2"])
+
+        # Then
+        expected_slots = [
+            unresolved_slot(match_range=(10, 17), value="DUMMY_1",
+                            entity="dummy_entity_1",
+                            slot_name="dummy_slot_name")
+        ]
+        self.assertEqual("dummy_intent_1",
+                         parsing[RES_INTENT][RES_INTENT_NAME])
+        self.assertListEqual(expected_slots, parsing[RES_SLOTS])
+        self.assertIsNone(filtered_parsing[RES_INTENT])
+        expected_stats = {"hits": 1, "misses": 1, "hit_rate": 0.5}
+        self.assertDictEqual(expected_stats, parser.exact_match_stats)
+
+    @patch("snips_nlu.intent_parser.deterministic_intent_parser"
+           ".get_builtin_entities")
+    def test_should_parse_builtin_slots_with_exact_match_index(
+            self, mock_get_builtin_entities):
+        # Given
+        dataset = validate_and_format_dataset(self.slots_dataset)
+        parser = DeterministicIntentParser().fit(dataset)
+        text = "Tomorrow evening there is a dummy_1"
+        mock_get_builtin_entities.return_value = [
+            {
+                RES_MATCH_RANGE: {START: 0, END: 16},
+                VALUE: "Tomorrow evening",
+                ENTITY_KIND: SNIPS_DATETIME
+            }
+        ]
+
+        # When
+        parsing = parser.parse(text)
+
+        # Then
+        expected_slots = [
+            unresolved_slot(match_range=(0, 16), value="Tomorrow evening",
+                            entity=SNIPS_DATETIME, slot_name="startTime"),
+            unresolved_slot(match_range=(28, 35), value="dummy_1",
+                            entity="dummy_entity_1",
+                            slot_name="dummy_slot_name")
+        ]
+        self.assertEqual("dummy_intent_1",
+                         parsing[RES_INTENT][RES_INTENT_NAME])
+        self.assertListEqual(expected_slots, parsing[RES_SLOTS])
+        self.assertEqual(1, parser.exact_match_stats["hits"])
+
+    def test_should_allocate_sequential_group_names(self):
+        # Given
+        dataset = validate_and_format_dataset(self.slots_dataset)
+
+        # When
+        parser = DeterministicIntentParser().fit(dataset)
+
+        # Then
+        nb_groups = len(parser.group_names_to_slot_names)
+        self.assertEqual(7, nb_groups)
+        self.assertSetEqual({"group_%s" % i for i in range(nb_groups)},
+                            set(parser.group_names_to_slot_names))
+
+    def test_should_anchor_patterns_with_longest_literal(self):
+        # Given
+        dataset = validate_and_format_dataset(self.slots_dataset)
+
+        # When
+        parser = DeterministicIntentParser().fit(dataset)
+
+        # Then
+        anchors = parser.anchors_per_intent["dummy_intent_1"]
+        self.assertEqual(3, len(anchors))
+        self.assertSetEqual({"another", "there", "this"}, set(anchors))
+
+    def test_should_prefilter_patterns_with_anchors(self):
+        # Given
+        patterns_per_intent = {
+            "intent_1": ["pattern_1", "pattern_2", "pattern_3"],
+            "intent_2": ["pattern_4"]
+        }
+        anchors_per_intent = {
+            "intent_1": ["hello", None, "world"],
+            "intent_2": ["bye"]
+        }
+        prefilter = _PatternsPrefilter(patterns_per_intent,
+                                       anchors_per_intent)
+
+        # When
+        candidates = prefilter.get_candidates(["HelloWorld", "foo"])
+        other_candidates = prefilter.get_candidates(["foo bar"])
+
+        # Then
+        expected_candidates = [("intent_1", 0), ("intent_1", 1),
+                               ("intent_1", 2)]
+        self.assertListEqual(expected_candidates, candidates)
+        self.assertListEqual([("intent_1", 1)], other_candidates)
+
+    def test_should_compile_patterns_lazily(self):
+        # Given
+        dataset = validate_and_format_dataset(
+            self.duplicated_utterances_dataset)
+        config = DeterministicIntentParserConfig(regex_cache_size=1)
+        parser_dict = DeterministicIntentParser(config).fit(dataset).to_dict()
+        parser = DeterministicIntentParser.from_dict(parser_dict)
+
+        # When
+        nb_compiled_before_parsing = len(parser._regexes_cache)
+        res_1 = parser.parse("Hello world", "dummy_intent_1")
+        compiled_intents_1 = list(parser._regexes_cache._entries)
+        res_2 = parser.parse("Hello world", "dummy_intent_2")
+        compiled_intents_2 = list(parser._regexes_cache._entries)
+
+        # Then
+        self.assertEqual(0, nb_compiled_before_parsing)
+        self.assertEqual("dummy_intent_1",
+                         res_1[RES_INTENT][RES_INTENT_NAME])
+        self.assertEqual("dummy_intent_2",
+                         res_2[RES_INTENT][RES_INTENT_NAME])
+        self.assertListEqual(["dummy_intent_1"], compiled_intents_1)
+        self.assertListEqual(["dummy_intent_2"], compiled_intents_2)
+
+    def test_should_compile_patterns_when_warming_up(self):
+        # Given
+        dataset = validate_and_format_dataset(
+            self.duplicated_utterances_dataset)
+        config = DeterministicIntentParserConfig(regex_cache_size=1)
+        parser_dict = DeterministicIntentParser(config).fit(dataset).to_dict()
+        parser = DeterministicIntentParser.from_dict(parser_dict)
+        unbounded_parser = DeterministicIntentParser.from_dict(
+            DeterministicIntentParser().fit(dataset).to_dict())
+
+        # When
+        parser.warmup()
+        unbounded_parser.warmup()
+
+        # Then
+        self.assertListEqual(["dummy_intent_1"],
+                             list(parser._regexes_cache._entries))
+        self.assertSetEqual({"dummy_intent_1", "dummy_intent_2"},
+                            set(unbounded_parser._regexes_cache._entries))
+
     def test_should_not_parse_when_not_fitted(self):
         # Given
         parser = DeterministicIntentParser()
@@ -509,12 +656,15 @@ class TestDeterministicIntentParser(FixtureTest):
             "config": {
                 "unit_name": "deterministic_intent_parser",
                 "max_queries": 42,
-                "max_pattern_length": 43
+                "max_pattern_length": 43,
+                "regex_cache_size": None
             },
             "language_code": None,
             "group_names_to_slot_names": None,
             "patterns": None,
-            "slot_names_to_entities": None
+            "anchors_per_intent": None,
+            "slot_names_to_entities": None,
+            "exact_matches": None
         }
 
         metadata = {"unit_name": "deterministic_intent_parser"}
@@ -532,8 +682,10 @@ class TestDeterministicIntentParser(FixtureTest):
         def mock_generate_patterns(utterances, joined_entity_utterances,
                                    group_names_to_slot_names, language):
             patterns = ["mocked_regex_%s" % i for i in range(len(utterances))]
+            patterns_anchors = {p: "anchor_%s" % i
+                                for i, p in enumerate(patterns)}
             group_to_slot = {"group_0": "dummy slot name"}
-            return patterns, group_to_slot
+            return patterns, patterns_anchors, group_to_slot
 
         # pylint: enable=unused-argument
 
@@ -551,7 +703,8 @@ class TestDeterministicIntentParser(FixtureTest):
             "config": {
                 "unit_name": "deterministic_intent_parser",
                 "max_queries": 42,
-                "max_pattern_length": 100
+                "max_pattern_length": 100,
+                "regex_cache_size": None
             },
             "language_code": "en",
             "group_names_to_slot_names": {
@@ -568,6 +721,17 @@ class TestDeterministicIntentParser(FixtureTest):
                     "mocked_regex_0"
                 ]
             },
+            "anchors_per_intent": {
+                "dummy_intent_1": [
+                    "anchor_0",
+                    "anchor_1",
+                    "anchor_2",
+                    "anchor_3"
+                ],
+                "dummy_intent_2": [
+                    "anchor_0"
+                ]
+            },
             "slot_names_to_entities": {
                 "dummy_intent_1": {
                     "dummy_slot_name": "dummy_entity_1",
@@ -577,7 +741,8 @@ class TestDeterministicIntentParser(FixtureTest):
                 "dummy_intent_2": {
                     "dummy slot nàme": "dummy_entity_1"
                 }
-            }
+            },
+            "exact_matches": {}
         }
         metadata = {"unit_name": "deterministic_intent_parser"}
         self.assertJsonContent(self.tmp_file_path / "metadata.json",
@@ -801,6 +966,25 @@ class TestDeterministicIntentParser(FixtureTest):
         self.assertEqual(-1, _get_range_shift((6, 7), ranges_mapping))
         self.assertEqual(2, _get_range_shift((12, 13), ranges_mapping))
 
+    def test_should_get_original_range(self):
+        # Given
+        ranges_mapping = _RangesMapping({
+            (2, 5): {START: 2, END: 4},
+            (8, 9): {START: 7, END: 11}
+        })
+
+        # When / Then
+        self.assertDictEqual({START: 0, END: 1},
+                             ranges_mapping.get_original_range((0, 1)))
+        self.assertDictEqual({START: 2, END: 4},
+                             ranges_mapping.get_original_range((2, 5)))
+        self.assertDictEqual({START: 2, END: 4},
+                             ranges_mapping.get_original_range((3, 4)))
+        self.assertDictEqual({START: 5, END: 6},
+                             ranges_mapping.get_original_range((6, 7)))
+        self.assertDictEqual({START: 14, END: 15},
+                             ranges_mapping.get_original_range((12, 13)))
+
     def test_should_replace_tokenized_out_characters(self):
         # Given
         string = ": hello, it's me !  "
@@ -0,0 +1,83 @@
+from __future__ import unicode_literals
+
+from itertools import cycle, islice
+
+from snips_nlu.constants import RES_INTENT, RES_INTENT_NAME
+from snips_nlu.nlu_engine import EnginePool, SnipsNLUEngine
+from snips_nlu.tests.utils import BEVERAGE_DATASET, FixtureTest
+
+
+def _get_parse_cache_stats(engine, text):
+    engine.parse(text)
+    return engine.parse_cache.stats
+
+
+class TestEnginePool(FixtureTest):
+    def setUp(self):
+        super(TestEnginePool, self).setUp()
+        self.engine = SnipsNLUEngine().fit(BEVERAGE_DATASET)
+        self.engine.persist(self.tmp_file_path)
+        self.texts = [
+            "Give me 3 cups of hot tea please",
+            "make me two cups of coffee",
+            "I want 4 iced teas",
+            "hello world"
+        ] * 5
+
+    def test_should_parse_like_engine(self):
+        # Given
+        text = "Give me 3 cups of hot tea please"
+
+        # When
+        with EnginePool(self.tmp_file_path, workers=2) as pool:
+            result = pool.parse(text)
+            filtered_result = pool.parse(text, intents=["MakeCoffee"])
+
+        # Then
+        self.assertDictEqual(self.engine.parse(text), result)
+        self.assertEqual(
+            "MakeCoffee", filtered_result[RES_INTENT][RES_INTENT_NAME])
+
+    def test_should_parse_many_texts_in_order(self):
+        # Given
+        expected_results = [self.engine.parse(text) for text in self.texts]
+
+        # When
+        with EnginePool(self.tmp_file_path, workers=2, chunk_size=3) as pool:
+            results = pool.parse_many(self.texts)
+            lazy_results = list(pool.imap(iter(self.texts)))
+
+        # Then
+        self.assertListEqual(expected_results, results)
+        self.assertListEqual(expected_results, lazy_results)
+
+    def test_should_stream_infinite_iterable(self):
+        # Given
+        texts = cycle(self.texts)
+        expected_results = [self.engine.parse(text) for text in self.texts]
+
+        # When
+        with EnginePool(self.tmp_file_path, workers=2, chunk_size=3) as pool:
+            results = list(islice(pool.imap(texts), len(self.texts)))
+
+        # Then
+        self.assertListEqual(expected_results, results)
+
+    def test_should_run_function_with_worker_engine(self):
+        # Given
+        text = "make me two cups of coffee"
+
+        # When
+        with EnginePool(self.tmp_file_path, workers=1,
+                        parse_cache_size=10) as pool:
+            pool.parse(text)
+            stats = pool.run(_get_parse_cache_stats, text)
+
+        # Then
+        self.assertEqual(1, stats["hits"])
+        self.assertEqual(1, stats["misses"])
+
+    def test_should_fail_with_invalid_number_of_workers(self):
+        # When / Then
+        with self.assertRaises(ValueError):
+            EnginePool(self.tmp_file_path, workers=0)
@@ -8,16 +8,19 @@ from future.builtins import bytes
 from future.utils import iteritems
 from mock import patch, mock
 
-from snips_nlu.constants import LANGUAGE_EN, DATA, TEXT, ENTITY, SLOT_NAME
+from snips_nlu.constants import (
+    LANGUAGE_EN, DATA, NGRAM, TEXT, ENTITY, SLOT_NAME)
 from snips_nlu.dataset import validate_and_format_dataset
 from snips_nlu.intent_classifier.featurizer import (
-    Featurizer, _get_tfidf_vectorizer, _get_utterances_to_features_names)
+    Featurizer, _get_ngrams_values, _get_tfidf_vectorizer,
+    _get_utterances_to_features_names)
 from snips_nlu.intent_classifier.log_reg_classifier_utils import \
     text_to_utterance
 from snips_nlu.languages import get_default_sep
 from snips_nlu.pipeline.configs import FeaturizerConfig
-from snips_nlu.tests.utils import SnipsTest
+from snips_nlu.tests.utils import SnipsTest, get_empty_dataset
 from snips_nlu.preprocessing import tokenize_light
+from snips_nlu.slot_filler.features_utils import get_all_ngrams
 from snips_nlu.utils import json_string
 
 
@@ -91,7 +94,10 @@ class TestIntentClassifierFeaturizer(SnipsTest):
             "config": {
                 'sublinear_tf': False,
                 'pvalue_threshold': pvalue_threshold,
-                'word_clusters_name': "brown_clusters"
+                'word_clusters_name': "brown_clusters",
+                'feature_hashing_size': None,
+                'n_jobs': 1,
+                'preprocessing_chunk_size': 200
             },
             "language_code": "en",
             "tfidf_vectorizer": {"idf_diag": idf_diag, "vocab": vocabulary},
@@ -112,7 +118,10 @@ class TestIntentClassifierFeaturizer(SnipsTest):
         config = {
             "pvalue_threshold": 0.4,
             "sublinear_tf": False,
-            "word_clusters_name": "brown_clusters"
+            "word_clusters_name": "brown_clusters",
+            "feature_hashing_size": None,
+            "n_jobs": 1,
+            "preprocessing_chunk_size": 200
         }
 
         entity_utterances_to_feature_names = {
@@ -371,3 +380,165 @@ class TestIntentClassifierFeaturizer(SnipsTest):
         featurizer = Featurizer(language, None)
         # When/Then
         featurizer.to_dict()
+
+    def test_hashing_featurizer_should_be_serializable(self):
+        # Given
+        language = LANGUAGE_EN
+        dataset = validate_and_format_dataset(get_empty_dataset(language))
+        config = FeaturizerConfig(feature_hashing_size=64)
+        featurizer = Featurizer(language, None, config=config)
+        utterances = [
+            "hello world",
+            "beautiful world",
+            "hello here",
+            "bird birdy",
+            "beautiful bird"
+        ]
+        utterances = [text_to_utterance(u) for u in utterances]
+        classes = np.array([0, 0, 0, 1, 1])
+        featurizer.fit(dataset, utterances, classes)
+
+        # When
+        serialized_featurizer = json_string(featurizer.to_dict())
+        deserialized_featurizer = Featurizer.from_dict(
+            json.loads(serialized_featurizer))
+
+        # Then
+        tfidf_vectorizer_dict = featurizer.to_dict()["tfidf_vectorizer"]
+        self.assertLessEqual(len(tfidf_vectorizer_dict["idf_indexes"]), 64)
+        self.assertNotIn("vocab", tfidf_vectorizer_dict)
+        self.assertListEqual(featurizer.best_features,
+                             deserialized_featurizer.best_features)
+        expected_features = featurizer.transform(utterances).todense()
+        features = deserialized_featurizer.transform(utterances).todense()
+        np.testing.assert_array_almost_equal(expected_features, features)
+
+    def test_hashing_featurizer_should_have_bounded_width(self):
+        # Given
+        language = LANGUAGE_EN
+        dataset = validate_and_format_dataset(get_empty_dataset(language))
+        config = FeaturizerConfig(feature_hashing_size=8)
+        featurizer = Featurizer(language, None, config=config)
+        utterances = [text_to_utterance("word%s other%s" % (i, i))
+                      for i in range(100)]
+        classes = np.array([i % 2 for i in range(100)])
+
+        # When
+        featurizer.fit(dataset, utterances, classes)
+
+        # Then
+        self.assertTrue(all(0 <= f < 8 for f in featurizer.best_features))
+        features = featurizer.transform(utterances)
+        self.assertEqual(len(featurizer.best_features), features.shape[1])
+
+    def test_parallel_preprocessing_should_match_sequential_one(self):
+        # Given
+        language = LANGUAGE_EN
+        dataset = validate_and_format_dataset(get_empty_dataset(language))
+        utterances = [
+            text_to_utterance("hello world number %s" % i) for i in range(25)]
+        utterances += [
+            text_to_utterance("beautiful bird at %s pm" % i)
+            for i in range(25)]
+        classes = np.array([0] * 25 + [1] * 25)
+        sequential_featurizer = Featurizer(
+            language, None,
+            config=FeaturizerConfig(word_clusters_name="brown_clusters"))
+        sequential_featurizer.fit(dataset, utterances, classes)
+        parallel_config = FeaturizerConfig(
+            word_clusters_name="brown_clusters", n_jobs=2,
+            preprocessing_chunk_size=7)
+        parallel_featurizer = Featurizer.from_dict(
+            sequential_featurizer.to_dict())
+        parallel_featurizer.config = parallel_config
+
+        # When
+        sequential_features = sequential_featurizer.preprocess_utterances(
+            utterances)
+        parallel_features = parallel_featurizer.preprocess_utterances(
+            utterances, n_jobs=2)
+
+        # Then
+        self.assertListEqual(sequential_features, parallel_features)
+
+    def test_parallel_transform_should_match_sequential_one(self):
+        # Given
+        language = LANGUAGE_EN
+        dataset = validate_and_format_dataset(get_empty_dataset(language))
+        utterances = [
+            text_to_utterance("hello world number %s" % i) for i in range(25)]
+        utterances += [
+            text_to_utterance("beautiful bird at %s pm" % i)
+            for i in range(25)]
+        classes = np.array([0] * 25 + [1] * 25)
+        config = FeaturizerConfig(word_clusters_name="brown_clusters",
+                                  preprocessing_chunk_size=7)
+        featurizer = Featurizer(language, None, config=config)
+        featurizer.fit(dataset, utterances, classes)
+
+        # When
+        sequential_features = featurizer.transform(utterances)
+        parallel_features = featurizer.transform(utterances, n_jobs=2)
+
+        # Then
+        self.assertListEqual(sequential_features.toarray().tolist(),
+                             parallel_features.toarray().tolist())
+
+    @patch("snips_nlu.intent_classifier.featurizer.Pool")
+    def test_transform_should_not_spawn_worker_processes(self, mocked_pool):
+        # Given
+        language = LANGUAGE_EN
+        dataset = validate_and_format_dataset(get_empty_dataset(language))
+        utterances = [
+            text_to_utterance("hello world number %s" % i) for i in range(25)]
+        utterances += [
+            text_to_utterance("beautiful bird at %s pm" % i)
+            for i in range(25)]
+        classes = np.array([0] * 25 + [1] * 25)
+        featurizer = Featurizer(language, None)
+        featurizer.fit(dataset, utterances, classes)
+        featurizer = Featurizer.from_dict(featurizer.to_dict())
+        featurizer.config = FeaturizerConfig(
+            n_jobs=2, preprocessing_chunk_size=7)
+
+        # When
+        featurizer.transform(utterances)
+
+        # Then
+        mocked_pool.assert_not_called()
+
+    def test_get_ngrams_values_should_match_all_ngrams_lookup(self):
+        # Given
+        ngrams_dict = {
+            "new": "a",
+            "new york": "b",
+            "new york city": "c",
+            "york city hall": "d",
+            "city": "e",
+            "hall of fame": "f",
+            "the": "g"
+        }
+        tokens = "the new york city hall of the new york city".split()
+
+        # When
+        values = list(_get_ngrams_values(tokens, ngrams_dict))
+
+        # Then
+        expected_values = [ngrams_dict[ngram[NGRAM]]
+                           for ngram in get_all_ngrams(tokens)
+                           if ngram[NGRAM] in ngrams_dict]
+        self.assertListEqual(sorted(expected_values), sorted(values))
+
+    def test_get_ngrams_values_should_handle_updated_dict(self):
+        # Given
+        ngrams_dict = {"hello": "a"}
+        tokens = ["hello", "big", "world"]
+        self.assertListEqual(["a"], list(_get_ngrams_values(
+            tokens, ngrams_dict)))
+
+        # When
+        ngrams_dict["big world"] = "b"
+        values = list(_get_ngrams_values(tokens, ngrams_dict))
+
+        # Then
+        self.assertListEqual(["a", "b"], values)
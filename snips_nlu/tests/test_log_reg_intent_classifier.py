@@ -5,22 +5,24 @@ from builtins import next, range, str
 
 import numpy as np
 from future.utils import itervalues
-from mock import patch
+from mock import MagicMock, patch
 
 from snips_nlu.constants import (
-    INTENTS, LANGUAGE_EN, RES_INTENT_NAME, UTTERANCES)
+    INTENTS, LANGUAGE_EN, RES_INTENT_NAME, RES_PROBABILITY, UTTERANCES)
 from snips_nlu.dataset import validate_and_format_dataset
 from snips_nlu.intent_classifier import LogRegIntentClassifier
-from snips_nlu.intent_classifier.featurizer import Featurizer
+from snips_nlu.intent_classifier.featurizer import (
+    Featurizer, _parallel_preprocess_utterances)
 from snips_nlu.intent_classifier.log_reg_classifier_utils import (
     add_unknown_word_to_utterances, build_training_data,
     generate_noise_utterances, generate_smart_noise, get_noise_it,
     remove_builtin_slots, text_to_utterance)
 from snips_nlu.pipeline.configs import (
-    IntentClassifierDataAugmentationConfig, LogRegIntentClassifierConfig)
+    FeaturizerConfig, IntentClassifierDataAugmentationConfig,
+    LogRegIntentClassifierConfig)
 from snips_nlu.tests.utils import (
     BEVERAGE_DATASET, FixtureTest, SAMPLE_DATASET, get_empty_dataset)
-from snips_nlu.utils import NotTrained
+from snips_nlu.utils import NotTrained, check_random_state
 
 
 def get_mocked_augment_utterances(dataset, intent_name, language,
@@ -66,6 +68,43 @@ class TestLogRegIntentClassifier(FixtureTest):
         self.assertEqual("MakeCoffee", res2[RES_INTENT_NAME])
         self.assertEqual(None, res3)
 
+    def test_should_get_all_intents_sorted_by_probability(self):
+        # Given
+        dataset = validate_and_format_dataset(BEVERAGE_DATASET)
+        classifier = LogRegIntentClassifier().fit(dataset)
+        text = "Make me two cups of tea"
+
+        # When
+        results = classifier.get_intents(text)
+
+        # Then
+        intents = [res[RES_INTENT_NAME] for res in results]
+        probabilities = [res[RES_PROBABILITY] for res in results]
+        self.assertListEqual(sorted(classifier.intent_list, key=str),
+                             sorted(intents, key=str))
+        self.assertListEqual(sorted(probabilities, reverse=True),
+                             probabilities)
+        self.assertEqual(classifier.get_intent(text), results[0])
+
+    def test_should_get_intent_batch(self):
+        # Given
+        dataset = validate_and_format_dataset(BEVERAGE_DATASET)
+        classifier = LogRegIntentClassifier().fit(dataset)
+        texts = ["Make me two cups of tea", "", "I want a coffee",
+                 "bla bla bla"]
+
+        # When
+        results = classifier.get_intent_batch(texts)
+        filtered_results = classifier.get_intent_batch(
+            texts, intents_filter=["MakeCoffee"])
+
+        # Then
+        self.assertListEqual([classifier.get_intent(t) for t in texts],
+                             results)
+        self.assertListEqual(
+            [classifier.get_intent(t, ["MakeCoffee"]) for t in texts],
+            filtered_results)
+
     def test_should_not_get_intent_when_not_fitted(self):
         # Given
         intent_classifier = LogRegIntentClassifier()
@@ -88,6 +127,41 @@ class TestLogRegIntentClassifier(FixtureTest):
         expected_intent = None
         self.assertEqual(intent, expected_intent)
 
+    def test_should_get_intents_like_intent_with_single_intent(self):
+        # Given
+        dataset = dict(BEVERAGE_DATASET)
+        dataset[INTENTS] = {"MakeTea": BEVERAGE_DATASET[INTENTS]["MakeTea"]}
+        dataset = validate_and_format_dataset(dataset)
+        data_augmentation_config = IntentClassifierDataAugmentationConfig(
+            noise_factor=0)
+        config = LogRegIntentClassifierConfig(
+            data_augmentation_config=data_augmentation_config)
+        classifier = LogRegIntentClassifier(config).fit(dataset)
+        text = "Make me two cups of tea"
+
+        # When
+        intent = classifier.get_intent(text)
+        intents = classifier.get_intents(text)
+
+        # Then
+        self.assertListEqual(["MakeTea"], classifier.intent_list)
+        self.assertIsNone(intent)
+        self.assertListEqual([], intents)
+
+    def test_should_get_no_intents_with_single_none_intent(self):
+        # Given
+        dataset = validate_and_format_dataset(get_empty_dataset(LANGUAGE_EN))
+        classifier = LogRegIntentClassifier().fit(dataset)
+        classifier.intent_list = [None]
+        classifier.featurizer = MagicMock()
+        classifier.classifier = MagicMock()
+
+        # When
+        intents = classifier.get_intents("this is a dummy query")
+
+        # Then
+        self.assertListEqual([], intents)
+
     @patch('snips_nlu.intent_classifier.featurizer.Featurizer.to_dict')
     def test_should_be_serializable(self, mock_to_dict):
         # Given
@@ -113,7 +187,9 @@ class TestLogRegIntentClassifier(FixtureTest):
             "intercept": intercept,
             "t_": 701.0,
             "intent_list": intent_list,
-            "featurizer": mocked_dict
+            "featurizer": mocked_dict,
+            "replay_buffer": intent_classifier.replay_buffer,
+            "drift_stats": intent_classifier.drift_stats
         }
         metadata = {"unit_name": "log_reg_intent_classifier"}
         self.assertJsonContent(self.tmp_file_path / "metadata.json", metadata)
@@ -184,6 +260,177 @@ class TestLogRegIntentClassifier(FixtureTest):
         expected_intent = "MakeTea"
         self.assertEqual(expected_intent, result[RES_INTENT_NAME])
 
+    def test_should_update_with_new_utterances(self):
+        # Given
+        dataset = validate_and_format_dataset(BEVERAGE_DATASET)
+        classifier = LogRegIntentClassifier().fit(dataset)
+        nb_features = len(classifier.featurizer.best_features)
+        dataset_delta = {
+            "intents": {
+                "MakeTea": {
+                    "utterances": [
+                        text_to_utterance("brew me some chai please"),
+                        text_to_utterance("I want a chai"),
+                        text_to_utterance("brew a chai"),
+                        text_to_utterance("can you brew chai"),
+                    ]
+                }
+            },
+            "entities": {},
+            "language": LANGUAGE_EN
+        }
+
+        # When
+        classifier.update(dataset_delta)
+        result = classifier.get_intent("brew me a chai")
+
+        # Then
+        self.assertEqual("MakeTea", result[RES_INTENT_NAME])
+        self.assertGreater(len(classifier.featurizer.best_features),
+                           nb_features)
+        self.assertEqual(len(classifier.featurizer.best_features),
+                         classifier.classifier.coef_.shape[1])
+        self.assertEqual(1, classifier.drift_stats["nb_updates"])
+        self.assertEqual(4, classifier.drift_stats["nb_updated_utterances"])
+
+    def test_update_should_preprocess_utterances_in_parallel(self):
+        # Given
+        dataset = validate_and_format_dataset(BEVERAGE_DATASET)
+        featurizer_config = FeaturizerConfig(n_jobs=2,
+                                             preprocessing_chunk_size=2)
+        config = LogRegIntentClassifierConfig(
+            featurizer_config=featurizer_config)
+        classifier = LogRegIntentClassifier(config).fit(dataset)
+        dataset_delta = {
+            "intents": {
+                "MakeTea": {
+                    "utterances": [
+                        text_to_utterance("brew me some chai please"),
+                        text_to_utterance("I want a chai"),
+                        text_to_utterance("brew a chai"),
+                        text_to_utterance("can you brew chai"),
+                    ]
+                }
+            },
+            "entities": {},
+            "language": LANGUAGE_EN
+        }
+
+        # When
+        with patch("snips_nlu.intent_classifier.featurizer."
+                   "_parallel_preprocess_utterances",
+                   wraps=_parallel_preprocess_utterances) as mocked:
+            classifier.update(dataset_delta)
+
+        # Then
+        self.assertTrue(mocked.called)
+        for args, _ in mocked.call_args_list:
+            self.assertEqual(2, args[4])
+        result = classifier.get_intent("brew me a chai")
+        self.assertEqual("MakeTea", result[RES_INTENT_NAME])
+
+    def test_should_get_intent_after_update_and_deserialization(self):
+        # Given
+        dataset = validate_and_format_dataset(BEVERAGE_DATASET)
+        classifier = LogRegIntentClassifier().fit(dataset)
+        dataset_delta = {
+            "intents": {
+                "MakeCoffee": {
+                    "utterances": [
+                        text_to_utterance("pour me an espresso"),
+                        text_to_utterance("I want an espresso"),
+                    ]
+                }
+            },
+            "entities": {},
+            "language": LANGUAGE_EN
+        }
+        classifier.update(dataset_delta)
+        classifier.persist(self.tmp_file_path)
+
+        # When
+        loaded_classifier = LogRegIntentClassifier.from_path(
+            self.tmp_file_path)
+        loaded_classifier.update(dataset_delta)
+
+        # Then
+        self.assertEqual(2, loaded_classifier.drift_stats["nb_updates"])
+        self.assertEqual(len(classifier.replay_buffer),
+                         len(loaded_classifier.replay_buffer))
+
+    @patch("snips_nlu.intent_classifier.log_reg_classifier"
+           ".check_random_state", wraps=check_random_state)
+    def test_updates_should_keep_drawing_from_the_same_random_state(
+            self, mocked_check_random_state):
+        # Given
+        dataset = validate_and_format_dataset(BEVERAGE_DATASET)
+        config = LogRegIntentClassifierConfig(replay_buffer_size=2,
+                                              random_seed=42)
+        classifier = LogRegIntentClassifier(config).fit(dataset)
+        dataset_delta = {
+            "intents": {
+                "MakeTea": {
+                    "utterances": [
+                        text_to_utterance("brew me some chai please"),
+                        text_to_utterance("I want a chai"),
+                    ]
+                }
+            },
+            "entities": {},
+            "language": LANGUAGE_EN
+        }
+
+        # When
+        classifier.update(dataset_delta)
+        classifier.update(dataset_delta)
+
+        # Then
+        self.assertEqual(1, mocked_check_random_state.call_count)
+
+    def test_update_should_fail_with_unknown_intents(self):
+        # Given
+        dataset = validate_and_format_dataset(BEVERAGE_DATASET)
+        classifier = LogRegIntentClassifier().fit(dataset)
+        dataset_delta = {
+            "intents": {
+                "MakeHotChocolate": {
+                    "utterances": [text_to_utterance("hot chocolate please")]
+                }
+            },
+            "entities": {},
+            "language": LANGUAGE_EN
+        }
+
+        # When / Then
+        with self.assertRaises(ValueError):
+            classifier.update(dataset_delta)
+
+    def test_should_need_retrain_after_large_updates(self):
+        # Given
+        dataset = validate_and_format_dataset(BEVERAGE_DATASET)
+        classifier = LogRegIntentClassifier().fit(dataset)
+        nb_utterances = classifier.drift_stats["nb_fitted_utterances"]
+        dataset_delta = {
+            "intents": {
+                "MakeTea": {
+                    "utterances": [
+                        text_to_utterance("make me a tea number %s" % i)
+                        for i in range(nb_utterances // 2)
+                    ]
+                }
+            },
+            "entities": {},
+            "language": LANGUAGE_EN
+        }
+
+        # When
+        needs_retrain_before_update = classifier.needs_retrain
+        classifier.update(dataset_delta)
+
+        # Then
+        self.assertFalse(needs_retrain_before_update)
+        self.assertTrue(classifier.needs_retrain)
+
     def test_should_be_serializable_into_bytearray(self):
         # Given
         dataset = BEVERAGE_DATASET
@@ -1,31 +1,41 @@
 # coding=utf-8
 from __future__ import unicode_literals
 
+import time
 from builtins import str
 from copy import deepcopy
+from itertools import count
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
 
-from mock import patch
-from snips_nlu_ontology import get_all_languages
+from future.utils import itervalues
+from mock import MagicMock, patch
+from snips_nlu_ontology import get_all_languages, get_supported_entities
 
 import snips_nlu
+from snips_nlu.builtin_entities import (
+    get_builtin_entities, get_builtin_entity_parser, get_reference_time)
 from snips_nlu.constants import (
-    END, LANGUAGE, LANGUAGE_EN, RES_ENTITY, RES_INPUT, RES_INTENT,
-    RES_INTENT_NAME, RES_MATCH_RANGE, RES_RAW_VALUE, RES_SLOTS, RES_SLOT_NAME,
-    RES_VALUE, START)
+    END, ENTITY_KIND, LANGUAGE, LANGUAGE_EN, RES_DEGRADATIONS, RES_ENTITY,
+    RES_INPUT, RES_INTENT, RES_INTENT_NAME, RES_MATCH_RANGE, RES_RAW_VALUE,
+    RES_SLOTS, RES_SLOT_NAME, RES_VALUE, START)
 from snips_nlu.dataset import validate_and_format_dataset
+from snips_nlu.deadline import (
+    DEGRADATION_INTENT_PARSERS, DEGRADATION_SLOT_FILLING,
+    get_degradation_counts, reset_degradation_counts)
 from snips_nlu.intent_parser import IntentParser
 from snips_nlu.nlu_engine import SnipsNLUEngine
-from snips_nlu.pipeline.configs import NLUEngineConfig, \
-    ProbabilisticIntentParserConfig, ProcessingUnitConfig
+from snips_nlu.pipeline.configs import DeterministicIntentParserConfig, \
+    NLUEngineConfig, ProbabilisticIntentParserConfig, ProcessingUnitConfig
 from snips_nlu.pipeline.units_registry import (
     register_processing_unit, reset_processing_units)
 from snips_nlu.result import (
-    custom_slot, empty_result, intent_classification_result, parsing_result,
-    resolved_slot, unresolved_slot)
+    custom_slot, empty_result, intent_classification_result, is_empty,
+    parsing_result, resolved_slot, unresolved_slot)
+from snips_nlu.slot_filler import CRFSlotFiller
 from snips_nlu.tests.utils import (
     BEVERAGE_DATASET, FixtureTest, SAMPLE_DATASET, get_empty_dataset)
-from snips_nlu.utils import json_string, NotTrained
+from snips_nlu.utils import LRUCache, json_string, NotTrained
 
 
 class TestSnipsNLUEngine(FixtureTest):
@@ -302,6 +312,7 @@ class TestSnipsNLUEngine(FixtureTest):
                     }
                 },
             },
+            "builtin_entities_scope": ["snips/number"],
             "config": expected_engine_config.to_dict(),
             "intent_parsers": [
                 "test_intent_parser1",
@@ -362,6 +373,7 @@ class TestSnipsNLUEngine(FixtureTest):
                     }
                 },
             },
+            "builtin_entities_scope": ["snips/number"],
             "config": config.to_dict(),
             "intent_parsers": [
                 "test_intent_parser1",
@@ -413,6 +425,7 @@ class TestSnipsNLUEngine(FixtureTest):
         engine_dict = {
             "unit_name": "nlu_engine",
             "dataset_metadata": dataset_metadata,
+            "builtin_entities_scope": ["snips/number"],
             "config": engine_config.to_dict(),
             "intent_parsers": [
                 "test_intent_parser1",
@@ -446,6 +459,7 @@ class TestSnipsNLUEngine(FixtureTest):
         self.assertDictEqual(engine._dataset_metadata, dataset_metadata)
         # pylint:enable=protected-access
         self.assertDictEqual(engine.config.to_dict(), expected_engine_config)
+        self.assertListEqual(["snips/number"], engine.builtin_entities_scope)
 
     def test_should_be_serializable_into_dir_when_empty(self):
         # Given
@@ -458,6 +472,7 @@ class TestSnipsNLUEngine(FixtureTest):
         expected_dict = {
             "unit_name": "nlu_engine",
             "dataset_metadata": None,
+            "builtin_entities_scope": None,
             "config": None,
             "intent_parsers": [],
             "model_version": snips_nlu.__model_version__,
@@ -501,6 +516,537 @@ class TestSnipsNLUEngine(FixtureTest):
         self.assertEqual(result[RES_INTENT][RES_INTENT_NAME], "MakeTea")
         self.assertListEqual(result[RES_SLOTS], expected_slots)
 
+    def test_should_parse_nbest(self):
+        # Given
+        dataset = BEVERAGE_DATASET
+        engine = SnipsNLUEngine().fit(dataset)
+        input_ = "Give me 3 cups of hot tea please"
+
+        # When
+        results = engine.parse_nbest(input_, 3)
+
+        # Then
+        self.assertEqual(engine.parse(input_), results[0])
+        intents = [res[RES_INTENT][RES_INTENT_NAME] for res in results]
+        self.assertEqual(len(set(intents)), len(intents))
+        self.assertSetEqual({"MakeCoffee", "MakeTea"}, set(intents))
+
+    def test_should_parse_nbest_consistently_with_parse(self):
+        # Given
+        engine = SnipsNLUEngine().fit(BEVERAGE_DATASET)
+        out_of_domain_input = "hello world"
+        input_ = "Give me 3 cups of hot tea please"
+
+        # When
+        out_of_domain_results = engine.parse_nbest(out_of_domain_input, 3)
+        filtered_results = engine.parse_nbest(input_, 3,
+                                              intents=["MakeCoffee"])
+
+        # Then
+        self.assertTrue(is_empty(engine.parse(out_of_domain_input)))
+        self.assertListEqual([], out_of_domain_results)
+        self.assertEqual(engine.parse(input_, intents=["MakeCoffee"]),
+                         filtered_results[0])
+
+    @patch("snips_nlu.nlu_engine.nlu_engine.resolve_slots")
+    def test_should_cache_unresolved_parsing_results(
+            self, mocked_resolve_slots):
+        # Given
+        mocked_resolve_slots.side_effect = \
+            lambda text, slots, *args: [custom_slot(s) for s in slots]
+        cache = LRUCache(size_limit=10)
+        engine = SnipsNLUEngine(parse_cache=cache).fit(BEVERAGE_DATASET)
+        input_ = "Give me 3 cups of hot tea please"
+
+        # When
+        with patch.object(engine.intent_parsers[0], "parse",
+                          wraps=engine.intent_parsers[0].parse) as parse:
+            result = engine.parse(input_)
+            cached_result = engine.parse(input_)
+            filtered_result = engine.parse(input_, intents=["MakeCoffee"])
+
+        # Then
+        self.assertEqual(2, parse.call_count)
+        self.assertEqual(3, mocked_resolve_slots.call_count)
+        self.assertDictEqual(result, cached_result)
+        self.assertEqual(
+            "MakeCoffee", filtered_result[RES_INTENT][RES_INTENT_NAME])
+        self.assertEqual(1, cache.stats["hits"])
+        self.assertEqual(2, cache.stats["misses"])
+
+        # When
+        engine.fit(BEVERAGE_DATASET)
+
+        # Then
+        self.assertEqual(0, len(cache))
+
+    @patch("snips_nlu.nlu_engine.nlu_engine.resolve_slots")
+    def test_should_pin_reference_time_along_the_pipeline(
+            self, mocked_resolve_slots):
+        # Given
+        reference_times = []
+
+        def mock_resolve_slots(text, slots, *args):
+            reference_times.append(get_reference_time())
+            return [custom_slot(s) for s in slots]
+
+        mocked_resolve_slots.side_effect = mock_resolve_slots
+        engine = SnipsNLUEngine().fit(BEVERAGE_DATASET)
+        input_ = "Give me 3 cups of hot tea please"
+
+        # When
+        with patch("snips_nlu.builtin_entities.time") as mocked_time:
+            # The clock moves forward each time it is read
+            mocked_time.time.side_effect = count(1000.)
+            engine.parse(input_)
+            engine.parse_nbest(input_, 1)
+
+        # Then
+        # The current time is read only once per parsing call
+        self.assertListEqual([1000., 1001.], reference_times)
+
+    def test_should_restrict_builtin_entities_parsing_to_dataset_scope(self):
+        # Given
+        config = NLUEngineConfig([DeterministicIntentParserConfig()])
+        engine = SnipsNLUEngine(config).fit(BEVERAGE_DATASET)
+        builtin_parser = get_builtin_entity_parser("en")
+        rust_parser = builtin_parser.parser
+
+        # When
+        with patch.object(builtin_parser, "parser",
+                          wraps=rust_parser) as mocked_parser:
+            engine.parse("Make me two cups of coffee at 9pm tomorrow")
+
+        # Then
+        self.assertListEqual(["snips/number"], engine.builtin_entities_scope)
+        for args, _ in mocked_parser.parse.call_args_list:
+            scope = args[1]
+            self.assertIsNotNone(scope)
+            self.assertTrue(set(scope).issubset({"snips/number"}))
+
+    def test_should_restrict_builtin_entities_scope_to_trained_models(self):
+        # Given
+        dataset = validate_and_format_dataset(BEVERAGE_DATASET)
+        inputs = [
+            "Give me 3 cups of hot tea please",
+            "make me two cups of coffee tomorrow",
+            "I want 4 iced teas",
+            "hello world"
+        ]
+
+        # When
+        engine = SnipsNLUEngine().fit(dataset)
+        results = [engine.parse(text) for text in inputs]
+        scope = engine.builtin_entities_scope
+        engine.builtin_entities_scope = None
+        unscoped_results = [engine.parse(text) for text in inputs]
+
+        # Then
+        supported_entities = get_supported_entities(LANGUAGE_EN)
+        self.assertIn("snips/number", scope)
+        self.assertTrue(set(scope).issubset(supported_entities))
+        self.assertLess(len(scope), len(supported_entities))
+        classifier = engine.intent_parsers[1].intent_classifier
+        self.assertTrue(classifier.get_used_builtin_entities().issubset(scope))
+        for slot_filler in itervalues(engine.intent_parsers[1].slot_fillers):
+            self.assertTrue(
+                slot_filler.get_used_builtin_entities().issubset(scope))
+        self.assertListEqual(unscoped_results, results)
+
+    def test_should_train_with_inference_scope_of_overlapping_entities(self):
+        # Given
+        text = "in two hours"
+
+        class TestIntentParserConfig(ProcessingUnitConfig):
+            unit_name = "test_intent_parser"
+
+            def to_dict(self):
+                return {"unit_name": self.unit_name}
+
+            @classmethod
+            def from_dict(cls, obj_dict):
+                return TestIntentParserConfig()
+
+            def get_required_resources(self):
+                return None
+
+            def get_required_builtin_entities(self, language):
+                return {"snips/datetime", "snips/number"}
+
+        class TestIntentParser(IntentParser):
+            unit_name = "test_intent_parser"
+            config_type = TestIntentParserConfig
+
+            def __init__(self, config):
+                super(TestIntentParser, self).__init__(config)
+                self.training_entities = None
+                self.parsing_entities = None
+
+            def fit(self, dataset, force_retrain):
+                self.training_entities = [
+                    ent[ENTITY_KIND]
+                    for ent in get_builtin_entities(text, LANGUAGE_EN)]
+                return self
+
+            @property
+            def fitted(self):
+                return self.training_entities is not None
+
+            def get_used_builtin_entities(self):
+                return {"snips/number"}
+
+            def parse(self, text, intents):
+                self.parsing_entities = [
+                    ent[ENTITY_KIND]
+                    for ent in get_builtin_entities(text, LANGUAGE_EN)]
+                return empty_result(text)
+
+            def persist(self, path):
+                pass
+
+            @classmethod
+            def from_path(cls, path):
+                return cls(cls.config_type())
+
+        register_processing_unit(TestIntentParser)
+        config = NLUEngineConfig([TestIntentParserConfig()])
+        dataset = get_empty_dataset(LANGUAGE_EN)
+
+        # When
+        engine = SnipsNLUEngine(config).fit(dataset)
+        engine.parse(text)
+
+        # Then
+        intent_parser = engine.intent_parsers[0]
+        self.assertListEqual(["snips/number"], engine.builtin_entities_scope)
+        self.assertListEqual(["snips/number"], intent_parser.parsing_entities)
+        self.assertListEqual(intent_parser.parsing_entities,
+                             intent_parser.training_entities)
+
+    def test_should_keep_features_of_crf_slot_fillers_trained_in_engine(self):
+        # Given
+        dataset = validate_and_format_dataset(BEVERAGE_DATASET)
+
+        # When
+        engine = SnipsNLUEngine().fit(dataset)
+
+        # Then
+        slot_filler = engine.intent_parsers[1].slot_fillers["MakeTea"]
+        expected_slot_filler = CRFSlotFiller(slot_filler.config).fit(
+            dataset, "MakeTea")
+        self.assertListEqual(
+            [feature.name for feature in expected_slot_filler.features],
+            [feature.name for feature in slot_filler.features])
+
+    def test_should_parse_batch(self):
+        # Given
+        cache = LRUCache(size_limit=10)
+        engine = SnipsNLUEngine(parse_cache=cache).fit(BEVERAGE_DATASET)
+        texts = [
+            "Give me 3 cups of hot tea please",
+            "make me two cups of coffee",
+            "hello world",
+            "make me one cup of coffee"
+        ]
+        engine.parse(texts[0])
+
+        # When
+        results = engine.parse_batch(texts)
+
+        # Then
+        engine.parse_cache = None
+        self.assertListEqual([engine.parse(text) for text in texts], results)
+        self.assertEqual(1, cache.stats["hits"])
+        self.assertEqual(len(texts), len(cache))
+
+    def test_should_degrade_parsing_when_deadline_exhausted(self):
+        # Given
+        cache = LRUCache(size_limit=10)
+        config = NLUEngineConfig([DeterministicIntentParserConfig(),
+                                  DeterministicIntentParserConfig()])
+        engine = SnipsNLUEngine(config, parse_cache=cache).fit(
+            BEVERAGE_DATASET)
+        text = "hello world"
+        reset_degradation_counts()
+
+        # When
+        degraded_result = engine.parse(text, deadline_ms=0)
+        nb_cached_results = len(cache)
+        result = engine.parse(text, deadline_ms=10000)
+
+        # Then
+        expected_degraded_result = empty_result(text)
+        expected_degraded_result[RES_DEGRADATIONS] = [
+            DEGRADATION_INTENT_PARSERS]
+        self.assertDictEqual(expected_degraded_result, degraded_result)
+        self.assertEqual(0, nb_cached_results)
+        self.assertListEqual([], result.pop(RES_DEGRADATIONS))
+        self.assertDictEqual(engine.parse(text), result)
+        self.assertEqual(1, get_degradation_counts()[
+            DEGRADATION_INTENT_PARSERS])
+
+    def test_should_degrade_slot_filling_when_deadline_exhausted(self):
+        # Given
+        engine = SnipsNLUEngine().fit(BEVERAGE_DATASET)
+        text = "make me two cups of coffee please"
+        probabilistic_parser = engine.intent_parsers[1]
+
+        def slow_parse(text, intents):
+            time.sleep(0.05)
+            return empty_result(text)
+
+        first_parser = MagicMock()
+        first_parser.parse.side_effect = slow_parse
+        engine.intent_parsers = [first_parser, probabilistic_parser]
+        reset_degradation_counts()
+
+        # When
+        result = engine.parse(text, deadline_ms=10)
+
+        # Then
+        intent = probabilistic_parser.intent_classifier.get_intent(text)
+        expected_result = parsing_result(text, intent, [])
+        expected_result[RES_DEGRADATIONS] = [DEGRADATION_SLOT_FILLING]
+        self.assertDictEqual(expected_result, result)
+        self.assertEqual(0, get_degradation_counts()[
+            DEGRADATION_INTENT_PARSERS])
+
+    def test_speculative_parsing_should_degrade_slot_filling_first(self):
+        # Given
+        engine = SnipsNLUEngine(speculative_workers=1).fit(BEVERAGE_DATASET)
+        text = "make me two cups of coffee please"
+        probabilistic_parser = engine.intent_parsers[1]
+        first_parser = MagicMock()
+        first_parser.parse.return_value = empty_result(text)
+        engine.intent_parsers = [first_parser, probabilistic_parser]
+        reset_degradation_counts()
+
+        # When
+        with engine:
+            result = engine.parse(text, deadline_ms=0)
+
+        # Then
+        intent = probabilistic_parser.intent_classifier.get_intent(text)
+        expected_result = parsing_result(text, intent, [])
+        expected_result[RES_DEGRADATIONS] = [DEGRADATION_SLOT_FILLING]
+        self.assertDictEqual(expected_result, result)
+        self.assertEqual(1, get_degradation_counts()[
+            DEGRADATION_SLOT_FILLING])
+        self.assertEqual(0, get_degradation_counts()[
+            DEGRADATION_INTENT_PARSERS])
+
+    def test_speculative_parsing_should_not_count_discarded_degradations(
+            self):
+        # Given
+        engine = SnipsNLUEngine(speculative_workers=1).fit(BEVERAGE_DATASET)
+        text = "make me two cups of coffee please"
+        probabilistic_parser = engine.intent_parsers[1]
+        first_result = parsing_result(
+            text, intent_classification_result("MakeCoffee", 1.0), [])
+
+        def slow_parse(text, intents):
+            time.sleep(0.05)
+            return first_result
+
+        first_parser = MagicMock()
+        first_parser.parse.side_effect = slow_parse
+        engine.intent_parsers = [first_parser, probabilistic_parser]
+        reset_degradation_counts()
+
+        # When
+        with engine:
+            result = engine.parse(text, deadline_ms=0)
+            # Waits for the discarded speculative parsing to complete
+            # pylint:disable=protected-access
+            engine._get_speculative_pool().apply(time.sleep, (0,))
+            # pylint:enable=protected-access
+
+        # Then
+        self.assertListEqual([], result.pop(RES_DEGRADATIONS))
+        self.assertDictEqual(first_result, result)
+        self.assertEqual(0, get_degradation_counts()[
+            DEGRADATION_SLOT_FILLING])
+
+    def test_should_parse_speculatively(self):
+        # Given
+        config = NLUEngineConfig([DeterministicIntentParserConfig(),
+                                  DeterministicIntentParserConfig()])
+        engine = SnipsNLUEngine(config).fit(BEVERAGE_DATASET)
+        texts = [
+            "Give me 3 cups of hot tea please",
+            "make me two cups of coffee",
+            "Make me two cups of coffee at 9pm tomorrow",
+            "hello world"
+        ]
+        expected_results = [engine.parse(text) for text in texts]
+        engine.speculative_workers = 2
+        builtin_parser = get_builtin_entity_parser("en")
+        builtin_parser.clear_cache()
+        rust_parser = builtin_parser.parser
+
+        # When
+        with patch.object(builtin_parser, "parser",
+                          wraps=rust_parser) as mocked_parser, engine:
+            results = [engine.parse(text) for text in texts]
+
+        # Then
+        self.assertListEqual(expected_results, results)
+        # The builtin entities scope is propagated to the worker threads
+        for args, _ in mocked_parser.parse.call_args_list:
+            self.assertTrue(set(args[1]).issubset({"snips/number"}))
+
+    def test_speculative_parsing_should_keep_parsers_priority(self):
+        # Given
+        engine = SnipsNLUEngine(speculative_workers=1).fit(BEVERAGE_DATASET)
+        text = "make me a coffee"
+        first_result = parsing_result(
+            text, intent_classification_result("MakeCoffee", 1.0), [])
+        second_result = parsing_result(
+            text, intent_classification_result("MakeTea", 0.6), [])
+        first_parser = MagicMock()
+        first_parser.parse.return_value = first_result
+        second_parser = MagicMock()
+        second_parser.parse.return_value = second_result
+        engine.intent_parsers = [first_parser, second_parser]
+
+        # When
+        with engine:
+            result = engine.parse(text)
+            first_parser.parse.return_value = empty_result(text)
+            fallback_result = engine.parse(text)
+
+        # Then
+        self.assertDictEqual(first_result, result)
+        self.assertDictEqual(second_result, fallback_result)
+
+    def test_speculative_parsing_should_respect_deadline(self):
+        # Given
+        engine = SnipsNLUEngine(speculative_workers=1).fit(BEVERAGE_DATASET)
+        text = "make me a coffee"
+        first_parser = MagicMock()
+        first_parser.parse.return_value = empty_result(text)
+
+        def slow_parse(text, intents):
+            time.sleep(0.5)
+            return parsing_result(
+                text, intent_classification_result("MakeTea", 0.6), [])
+
+        second_parser = MagicMock()
+        second_parser.parse.side_effect = slow_parse
+        second_parser.supports_slot_filling_degradation = False
+        engine.intent_parsers = [first_parser, second_parser]
+
+        # When
+        with engine:
+            start = time.time()
+            result = engine.parse(text, deadline_ms=50)
+            elapsed_time = time.time() - start
+
+        # Then
+        self.assertLess(elapsed_time, 0.5)
+        expected_result = empty_result(text)
+        expected_result[RES_DEGRADATIONS] = [DEGRADATION_INTENT_PARSERS]
+        self.assertDictEqual(expected_result, result)
+
+    def test_close_should_stop_speculative_workers(self):
+        # Given
+        engine = SnipsNLUEngine(speculative_workers=2).fit(BEVERAGE_DATASET)
+        result = engine.parse("make me a coffee")
+        # pylint: disable=W0212
+        pool = engine._speculative_pool
+
+        # When
+        engine.close()
+
+        # Then
+        self.assertIsNone(engine._speculative_pool)
+        self.assertFalse(any(worker.is_alive() for worker in pool._pool))
+        # New worker threads are started when the engine is used again
+        with engine:
+            self.assertDictEqual(result, engine.parse("make me a coffee"))
+            self.assertIsNotNone(engine._speculative_pool)
+        self.assertIsNone(engine._speculative_pool)
+        # pylint: enable=W0212
+
+    def test_should_warmup(self):
+        # Given
+        cache = LRUCache(size_limit=10)
+        engine = SnipsNLUEngine(parse_cache=cache).fit(BEVERAGE_DATASET)
+        query = "make me a hot tea"
+
+        # When
+        synthetic_warmup_time = engine.warmup()
+        nb_synthetic_queries = len(cache)
+        cache.clear()
+        warmup_time = engine.warmup(queries=[query])
+
+        # Then
+        self.assertGreater(synthetic_warmup_time, 0)
+        self.assertGreater(warmup_time, 0)
+        # The query of the builtin entity is the same as the one of the
+        # MakeCoffee intent, made of its only slot
+        self.assertEqual(2, nb_synthetic_queries)
+        self.assertEqual(1, len(cache))
+        self.assertIn((query, None), cache)
+
+    def test_should_compile_deterministic_patterns_when_warming_up(self):
+        # Given
+        SnipsNLUEngine().fit(BEVERAGE_DATASET).persist(self.tmp_file_path)
+        engine = SnipsNLUEngine.from_path(self.tmp_file_path)
+        deterministic_parser = engine.intent_parsers[0]
+        # pylint:disable=protected-access
+        regexes_cache = deterministic_parser._regexes_cache
+        # pylint:enable=protected-access
+
+        # When
+        nb_compiled_before_warmup = len(regexes_cache)
+        engine.warmup(queries=[])
+
+        # Then
+        self.assertEqual(0, nb_compiled_before_warmup)
+        self.assertEqual(len(BEVERAGE_DATASET["intents"]), len(regexes_cache))
+
+    def test_should_warmup_with_intent_without_slots(self):
+        # Given
+        dataset = deepcopy(BEVERAGE_DATASET)
+        dataset["intents"]["Greeting"] = {
+            "utterances": [
+                {"data": [{"text": "hello there"}]},
+                {"data": [{"text": "good morning to you"}]},
+                {"data": [{"text": "hi how are you"}]}
+            ]
+        }
+        engine = SnipsNLUEngine().fit(dataset)
+
+        # When
+        warmup_time = engine.warmup()
+
+        # Then
+        self.assertGreater(warmup_time, 0)
+
+    def test_should_parse_concurrently(self):
+        # Given
+        engine = SnipsNLUEngine().fit(BEVERAGE_DATASET)
+        inputs = [
+            "Give me 3 cups of hot tea please",
+            "make me two cups of coffee",
+            "I want 4 iced teas",
+            "brew a boiling tea",
+            "hello world"
+        ] * 20
+        expected_results = [engine.parse(text) for text in inputs]
+        pool = ThreadPool(processes=4)
+
+        # When
+        try:
+            results = pool.map(engine.parse, inputs, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+        # Then
+        self.assertListEqual(expected_results, results)
+
     def test_should_be_serializable_into_bytearray(self):
         # Given
         dataset = BEVERAGE_DATASET
@@ -913,6 +1459,9 @@ class TestIntentParser1Config(ProcessingUnitConfig):
     def get_required_resources(self):
         return None
 
+    def get_required_builtin_entities(self, language):
+        return set()
+
 
 class TestIntentParser1(IntentParser):
     unit_name = "test_intent_parser1"
@@ -954,6 +1503,9 @@ class TestIntentParser2Config(ProcessingUnitConfig):
     def get_required_resources(self):
         return None
 
+    def get_required_builtin_entities(self, language):
+        return set()
+
 
 class TestIntentParser2(IntentParser):
     unit_name = "test_intent_parser2"
@@ -1,11 +1,13 @@
 from __future__ import unicode_literals
 
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
 
 from mock import patch
 
-from snips_nlu.constants import RES_INTENT, RES_INTENT_NAME
+from snips_nlu.constants import RES_INTENT, RES_INTENT_NAME, RES_SLOTS
 from snips_nlu.dataset import validate_and_format_dataset
+from snips_nlu.deadline import DEGRADATION_SLOT_FILLING, deadline_context
 from snips_nlu.intent_classifier import IntentClassifier, \
     LogRegIntentClassifier
 from snips_nlu.intent_parser import ProbabilisticIntentParser
@@ -14,6 +16,7 @@ from snips_nlu.pipeline.configs import (
     ProbabilisticIntentParserConfig, ProcessingUnitConfig)
 from snips_nlu.pipeline.units_registry import register_processing_unit, \
     reset_processing_units
+from snips_nlu.result import empty_result
 from snips_nlu.slot_filler import CRFSlotFiller, SlotFiller
 from snips_nlu.tests.utils import BEVERAGE_DATASET, FixtureTest
 from snips_nlu.utils import json_string, NotTrained
@@ -85,6 +88,92 @@ class TestProbabilisticIntentParser(FixtureTest):
         with self.assertRaises(NotTrained):
             parser.parse("foobar")
 
+    def test_should_parse_nbest(self):
+        # Given
+        dataset = validate_and_format_dataset(BEVERAGE_DATASET)
+        parser = ProbabilisticIntentParser().fit(dataset)
+        text = "Make me two cups of hot tea"
+
+        # When
+        results = parser.parse_nbest(text, 2)
+        parallel_results = parser.parse_nbest(text, 2, n_jobs=2)
+        filtered_results = parser.parse_nbest(text, 2, intents=["MakeCoffee"])
+
+        # Then
+        self.assertEqual(2, len(results))
+        self.assertEqual(parser.parse(text), results[0])
+        intents = [res[RES_INTENT][RES_INTENT_NAME] for res in results]
+        self.assertSetEqual({"MakeCoffee", "MakeTea"}, set(intents))
+        for res in results:
+            expected_slots = parser.slot_fillers[
+                res[RES_INTENT][RES_INTENT_NAME]].get_slots(text)
+            self.assertListEqual(expected_slots, res[RES_SLOTS])
+        self.assertListEqual(results, parallel_results)
+        self.assertEqual(1, len(filtered_results))
+        self.assertEqual(
+            "MakeCoffee", filtered_results[0][RES_INTENT][RES_INTENT_NAME])
+        self.assertEqual(parser.parse(text, intents=["MakeCoffee"]),
+                         filtered_results[0])
+
+    def test_should_not_parse_nbest_when_none_intent_is_most_likely(self):
+        # Given
+        dataset = validate_and_format_dataset(BEVERAGE_DATASET)
+        parser = ProbabilisticIntentParser().fit(dataset)
+        text = "hello world"
+
+        # When
+        results = parser.parse_nbest(text, 2)
+
+        # Then
+        self.assertEqual(empty_result(text), parser.parse(text))
+        self.assertListEqual([], results)
+
+    def test_should_reuse_threads_when_parsing_nbest(self):
+        # Given
+        dataset = validate_and_format_dataset(BEVERAGE_DATASET)
+        parser = ProbabilisticIntentParser().fit(dataset)
+        text = "Make me two cups of hot tea"
+
+        # When
+        with patch("snips_nlu.intent_parser.probabilistic_intent_parser"
+                   ".ThreadPool", wraps=ThreadPool) as mocked_pool:
+            results = parser.parse_nbest(text, 2, n_jobs=2)
+            next_results = parser.parse_nbest(text, 2, n_jobs=2)
+            parser.close()
+
+        # Then
+        self.assertEqual(1, mocked_pool.call_count)
+        self.assertListEqual(results, next_results)
+
+    def test_should_skip_slot_filling_when_deadline_exhausted(self):
+        # Given
+        parser = ProbabilisticIntentParser().fit(BEVERAGE_DATASET)
+        text = "make me two cups of tea"
+
+        # When
+        with deadline_context(0) as degradations:
+            result = parser.parse(text)
+
+        # Then
+        self.assertEqual(parser.parse(text)[RES_INTENT], result[RES_INTENT])
+        self.assertListEqual([], result[RES_SLOTS])
+        self.assertListEqual([DEGRADATION_SLOT_FILLING], degradations)
+
+    def test_should_parse_batch(self):
+        # Given
+        dataset = validate_and_format_dataset(BEVERAGE_DATASET)
+        parser = ProbabilisticIntentParser().fit(dataset)
+        texts = ["Make me two cups of hot tea", "", "I want 3 coffees"]
+
+        # When
+        results = parser.parse_batch(texts)
+        filtered_results = parser.parse_batch(texts, intents="MakeCoffee")
+
+        # Then
+        self.assertListEqual([parser.parse(t) for t in texts], results)
+        self.assertListEqual([parser.parse(t, "MakeCoffee") for t in texts],
+                             filtered_results)
+
     def test_should_be_serializable_before_fitting(self):
         # Given
         parser = ProbabilisticIntentParser()
@@ -4,11 +4,11 @@ import logging
 
 from future.builtins import object, str
 from future.utils import iteritems
-from mock import MagicMock
+from mock import MagicMock, patch
 
 from snips_nlu.tests.utils import SnipsTest
 from snips_nlu.utils import (
-    DifferedLoggingMessage, LimitedSizeDict, ranges_overlap)
+    DifferedLoggingMessage, LRUCache, LimitedSizeDict, ranges_overlap)
 
 
 class TestLimitedSizeDict(SnipsTest):
@@ -61,6 +61,60 @@ class TestLimitedSizeDict(SnipsTest):
         self.assertListEqual(items, sequence[size_limit:])
 
 
+class TestLRUCache(SnipsTest):
+    def test_should_evict_least_recently_used_entries(self):
+        # Given
+        cache = LRUCache(size_limit=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+
+        # When
+        cache.get("a")
+        cache.put("c", 3)
+
+        # Then
+        self.assertEqual(1, cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(3, cache.get("c"))
+        expected_stats = {
+            "hits": 3,
+            "misses": 1,
+            "evictions": 1,
+            "hit_rate": 0.75,
+            "size": 2
+        }
+        self.assertDictEqual(expected_stats, cache.stats)
+
+    @patch("snips_nlu.utils.default_timer")
+    def test_should_expire_entries(self, mocked_timer):
+        # Given
+        mocked_timer.return_value = 10.
+        cache = LRUCache(size_limit=10, ttl=5)
+        cache.put("a", 1)
+
+        # When
+        mocked_timer.return_value = 14.
+        value_before_expiration = cache.get("a")
+        mocked_timer.return_value = 16.
+        value_after_expiration = cache.get("a")
+
+        # Then
+        self.assertEqual(1, value_before_expiration)
+        self.assertIsNone(value_after_expiration)
+        self.assertEqual(0, len(cache))
+
+    def test_should_clear_entries(self):
+        # Given
+        cache = LRUCache(size_limit=10)
+        cache.put("a", 1)
+
+        # When
+        cache.clear()
+
+        # Then
+        self.assertNotIn("a", cache)
+
+
 class TestUtils(SnipsTest):
     def test_ranges_overlap(self):
         # Given
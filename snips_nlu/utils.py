@@ -1,4 +1,4 @@
-from __future__ import unicode_literals
+from __future__ import division, unicode_literals
 
 import errno
 import importlib
@@ -12,6 +12,8 @@ from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from tempfile import mkdtemp
+from threading import Lock
+from timeit import default_timer
 from zipfile import ZIP_DEFLATED, ZipFile
 
 import numpy as np
@@ -121,6 +123,98 @@ class LimitedSizeDict(OrderedDict):
         return super(LimitedSizeDict, self).__eq__(other)
 
 
+class LRUCache(object):
+    """Thread-safe cache with a Least Recently Used eviction policy
+
+    Args:
+        size_limit (int): Maximum number of entries stored in the cache
+        ttl (float, optional): Time to live of the entries, in seconds. By
+            default, entries only expire when they are evicted.
+
+    The cache keeps track of its hits, misses and evictions, see
+    :attr:`stats`.
+    """
+
+    def __init__(self, size_limit, ttl=None):
+        if size_limit < 1:
+            raise ValueError("size_limit must be a positive integer but "
+                             "received: %s" % size_limit)
+        self.size_limit = size_limit
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._get_entry(key) is not None
+
+    def get(self, key, default=None):
+        """Returns the value cached for *key*, or *default* if there is none
+
+        The entry then becomes the most recently used one.
+        """
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            # Re-inserting the entry moves it to the end of the ordered dict
+            del self._entries[key]
+            self._entries[key] = entry
+            return entry[0]
+
+    def put(self, key, value):
+        """Caches *value* for *key*, evicting the least recently used entry
+        if the cache is full"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, default_timer())
+            while len(self._entries) > self.size_limit:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Removes all the entries, the statistics being kept"""
+        with self._lock:
+            self._entries.clear()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    @property
+    def stats(self):
+        """dict: Number of hits, misses and evictions, along with the hit rate
+        and the current size of the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries)
+            }
+
+    def _get_entry(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl is not None and default_timer() - entry[1] > self.ttl:
+            del self._entries[key]
+            return None
+        return entry
+
+
 class UnupdatableDict(dict):
     def __setitem__(self, key, value):
         if key in self:
@@ -299,6 +393,9 @@ def log_result(logger, level, output_msg=None):
         def wrapped(*args, **kwargs):
             msg_fmt = dict()
             res = fn(*args, **kwargs)
+            # The result is only serialized when the message is logged
+            if not logger.isEnabledFor(level):
+                return res
             if "result" in output_msg:
                 try:
                     res_debug_string = json_debug_string(res)